@@ -26,11 +26,13 @@ class Config:
     DIR_LOGS = os.path.join(BASE_DIR, "logs")
     DIR_DATA = os.path.join(BASE_DIR, "data", "historical")
     DIR_MAPS = os.path.join(DIR_DATA, "mapas_fvg")
+    DIR_STATE = os.path.join(BASE_DIR, "data", "state")   # Fotos de custodia (arranque en caliente)
     
     # Archivos de Logs
     FILE_LOG_ACTIVITY = os.path.join(DIR_LOGS, "activity.log")
     FILE_LOG_ERRORS = os.path.join(DIR_LOGS, "error.log")
     FILE_LOG_ORDERS = os.path.join(DIR_LOGS, "orders.csv")
+    FILE_METRICS_LATENCY = os.path.join(DIR_LOGS, "latency_metrics.json")
     
     # ---------------------------------------------------------
     # 3. CREDENCIALES Y MODO
@@ -53,6 +55,8 @@ class Config:
     # 4. MERCADO
     # ---------------------------------------------------------
     SYMBOL = "AAVEUSDT"
+    # Cartera multi-símbolo (main_portfolio.py). Ej: SENTINEL_SYMBOLS=AAVEUSDT,SOLUSDT,LINKUSDT
+    SYMBOLS = [s.strip().upper() for s in os.getenv('SENTINEL_SYMBOLS', SYMBOL).split(',') if s.strip()]
     TIMEFRAMES = ['3m', '5m', '15m', '30m', '1h', '4h', '1d']
     
     LEVERAGE = 5 
@@ -84,6 +88,93 @@ class Config:
         MAX_RETRIES_SL = 5
         MIN_NOTIONAL_VALUE = 5.1
         DUPLICATE_DISTANCE_PCT = 0.001
+        BRACKET_BATCH = True      # SL + TPs en una sola petición batchOrders
+        SL_MIN_STEP_PCT = 0.001   # Movimiento mínimo del SL para reemplazarlo (0.1%)
+        SL_MIN_INTERVAL = 2.0     # Segundos mínimos entre reemplazos por posición
+
+    # Capa de Transporte HTTP (connections/transport.py)
+    class TransportConfig:
+        HOSTS_POR_POOL = 4        # Hosts distintos cacheados por clase
+        POOL_ORDERS = 4           # Conexiones keep-alive por host
+        POOL_MARKET = 4
+        POOL_TELEGRAM = 2
+        # Timeouts (conexión, lectura) en segundos por clase de endpoint
+        TIMEOUT_ORDERS = (3.05, 10)
+        TIMEOUT_MARKET = (3.05, 20)
+        TIMEOUT_TELEGRAM = (3.05, 10)
+
+    # Gobernador de Peso REST (connections/rate_governor.py)
+    class RateLimitConfig:
+        WEIGHT_LIMIT_1M = 2400    # Límite REQUEST_WEIGHT de Binance Futures por IP
+        FACTOR_SEGURIDAD = 0.80   # Usamos como máximo el 80% del límite
+        RESERVA_CRITICA = 0.15    # % del bucket reservado a órdenes/SL
+        BAN_DEFAULT_429 = 60      # Pausa (s) si el 429 no trae Retry-After
+        BAN_DEFAULT_418 = 120
+
+    # Runtime de Cartera (execution/portfolio.py)
+    class PortfolioConfig:
+        WORKERS_IO = 8            # Hilos para sync de datos / ejecución por símbolo
+        PROCESOS_ANALISIS = max((os.cpu_count() or 1) - 1, 0)  # 0 = analizar en los hilos
+
+    # Minero Histórico Profundo (tools/descargar_full_data.py)
+    class MinerConfig:
+        VELAS_POR_CHUNK = 10000   # ~7 días de 1m por chunk (10 requests de 1000)
+        HILOS = 6                 # Chunks descargados en paralelo
+        DIAS_DEFAULT = 365
+
+    # Foto de Cuenta (core/account_snapshot.py)
+    class AccountConfig:
+        SNAPSHOT_TTL = 5.0        # Segundos de validez de balance + posiciones
+        REFRESCO_BACKGROUND = True
+
+    # Notificador Telegram (interfaces/telegram_notifier.py)
+    class TelegramConfig:
+        BASE_URL = os.getenv('TELEGRAM_API_URL', 'https://api.telegram.org')  # Stub local en pruebas
+        COLA_MAX = 200            # Mensajes pendientes como máximo (los excedentes se descartan)
+        COALESCENCIA = 0.5        # Segundos que se espera para agrupar una ráfaga en un mensaje
+        MAX_CARACTERES = 4000     # Límite de Telegram: 4096 por mensaje
+        INTERVALO_MIN = 1.0       # Segundos entre envíos al mismo chat
+        MAX_POR_MINUTO = 20
+        REINTENTOS = 5
+        BACKOFF_MAX = 30.0
+        POLL_TIMEOUT = 25         # Long polling de getUpdates (segundos que la petición espera)
+
+    # Servicio de Dashboard (interfaces/dashboard_service.py)
+    class DashboardConfig:
+        REFRESCO_MAX = 4          # Renders por segundo como máximo (Live diferencial)
+        HTTP_HOST = '127.0.0.1'   # Endpoint JSON de solo lectura (solo local)
+        HTTP_PUERTO = int(os.getenv('SENTINEL_DASH_PORT', '0'))  # 0 = desactivado
+
+    # Planificador del Bucle Principal (core/scheduler.py)
+    class SchedulerConfig:
+        WORKERS = 2               # Hilos para tareas pesadas (sync de velas + análisis)
+        PAUSA_RED = 5             # Segundos que se pospone el latido tras un fallo de red
+        DESFASE_CIERRE = 2        # Análisis alineado a :00/:10/...+2s (el cierre de vela se ve ~2 s después)
+
+    # Fotos de Custodia (execution/custody_store.py)
+    class CustodyConfig:
+        SNAPSHOT_INTERVAL = 5.0   # Segundos mínimos entre fotos periódicas (solo si hubo cambios)
+
+    # Telemetría de Latencia (core/latency.py)
+    class TelemetryConfig:
+        MAX_MUESTRAS = 2000       # Ventana de muestras por etapa para percentiles
+        EXPORT_INTERVAL = 30      # Segundos entre exportaciones a disco
+
+    # Escritor de Logs Asíncrono (logs/log_writer.py)
+    class LogConfig:
+        MAX_BYTES = 10 * 1024 * 1024  # Rotación por tamaño de cada archivo
+        RESPALDOS = 5                 # archivo.1 ... archivo.5
+        LOTE_MAX = 500                # Registros por escritura del hilo de fondo
+        CONSOLA = True                # Eco de actividad en consola (desde el hilo escritor)
+
+    # Captura de Features de Entrada (logic/feature_capture.py)
+    class FeatureConfig:
+        TIMEFRAMES = ('15m', '1h', '4h')
+        COLUMNAS = None           # None = todas las columnas numéricas del PrecisionLab
+        VENTANAS_RETORNO = (1, 5, 20, 50)
+        VENTANAS_VOLATILIDAD = (20, 50)
+        FVG_LOOKBACK = 50         # Velas revisadas para proximidad de FVG
+        VENTANA_ESTADO = 300      # Velas por timeframe retenidas en IndicatorState
 
     # ---------------------------------------------------------
     # 7. PARÁMETROS ESTRATEGIAS
@@ -141,6 +232,6 @@ class Config:
     # ---------------------------------------------------------
     @classmethod
     def inicializar_infraestructura(cls):
-        for d in [cls.DIR_LOGS, cls.DIR_DATA, cls.DIR_MAPS]:
+        for d in [cls.DIR_LOGS, cls.DIR_DATA, cls.DIR_MAPS, cls.DIR_STATE]:
             if not os.path.exists(d):
                 os.makedirs(d)
\ No newline at end of file
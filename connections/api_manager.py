@@ -1,6 +1,6 @@
 # =============================================================================
 # UBICACIÓN: connections/api_manager.py
-# DESCRIPCIÓN: API MANAGER V19.5 (AUTO-SYNC TIME DRIFT FIX)
+# DESCRIPCIÓN: API MANAGER V19.6 (AUTO-SYNC TIME DRIFT FIX)
 # =============================================================================
 
 import time
@@ -8,11 +8,41 @@ import logging
 from binance.um_futures import UMFutures
 from binance.error import ClientError
 from config.config import Config
+from connections.transport import obtener_transporte
+from connections.rate_governor import obtener_gobernador, PESOS
+
+class ClienteUM(UMFutures):
+    """
+    UMFutures firmando con el reloj corregido: la librería pisa payload['timestamp']
+    con el reloj local al firmar, así que un timestamp pasado por parámetro no llega.
+    'reloj' (ms) se evalúa en el momento de la firma, después de la espera del gobernador.
+    """
+    def __init__(self, *args, reloj=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.reloj = reloj or (lambda: int(time.time() * 1000))
+
+    def sign_request(self, http_method, url_path, payload=None, special=False):
+        payload = payload or {}
+        payload['timestamp'] = self.reloj()
+        query_string = self._prepare_params(payload, special)
+        payload['signature'] = self._get_sign(query_string)
+        return self.send_request(http_method, url_path, payload, special)
+
+    def limited_encoded_sign_request(self, http_method, url_path, payload=None):
+        payload = payload or {}
+        payload['timestamp'] = self.reloj()
+        query_string = self._prepare_params(payload)
+        url_path = url_path + "?" + query_string + "&signature=" + self._get_sign(query_string)
+        return self.send_request(http_method, url_path)
 
 class APIManager:
-    def __init__(self, logger=None):
+    def __init__(self, logger=None, base_url=None):
         self.log = logger
         self.client = None
+        self.client_market = None
+        self.base_url = base_url
+        self.transporte = obtener_transporte()
+        self.gov = obtener_gobernador()
         self.time_offset = 0
         self.last_sync_time = 0
         self.SYNC_INTERVAL = 3600  # Resincronizar cada 1 hora (3600s)
@@ -24,13 +54,28 @@ class APIManager:
     def _conectar_inicial(self):
         print("[API] 📡 Iniciando conexión...")
         try:
-            base_url = 'https://testnet.binancefuture.com' if Config.TESTNET else 'https://fapi.binance.com'
-            self.client = UMFutures(
+            base_url = self.base_url or ('https://testnet.binancefuture.com' if Config.TESTNET else 'https://fapi.binance.com')
+            # Cliente de trading (órdenes / lecturas firmadas) -> pool ORDERS
+            self.client = ClienteUM(
                 key=Config.API_KEY, 
                 secret=Config.API_SECRET,
                 base_url=base_url,
-                timeout=20
+                timeout=self.transporte.timeout('ORDERS'),
+                reloj=self._get_corrected_timestamp
             )
+            self.transporte.montar(self.client.session, 'ORDERS')
+
+            # Cliente de mercado (klines / ticker) -> pool MARKET, no compite con órdenes
+            self.client_market = UMFutures(
+                key=Config.API_KEY,
+                base_url=base_url,
+                timeout=self.transporte.timeout('MARKET')
+            )
+            self.transporte.montar(self.client_market.session, 'MARKET')
+
+            # El gobernador lee el peso usado de cada respuesta (mismo límite por IP)
+            for c in (self.client, self.client_market):
+                c.session.hooks['response'].append(self.gov.hook_respuesta)
             self._sincronizar_reloj(forzar=True)
             self._configurar_margen()
             self.trading_active = True
@@ -47,6 +92,7 @@ class APIManager:
         # Solo sincroniza si pasó 1 hora o se fuerza (por error)
         if forzar or (now - self.last_sync_time > self.SYNC_INTERVAL):
             try:
+                self.gov.adquirir(PESOS['time'], 'CUENTA')
                 server_time = int(self.client.time()['serverTime'])
                 local_time = int(now * 1000)
                 self.time_offset = server_time - local_time
@@ -64,38 +110,51 @@ class APIManager:
 
     def _configurar_margen(self):
         try:
-            # Timestamp fresco
-            ts = self._get_corrected_timestamp()
-            
             # Hedge Mode
             try:
-                self.client.change_position_mode(dualSidePosition="true", timestamp=ts)
+                self.gov.adquirir(PESOS['position_mode'], 'CUENTA')
+                self.client.change_position_mode(dualSidePosition="true")
             except ClientError as e:
                 if e.error_code != -4059: pass # Ignorar "No need to change"
 
-            # Leverage
-            try:
-                self.client.change_leverage(symbol=Config.SYMBOL, leverage=Config.LEVERAGE, timestamp=ts)
-            except ClientError: pass
+            # Leverage (todos los símbolos de la cartera)
+            for symbol in Config.SYMBOLS:
+                self.configurar_simbolo(symbol)
             
         except Exception as e:
             print(f"⚠️ [API] Nota Config: {e}")
 
+    def configurar_simbolo(self, symbol):
+        try:
+            self.gov.adquirir(PESOS['leverage'], 'CUENTA')
+            self.client.change_leverage(symbol=symbol, leverage=Config.LEVERAGE)
+        except ClientError: pass
+
     # --- MÉTODOS PÚBLICOS DE LECTURA ---
-    def get_klines(self, symbol, interval, limit=1000, startTime=None):
+    def get_klines(self, symbol, interval, limit=1000, startTime=None, prioridad='BACKFILL'):
+        """None = error de red / API; [] = el exchange no tiene velas en esa ventana."""
         try:
+            self.gov.adquirir(self.gov.peso_klines(limit), prioridad)
             params = {'symbol': symbol, 'interval': interval, 'limit': limit}
             if startTime: params['startTime'] = startTime
-            return self.client.klines(**params)
+            return self.client_market.klines(**params)
         except Exception as e:
             print(f"⚠️ [API] Error descarga: {e}")
-            return []
+            return None
 
-    def get_ticker_price(self, symbol):
+    def get_ticker_price(self, symbol, prioridad='MERCADO'):
         try: 
-            return float(self.client.ticker_price(symbol=symbol)['price'])
+            self.gov.adquirir(PESOS['ticker_price'], prioridad)
+            return float(self.client_market.ticker_price(symbol=symbol)['price'])
         except: return 0.0
 
+    def get_ticker_prices(self, prioridad='MERCADO'):
+        """Precio de todos los símbolos en una sola llamada (peso 2). {symbol: precio}"""
+        try:
+            self.gov.adquirir(PESOS['ticker_price_all'], prioridad)
+            return {t['symbol']: float(t['price']) for t in self.client_market.ticker_price()}
+        except: return {}
+
     # --- EJECUCIÓN CON AUTO-RETRY ---
     def execute_generic_order(self, params):
         if not self.trading_active: return False, "API_NOT_READY"
@@ -103,13 +162,13 @@ class APIManager:
         # Intento con auto-corrección de tiempo
         for intento in range(2): 
             try:
-                params['timestamp'] = self._get_corrected_timestamp()
+                self.gov.adquirir(PESOS['order'], 'CRITICA')
                 return True, self.client.new_order(**params)
             
             except ClientError as e:
                 # Si es error de Timestamp (-1021), forzamos resync y reintentamos UNA vez
                 if e.error_code == -1021 and intento == 0:
-                    print(f"🔧 [API] Detectado Error de Tiempo (-1021). Resincronizando y reintentando...")
+                    print("🔧 [API] Detectado Error de Tiempo (-1021). Resincronizando y reintentando...")
                     self._sincronizar_reloj(forzar=True)
                     continue # Vuelve al loop
                 return False, f"{e.error_code}: {e.error_message}"
@@ -118,6 +177,40 @@ class APIManager:
                 return False, str(e)
         return False, "MAX_RETRIES_EXCEEDED"
 
+    def execute_batch_orders(self, lote):
+        """
+        Envía órdenes en lote (/fapi/v1/batchOrders, máx. 5 por petición).
+        Retorna [(ok, respuesta)] alineado con 'lote': cada orden se evalúa por separado.
+        """
+        if not self.trading_active: return [(False, "API_NOT_READY")] * len(lote)
+        resultados = []
+        for i in range(0, len(lote), 5):
+            bloque = [{k: str(v) for k, v in p.items() if k != 'timestamp'} for p in lote[i:i + 5]]
+            resultados.extend(self._enviar_lote(bloque))
+        return resultados
+
+    def _enviar_lote(self, bloque):
+        for intento in range(2):
+            try:
+                self.gov.adquirir(PESOS['batch_order'], 'CRITICA')
+                respuesta = self.client.new_batch_order(bloque)
+                resultados = []
+                for r in respuesta:
+                    if isinstance(r, dict) and 'orderId' in r: resultados.append((True, r))
+                    else: resultados.append((False, f"{r.get('code')}: {r.get('msg')}" if isinstance(r, dict) else str(r)))
+                return resultados
+
+            except ClientError as e:
+                if e.error_code == -1021 and intento == 0:
+                    print("🔧 [API] Detectado Error de Tiempo (-1021) en lote. Resincronizando y reintentando...")
+                    self._sincronizar_reloj(forzar=True)
+                    continue
+                return [(False, f"{e.error_code}: {e.error_message}")] * len(bloque)
+
+            except Exception as e:
+                return [(False, str(e))] * len(bloque)
+        return [(False, "MAX_RETRIES_EXCEEDED")] * len(bloque)
+
     def place_market_order(self, symbol, side, qty, position_side=None, reduce_only=False):
         if not self.trading_active: return None
         try:
@@ -125,44 +218,86 @@ class APIManager:
                 'symbol': symbol,
                 'side': side,
                 'type': 'MARKET',
-                'quantity': float(qty),
-                'timestamp': self._get_corrected_timestamp()
+                'quantity': float(qty)
             }
             if position_side: params['positionSide'] = position_side
             if reduce_only: params['reduceOnly'] = 'true'
             
+            self.gov.adquirir(PESOS['order'], 'CRITICA')
             return self.client.new_order(**params)
         except Exception as e:
             raise e
 
-    def get_position_info(self, symbol):
+    def get_position_info(self, symbol=None, prioridad='CUENTA'):
+        """symbol=None -> posiciones de todos los símbolos (misma llamada, mismo peso)."""
         if not self.trading_active: return None
         try:
-            # Fix de lectura: timestamp actualizado
-            params = {'symbol': symbol, 'timestamp': self._get_corrected_timestamp()}
+            self.gov.adquirir(PESOS['position_risk'], prioridad)
+            params = {'symbol': symbol} if symbol else {}
             return self.client.get_position_risk(**params)
         except: return None
         
-    def get_account_balance(self):
+    def get_account_balance(self, prioridad='CUENTA'):
         if not self.trading_active: return 0.0
         try:
-            params = {'timestamp': self._get_corrected_timestamp()}
-            res = self.client.balance(**params)
+            self.gov.adquirir(PESOS['balance'], prioridad)
+            res = self.client.balance()
             for asset in res:
                 if asset['asset'] == 'USDT': return float(asset['balance'])
             return 0.0
         except: return 0.0
     
+    def get_balance_detalle(self, prioridad='CUENTA'):
+        """Balance y margen disponible USDT en una sola lectura. None si falla."""
+        if not self.trading_active: return None
+        try:
+            self.gov.adquirir(PESOS['balance'], prioridad)
+            for asset in self.client.balance():
+                if asset['asset'] == 'USDT':
+                    return {'balance': float(asset['balance']),
+                            'disponible': float(asset.get('availableBalance', asset['balance']))}
+            return {'balance': 0.0, 'disponible': 0.0}
+        except: return None
+
     def cancel_order(self, symbol, order_id):
         if self.trading_active:
             try: 
-                params = {'symbol': symbol, 'orderId': order_id, 'timestamp': self._get_corrected_timestamp()}
+                self.gov.adquirir(PESOS['cancel_order'], 'CRITICA')
+                params = {'symbol': symbol, 'orderId': order_id}
                 self.client.cancel_order(**params)
             except: pass
             
+    def get_open_orders(self, symbol, prioridad='CUENTA'):
+        """
+        Órdenes abiertas del símbolo. Retorna None si la lectura falla
+        (Financials no debe borrar el libro local en ese caso).
+        """
+        if not self.trading_active: return None
+        try:
+            self.gov.adquirir(PESOS['open_orders'], prioridad)
+            params = {'symbol': symbol}
+            return self.client.get_orders(**params)
+        except: return None
+
+    def query_order(self, symbol, order_id, prioridad='CRITICA'):
+        self.gov.adquirir(PESOS['query_order'], prioridad)
+        params = {'symbol': symbol, 'orderId': order_id}
+        return self.client.query_order(**params)
+
+    def get_exchange_info(self):
+        self.gov.adquirir(PESOS['exchange_info'], 'CUENTA')
+        return self.client_market.exchange_info()
+
+    def metricas_transporte(self):
+        return self.transporte.metricas()
+
+    def metricas_gobernador(self):
+        return self.gov.metricas()
+
     def cancel_all_open_orders(self, symbol):
         if self.trading_active:
             try: 
-                params = {'symbol': symbol, 'timestamp': self._get_corrected_timestamp()}
+                self.gov.adquirir(PESOS['cancel_all'], 'CRITICA')
+                params = {'symbol': symbol}
                 self.client.cancel_open_orders(**params)
             except: pass
\ No newline at end of file
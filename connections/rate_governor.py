@@ -0,0 +1,212 @@
+# =============================================================================
+# UBICACIÓN: connections/rate_governor.py
+# DESCRIPCIÓN: GOBERNADOR DE PESO REST V1.0 (TOKEN BUCKET + COLAS DE PRIORIDAD)
+# =============================================================================
+
+import time
+import heapq
+import itertools
+import threading
+from config.config import Config
+
+class RateGovernor:
+    """
+    GOBERNADOR DE PESO V1.0:
+    - Token bucket sobre el límite REQUEST_WEIGHT (1 minuto) de Binance.
+    - Se corrige con el peso real que reporta el servidor (X-MBX-USED-WEIGHT-1M).
+    - Las llamadas esperan en una cola de prioridad: las órdenes y SL salen primero,
+      el backfill y el dashboard esperan. Una reserva de tokens queda solo para CRITICA.
+    - Ante 429/418 congela todo el tráfico hasta que venza el Retry-After.
+    """
+    PRIORIDADES = {
+        'CRITICA': 0,   # Entradas, SL, TPs, cancelaciones
+        'CUENTA': 1,    # Posiciones, órdenes abiertas, balance para sizing
+        'MERCADO': 2,   # Ticker del latido
+        'BACKFILL': 3,  # Descarga de klines
+        'VISUAL': 4     # Dashboard / consultas humanas
+    }
+
+    def __init__(self, config=Config, reloj=time.monotonic):
+        rcfg = config.RateLimitConfig
+        self.cfg = rcfg
+        self.reloj = reloj
+        self.limite = rcfg.WEIGHT_LIMIT_1M
+        self.capacidad = rcfg.WEIGHT_LIMIT_1M * rcfg.FACTOR_SEGURIDAD
+        self.tasa = self.capacidad / 60.0
+        self.reserva = self.capacidad * rcfg.RESERVA_CRITICA
+        self.tokens = self.capacidad
+        self.ultimo_relleno = reloj()
+
+        self.baneado_hasta = 0.0
+        self.peso_servidor = 0
+        self.ordenes_servidor = 0
+
+        self._cond = threading.Condition()
+        self._cola = []
+        self._seq = itertools.count()
+
+        # Métricas por prioridad
+        self.stats = {p: {'atendidas': 0, 'espera_total': 0.0, 'espera_max': 0.0, 'expiradas': 0}
+                      for p in self.PRIORIDADES}
+        self.bloqueos = 0
+
+    # =========================================================================
+    # ADQUISICIÓN
+    # =========================================================================
+
+    def adquirir(self, peso=1, prioridad='CUENTA', timeout=None):
+        """
+        Bloquea hasta que haya peso disponible y sea el turno de esta prioridad.
+        Retorna True si se concedió, False si venció el timeout.
+        """
+        if prioridad not in self.PRIORIDADES: prioridad = 'CUENTA'
+        nivel = self.PRIORIDADES[prioridad]
+        ticket = (nivel, next(self._seq))
+        piso = 0 if nivel == 0 else self.reserva
+        inicio = self.reloj()
+
+        with self._cond:
+            heapq.heappush(self._cola, ticket)
+            try:
+                while True:
+                    self._rellenar()
+                    ahora = self.reloj()
+                    es_turno = self._cola[0] == ticket
+
+                    if es_turno and ahora >= self.baneado_hasta and self.tokens - peso >= piso:
+                        self.tokens -= peso
+                        heapq.heappop(self._cola)
+                        break
+
+                    if timeout is not None and ahora - inicio >= timeout:
+                        self._cola.remove(ticket)
+                        heapq.heapify(self._cola)
+                        self.stats[prioridad]['expiradas'] += 1
+                        return False
+
+                    # Cálculo de la siguiente revisión
+                    if not es_turno:
+                        espera = 0.05
+                    elif ahora < self.baneado_hasta:
+                        espera = self.baneado_hasta - ahora
+                    else:
+                        espera = max((peso + piso - self.tokens) / self.tasa, 0.001)
+                    if timeout is not None:
+                        espera = min(espera, max(timeout - (ahora - inicio), 0.001))
+                    self._cond.wait(min(espera, 1.0))
+            finally:
+                self._cond.notify_all()
+
+            espera_total = self.reloj() - inicio
+            s = self.stats[prioridad]
+            s['atendidas'] += 1
+            s['espera_total'] += espera_total
+            if espera_total > s['espera_max']: s['espera_max'] = espera_total
+        return True
+
+    def _rellenar(self):
+        ahora = self.reloj()
+        delta = ahora - self.ultimo_relleno
+        if delta > 0:
+            self.tokens = min(self.capacidad, self.tokens + delta * self.tasa)
+            self.ultimo_relleno = ahora
+
+    # =========================================================================
+    # RETROALIMENTACIÓN DEL SERVIDOR
+    # =========================================================================
+
+    def registrar_respuesta(self, status_code, headers):
+        """Ajusta el bucket con los headers de peso y aplica bloqueos 429/418."""
+        with self._cond:
+            try:
+                usado = headers.get('X-MBX-USED-WEIGHT-1M') or headers.get('x-mbx-used-weight-1m')
+                if usado is not None:
+                    self.peso_servidor = int(usado)
+                    self._rellenar()
+                    # Nunca creer que queda más de lo que el servidor nos concede
+                    self.tokens = min(self.tokens, self.capacidad - self.peso_servidor)
+
+                ordenes = headers.get('X-MBX-ORDER-COUNT-1M') or headers.get('x-mbx-order-count-1m')
+                if ordenes is not None:
+                    self.ordenes_servidor = int(ordenes)
+            except (TypeError, ValueError): pass
+
+            if status_code in (418, 429):
+                try: retry_after = float(headers.get('Retry-After', 0))
+                except (TypeError, ValueError): retry_after = 0
+                if retry_after <= 0:
+                    retry_after = self.cfg.BAN_DEFAULT_418 if status_code == 418 else self.cfg.BAN_DEFAULT_429
+                self.baneado_hasta = max(self.baneado_hasta, self.reloj() + retry_after)
+                self.tokens = 0
+                self.bloqueos += 1
+            self._cond.notify_all()
+
+    def hook_respuesta(self, response, *args, **kwargs):
+        """Hook para requests.Session (hooks['response'])."""
+        try: self.registrar_respuesta(response.status_code, response.headers)
+        except Exception: pass
+        return response
+
+    # =========================================================================
+    # MÉTRICAS
+    # =========================================================================
+
+    def metricas(self):
+        with self._cond:
+            self._rellenar()
+            profundidad = {p: 0 for p in self.PRIORIDADES}
+            nombres = {v: k for k, v in self.PRIORIDADES.items()}
+            for nivel, _ in self._cola:
+                profundidad[nombres[nivel]] += 1
+
+            esperas = {}
+            for p, s in self.stats.items():
+                media = s['espera_total'] / s['atendidas'] if s['atendidas'] else 0.0
+                esperas[p] = {
+                    'atendidas': s['atendidas'],
+                    'espera_media_ms': round(media * 1000, 1),
+                    'espera_max_ms': round(s['espera_max'] * 1000, 1),
+                    'expiradas': s['expiradas']
+                }
+            return {
+                'tokens': round(self.tokens, 1),
+                'capacidad': self.capacidad,
+                'peso_servidor_1m': self.peso_servidor,
+                'ordenes_servidor_1m': self.ordenes_servidor,
+                'bloqueado_s': round(max(0.0, self.baneado_hasta - self.reloj()), 1),
+                'bloqueos': self.bloqueos,
+                'cola': profundidad,
+                'esperas': esperas
+            }
+
+    # =========================================================================
+    # TABLA DE PESOS (USDⓈ-M FUTURES)
+    # =========================================================================
+
+    @staticmethod
+    def peso_klines(limit):
+        if limit < 100: return 1
+        if limit < 500: return 2
+        if limit <= 1000: return 5
+        return 10
+
+
+PESOS = {
+    'time': 1, 'exchange_info': 1, 'ticker_price': 1, 'ticker_price_all': 2,
+    'order': 1, 'batch_order': 5, 'query_order': 1,
+    'cancel_order': 1, 'cancel_all': 1, 'open_orders': 1,
+    'position_risk': 5, 'balance': 5, 'account': 5,
+    'leverage': 1, 'position_mode': 1
+}
+
+
+# El peso es por IP: un único gobernador para todo el proceso
+_GOBERNADOR = None
+_LOCK_GOBERNADOR = threading.Lock()
+
+def obtener_gobernador():
+    global _GOBERNADOR
+    with _LOCK_GOBERNADOR:
+        if _GOBERNADOR is None:
+            _GOBERNADOR = RateGovernor()
+        return _GOBERNADOR
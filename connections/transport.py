@@ -0,0 +1,113 @@
+# =============================================================================
+# UBICACIÓN: connections/transport.py
+# DESCRIPCIÓN: CAPA DE TRANSPORTE V1.0 (POOLS KEEP-ALIVE COMPARTIDOS)
+# =============================================================================
+
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from config.config import Config
+
+class TransportPool:
+    """
+    CAPA DE TRANSPORTE V1.0:
+    - Un pool de conexiones keep-alive por CLASE de tráfico:
+      * ORDERS   -> Órdenes, SL, cancelaciones, lecturas firmadas.
+      * MARKET   -> Klines, ticker, exchange info.
+      * TELEGRAM -> Bot de Telegram (aislado: un chat lento no roba sockets a las órdenes).
+    - Los clientes (UMFutures, python-binance, requests) montan el adaptador
+      de su clase, así todas las llamadas reutilizan la conexión TLS abierta.
+    - Métricas de reutilización leídas directamente de los pools de urllib3.
+    """
+    CLASES = ('ORDERS', 'MARKET', 'TELEGRAM')
+
+    def __init__(self, config=Config):
+        tcfg = config.TransportConfig
+        self._lock = threading.Lock()
+        self.timeouts = {
+            'ORDERS': tcfg.TIMEOUT_ORDERS,
+            'MARKET': tcfg.TIMEOUT_MARKET,
+            'TELEGRAM': tcfg.TIMEOUT_TELEGRAM
+        }
+        tamanos = {
+            'ORDERS': tcfg.POOL_ORDERS,
+            'MARKET': tcfg.POOL_MARKET,
+            'TELEGRAM': tcfg.POOL_TELEGRAM
+        }
+        self.adapters = {}
+        self.sessions = {}
+        for clase in self.CLASES:
+            # pool_maxsize = conexiones vivas por host. pool_block=False: si se agota,
+            # se abre una conexión extra desechable en lugar de congelar la llamada.
+            self.adapters[clase] = HTTPAdapter(
+                pool_connections=tcfg.HOSTS_POR_POOL,
+                pool_maxsize=tamanos[clase],
+                pool_block=False
+            )
+
+    # =========================================================================
+    # ACCESO A SESIONES
+    # =========================================================================
+
+    def montar(self, session, clase):
+        """Monta el adaptador compartido de la clase sobre una sesión existente."""
+        adapter = self.adapters[clase]
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        return session
+
+    def sesion(self, clase):
+        """Sesión propia del transporte para clientes sin sesión (Telegram, scripts)."""
+        with self._lock:
+            if clase not in self.sessions:
+                self.sessions[clase] = self.montar(requests.Session(), clase)
+            return self.sessions[clase]
+
+    def timeout(self, clase):
+        return self.timeouts.get(clase, self.timeouts['MARKET'])
+
+    # =========================================================================
+    # MÉTRICAS
+    # =========================================================================
+
+    def metricas(self):
+        """
+        Retorna por clase: peticiones, conexiones nuevas (handshakes TLS) y % de reutilización.
+        """
+        reporte = {}
+        for clase, adapter in self.adapters.items():
+            peticiones = 0
+            conexiones = 0
+            try:
+                pools = adapter.poolmanager.pools
+                for key in list(pools.keys()):
+                    pool = pools.get(key)
+                    if pool is None: continue
+                    peticiones += pool.num_requests
+                    conexiones += pool.num_connections
+            except Exception: pass
+
+            reuso = (1 - conexiones / peticiones) * 100 if peticiones > 0 else 0.0
+            reporte[clase] = {
+                'peticiones': peticiones,
+                'conexiones_nuevas': conexiones,
+                'reuso_pct': round(reuso, 1)
+            }
+        return reporte
+
+    def cerrar(self):
+        for adapter in self.adapters.values():
+            try: adapter.close()
+            except: pass
+
+
+# Instancia compartida por todo el proceso (API, Telegram, herramientas)
+_TRANSPORTE = None
+_LOCK_TRANSPORTE = threading.Lock()
+
+def obtener_transporte():
+    global _TRANSPORTE
+    with _LOCK_TRANSPORTE:
+        if _TRANSPORTE is None:
+            _TRANSPORTE = TransportPool()
+        return _TRANSPORTE
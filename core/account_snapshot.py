@@ -0,0 +1,144 @@
+# =============================================================================
+# UBICACIÓN: core/account_snapshot.py
+# DESCRIPCIÓN: FOTO DE CUENTA V1.0 (BALANCE + MARGEN + POSICIONES CON TTL)
+# =============================================================================
+
+import time
+import threading
+
+class AccountSnapshot:
+    """
+    FOTO DE CUENTA V1.0:
+    - Una sola lectura de balance + posiciones por ventana TTL para todo el sistema
+      (Shooter, dashboard, Telegram, CLI ven los mismos números dentro del ciclo).
+    - Single-flight: si varios hilos piden una foto vencida, solo uno va a la API; el
+      resto sigue leyendo la foto previa (el lock nunca se retiene durante un round trip).
+    - Generaciones: un evento de cuenta durante un refresco en vuelo deja esa lectura
+      vencida al llegar (posiciones previas a un fill nunca pasan por vigentes).
+    - Se invalida ante eventos de cuenta (fills, cierres) o refresca en segundo plano.
+    - Si la API falla se conserva la última foto buena (marcada como vencida).
+    """
+    def __init__(self, config, api_manager, simbolo=None, reloj=time.monotonic):
+        acfg = config.AccountConfig
+        self.cfg = config
+        self.api = api_manager
+        self.reloj = reloj
+        self.ttl = acfg.SNAPSHOT_TTL
+        self.simbolo = simbolo   # None -> posiciones de toda la cuenta (cartera)
+
+        self._cond = threading.Condition()
+        self._foto = {'balance': 0.0, 'disponible': 0.0, 'posiciones': None, 'ts': None}
+        self._vence = 0.0
+        self._gen = 0            # Se incrementa con cada evento de cuenta (invalidar)
+        self._gen_foto = -1      # Generación vigente cuando arrancó la lectura de la foto actual
+        self._en_curso = None    # Generación del refresco en vuelo (single-flight)
+        self._hilo = None
+        self._activo = False
+        self.stats = {'lecturas': 0, 'refrescos': 0, 'fallos': 0, 'eventos': 0}
+
+        # Fuentes con eventos de cuenta (simulador) invalidan la foto en cada fill
+        if hasattr(api_manager, 'suscribir_cuenta'):
+            api_manager.suscribir_cuenta(self.invalidar)
+
+    # =========================================================================
+    # LECTURA
+    # =========================================================================
+
+    def leer(self, prioridad='CUENTA'):
+        """
+        Retorna la foto vigente {'balance', 'disponible', 'posiciones', 'ts'}.
+        - Vigente: sin esperas.
+        - Vencida por TTL con un refresco en vuelo: se sirve la anterior (sin esperar la API).
+        - Invalidada por un evento de cuenta (o sin foto aún): espera una lectura posterior
+          al evento; nunca se sirven posiciones previas a un fill.
+        """
+        with self._cond:
+            self.stats['lecturas'] += 1
+        return self._leer(prioridad, reintentar=True)
+
+    def _leer(self, prioridad, reintentar):
+        with self._cond:
+            while True:
+                invalida = self._gen_foto != self._gen
+                if not invalida and self.reloj() < self._vence: return self._foto
+                if self._en_curso != self._gen: break      # Nadie refresca esta generación: voy yo
+                if not invalida: return self._foto         # Solo venció el TTL: foto previa
+                objetivo = self._gen
+                while self._en_curso == objetivo: self._cond.wait()
+                # Falló la API: última foto buena (marcada como vencida), sin estampida
+                if self._gen_foto != objetivo and self._gen == objetivo: return self._foto
+            gen = self._en_curso = self._gen
+
+        try:
+            self._refrescar(prioridad, gen)
+        finally:
+            with self._cond:
+                if self._en_curso == gen: self._en_curso = None
+                self._cond.notify_all()
+                # Un fill llegó mientras leíamos: esta foto no sirve a quien la pidió
+                repetir = reintentar and self._gen_foto == gen and self._gen != gen
+        if repetir: return self._leer(prioridad, reintentar=False)
+        return self._foto
+
+    def invalidar(self, *args):
+        """Evento de cuenta: la próxima lectura irá a la API (y un refresco en vuelo no cuenta)."""
+        with self._cond:
+            self._gen += 1
+            self._vence = 0.0
+            self.stats['eventos'] += 1
+
+    def _refrescar(self, prioridad, gen):
+        # Llamadas REST fuera del lock: los lectores siguen sirviéndose de la foto previa
+        try:
+            if hasattr(self.api, 'get_balance_detalle'):
+                detalle = self.api.get_balance_detalle(prioridad=prioridad)
+            else:
+                bal = self.api.get_account_balance(prioridad=prioridad)
+                detalle = {'balance': bal, 'disponible': bal}
+            posiciones = self.api.get_position_info(self.simbolo, prioridad=prioridad)
+        except Exception:
+            detalle, posiciones = None, None
+
+        with self._cond:
+            if detalle is None or gen < self._gen_foto:
+                # Sin foto nueva (o llegó después que una lectura más reciente):
+                # reintento en la próxima lectura, valores previos intactos
+                if detalle is None: self.stats['fallos'] += 1
+                return False
+
+            self._foto = {
+                'balance': float(detalle['balance']),
+                'disponible': float(detalle['disponible']),
+                'posiciones': posiciones if posiciones is not None else self._foto['posiciones'],
+                'ts': time.time()
+            }
+            self._gen_foto = gen
+            # Si hubo un evento de cuenta durante la lectura, la foto ya nace vencida
+            if gen == self._gen: self._vence = self.reloj() + self.ttl
+            self.stats['refrescos'] += 1
+            return True
+
+    # =========================================================================
+    # REFRESCO EN SEGUNDO PLANO
+    # =========================================================================
+
+    def iniciar(self):
+        """Mantiene la foto caliente: los lectores (Shooter) nunca esperan un round trip."""
+        if self._hilo: return
+        self._activo = True
+        self._hilo = threading.Thread(target=self._bucle, daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._activo = False
+
+    def _bucle(self):
+        while self._activo:
+            self.leer(prioridad='CUENTA')
+            espera = max(self._vence - self.reloj(), 0.5)
+            time.sleep(min(espera, self.ttl))
+
+    def metricas(self):
+        m = dict(self.stats)
+        m['edad_s'] = round(time.time() - self._foto['ts'], 1) if self._foto['ts'] else None
+        return m
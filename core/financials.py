@@ -1,31 +1,52 @@
 # =============================================================================
 # UBICACIÓN: core/financials.py
-# DESCRIPCIÓN: GESTOR FINANCIERO V17.6 (SYNC SAFEGUARD)
+# DESCRIPCIÓN: GESTOR FINANCIERO V17.7 (SYNC SAFEGUARD)
 # =============================================================================
 
+import threading
+from core.order_book import LibroOrdenes
+from core.account_snapshot import AccountSnapshot
+
 class Financials:
     """
-    DEPARTAMENTO FINANCIERO V17.6:
+    DEPARTAMENTO FINANCIERO V17.7:
     - Protege el Libro Local contra fallos de lectura de la API.
     - Si la API falla, confiamos en el OrderManager.
+    - Libro local indexado (core/order_book.py): SL/TP por positionSide en O(1)
+      y sincronización por diferencias.
+    - Balance y posiciones desde una foto de cuenta con TTL (core/account_snapshot.py).
+    - La lectura de la API corre sin bloquear las altas / bajas del libro; solo la
+      reconciliación se serializa con ellas. Una orden colocada (o cancelada) desde
+      otro hilo mientras se lee la API no se pierde (ni resucita) al aplicar una foto
+      del exchange anterior a ese cambio. Una sincronización a la vez.
     """
-    def __init__(self, config, api_manager):
+    def __init__(self, config, api_manager, symbol=None, cuenta=None):
         self.cfg = config
         self.api = api_manager
-        self.libro_ordenes_local = {} 
+        self.symbol = symbol or config.SYMBOL
+        self.libro = LibroOrdenes()
+        self._lock_sync = threading.RLock()
+        self._lock_lectura = threading.Lock()   # Una lectura de órdenes abiertas a la vez
+        self.ultimo_diff = (0, 0, 0)
+        # En cartera la foto de cuenta es compartida (una lectura para todos los símbolos)
+        self.cuenta = cuenta or AccountSnapshot(config, api_manager, simbolo=self.symbol)
+
+    @property
+    def libro_ordenes_local(self):
+        """Vista plana {orderId: orden} para consultas y herramientas."""
+        return self.libro.como_dict()
 
     # =========================================================================
     # GESTIÓN DEL LIBRO LOCAL
     # =========================================================================
     
     def registrar_orden_en_libro(self, order_data):
-        oid = str(order_data['orderId'])
-        self.libro_ordenes_local[oid] = order_data
+        with self._lock_sync:
+            self.libro.insertar(order_data)
 
     def eliminar_orden_del_libro(self, order_id):
-        oid = str(order_id)
-        if oid in self.libro_ordenes_local:
-            del self.libro_ordenes_local[oid]
+        with self._lock_sync:
+            self.libro.eliminar(order_id)
 
     def sincronizar_libro_con_api(self):
         """
@@ -33,57 +54,54 @@ class Financials:
         CRÍTICO: Si la API falla (None), NO borramos el libro local.
         """
         try:
-            raw_orders = self.api.get_open_orders(self.cfg.SYMBOL)
-            
-            # 🛑 SALVAGUARDA: Si recibimos None, la API falló. Abortamos sync.
-            if raw_orders is None:
-                # print("⚠️ Sync omitido: API error (Usando memoria local)")
-                return False
+            with self._lock_lectura:
+                # Versión del libro antes del round trip: lo que cambie después es local y manda
+                desde = self.libro.version
+                raw_orders = self.api.get_open_orders(self.symbol)
+
+                # 🛑 SALVAGUARDA: Si recibimos None, la API falló. Abortamos sync.
+                if raw_orders is None:
+                    # print("⚠️ Sync omitido: API error (Usando memoria local)")
+                    return False
+
+                # Si llegamos aquí, la lectura fue exitosa (aunque sea lista vacía [])
+                # Solo se aplican altas / bajas / cambios respecto al libro local
+                with self._lock_sync:
+                    self.ultimo_diff = self.libro.reconciliar(raw_orders, desde=desde)
+                return True
 
-            # Si llegamos aquí, la lectura fue exitosa (aunque sea lista vacía [])
-            nuevo_libro = {}
-            for o in raw_orders:
-                nuevo_libro[str(o['orderId'])] = o
-            
-            self.libro_ordenes_local = nuevo_libro
-            return True
-            
         except Exception:
             return False
 
     def verificar_si_tiene_sl_local(self, side_posicion):
-        target_side = 'SELL' if side_posicion == 'LONG' else 'BUY'
-        tipos_sl = ['STOP_MARKET', 'STOP', 'TRAILING_STOP_MARKET']
-        
-        for oid, order in self.libro_ordenes_local.items():
-            if order['side'] == target_side and order['type'] in tipos_sl:
-                if order.get('positionSide') == side_posicion:
-                    price = float(order.get('stopPrice', 0) or order.get('activationPrice', 0))
-                    return True, price, oid
+        orden = self.libro.sl_activo(side_posicion)
+        if orden: return True, orden.stop_price, orden.order_id
         return False, 0.0, None
 
     # =========================================================================
     # LECTURAS
     # =========================================================================
 
-    def get_balance_total(self):
+    def get_balance_total(self, prioridad='CUENTA'):
+        try:
+            return float(self.cuenta.leer(prioridad)['balance'])
+        except: return 0.0
+
+    def get_margen_disponible(self, prioridad='CUENTA'):
         try:
-            balances = self.api.client.balance()
-            for b in balances:
-                if b['asset'] == 'USDT': return float(b['balance']) 
-            return 0.0
+            return float(self.cuenta.leer(prioridad)['disponible'])
         except: return 0.0
 
     def obtener_posiciones_activas_simple(self):
         try:
-            raw_pos = self.api.get_position_info(self.cfg.SYMBOL)
+            raw_pos = self.cuenta.leer()['posiciones']
             if raw_pos is None: return [] # Null safety
             
             activas = []
             lista_raw = raw_pos if isinstance(raw_pos, list) else [raw_pos]
             
             for p in lista_raw:
-                if p is None: continue
+                if p is None or p.get('symbol', self.symbol) != self.symbol: continue
                 amt = float(p.get('positionAmt', 0))
                 if amt != 0:
                     side = 'LONG' if amt > 0 else 'SHORT'
@@ -0,0 +1,133 @@
+# =============================================================================
+# UBICACIÓN: core/latency.py
+# DESCRIPCIÓN: TELEMETRÍA DE LATENCIA V1.0 (SPANS + HISTOGRAMAS DEL ORDER PATH)
+# =============================================================================
+
+import os
+import json
+import time
+import bisect
+import threading
+from collections import deque
+from contextlib import contextmanager
+from config.config import Config
+
+class LatencyTracker:
+    """
+    TELEMETRÍA V1.0:
+    Mide cada etapa del camino señal -> posición protegida:
+      SHOOTER -> DIRECTOR -> API_ENTRADA -> FILL -> SL -> TP
+    y los tiempos compuestos SENAL_A_PROTECCION / SENAL_A_BRACKET.
+    - Percentiles p50/p95/p99 sobre una ventana de muestras recientes.
+    - Histograma acumulado por cubetas (ms) desde el arranque.
+    - Exportación periódica a JSON (logs/latency_metrics.json).
+    """
+    CUBETAS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000]
+
+    def __init__(self, config=Config):
+        tcfg = config.TelemetryConfig
+        self.max_muestras = tcfg.MAX_MUESTRAS
+        self.export_interval = tcfg.EXPORT_INTERVAL
+        self.archivo = config.FILE_METRICS_LATENCY
+        self._lock = threading.Lock()
+        self.muestras = {}
+        self.histogramas = {}
+        self.totales = {}
+        self.ultimo_export = 0.0
+
+    # =========================================================================
+    # REGISTRO
+    # =========================================================================
+
+    def registrar(self, etapa, segundos):
+        ms = segundos * 1000.0
+        with self._lock:
+            if etapa not in self.muestras:
+                self.muestras[etapa] = deque(maxlen=self.max_muestras)
+                self.histogramas[etapa] = [0] * (len(self.CUBETAS_MS) + 1)
+                self.totales[etapa] = 0
+            self.muestras[etapa].append(ms)
+            self.histogramas[etapa][bisect.bisect_left(self.CUBETAS_MS, ms)] += 1
+            self.totales[etapa] += 1
+
+    @contextmanager
+    def span(self, etapa):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, time.perf_counter() - t0)
+
+    def desde(self, etapa, t0):
+        """Registra el tiempo transcurrido desde una marca perf_counter previa."""
+        if t0: self.registrar(etapa, time.perf_counter() - t0)
+
+    # =========================================================================
+    # CONSULTA
+    # =========================================================================
+
+    @staticmethod
+    def _percentil(ordenadas, p):
+        if not ordenadas: return 0.0
+        idx = min(len(ordenadas) - 1, max(0, int(round(p / 100.0 * len(ordenadas) + 0.5)) - 1))
+        return ordenadas[idx]
+
+    def resumen(self):
+        with self._lock:
+            copia = {e: sorted(m) for e, m in self.muestras.items()}
+            hist = {e: list(h) for e, h in self.histogramas.items()}
+            totales = dict(self.totales)
+
+        reporte = {}
+        for etapa, ordenadas in copia.items():
+            reporte[etapa] = {
+                'n': totales[etapa],
+                'p50_ms': round(self._percentil(ordenadas, 50), 2),
+                'p95_ms': round(self._percentil(ordenadas, 95), 2),
+                'p99_ms': round(self._percentil(ordenadas, 99), 2),
+                'max_ms': round(ordenadas[-1], 2) if ordenadas else 0.0,
+                'histograma': dict(zip([f"<={c}" for c in self.CUBETAS_MS] + ['>10000'], hist[etapa]))
+            }
+        return reporte
+
+    def reporte_texto(self):
+        res = self.resumen()
+        if not res: return "⏱️ Sin muestras de latencia todavía."
+        orden = ['SHOOTER', 'DIRECTOR', 'API_ENTRADA', 'FILL', 'SL', 'TP', 'BRACKET',
+                 'ENTRADA_A_PROTECCION', 'SENAL_A_PROTECCION', 'SENAL_A_BRACKET']
+        etapas = [e for e in orden if e in res] + sorted(e for e in res if e not in orden)
+        lineas = ["⏱️ LATENCIA ORDER PATH (ms) | p50 / p95 / p99 (n)"]
+        for e in etapas:
+            r = res[e]
+            lineas.append(f"{e:<20} {r['p50_ms']:>8.1f} / {r['p95_ms']:>8.1f} / {r['p99_ms']:>8.1f} ({r['n']})")
+        return "\n".join(lineas)
+
+    # =========================================================================
+    # EXPORTACIÓN
+    # =========================================================================
+
+    def exportar(self, forzar=False):
+        ahora = time.time()
+        if not forzar and ahora - self.ultimo_export < self.export_interval: return False
+        self.ultimo_export = ahora
+        try:
+            payload = {'generado': ahora, 'etapas': self.resumen()}
+            tmp = self.archivo + ".tmp"
+            with open(tmp, 'w', encoding='utf-8') as f:
+                json.dump(payload, f, indent=1)
+            os.replace(tmp, self.archivo)
+            return True
+        except Exception:
+            return False
+
+
+# Instancia compartida (Shooter, OrderManager, interfaces)
+_LATENCIA = None
+_LOCK_LATENCIA = threading.Lock()
+
+def obtener_latencia():
+    global _LATENCIA
+    with _LOCK_LATENCIA:
+        if _LATENCIA is None:
+            _LATENCIA = LatencyTracker()
+        return _LATENCIA
@@ -0,0 +1,187 @@
+# =============================================================================
+# UBICACIÓN: core/order_book.py
+# DESCRIPCIÓN: LIBRO DE ÓRDENES LOCAL INDEXADO V1.3 (ÍNDICES + RECONCILIACIÓN DIFF + GRUPOS INMUTABLES)
+# =============================================================================
+
+import threading
+from types import MappingProxyType
+
+class OrdenLocal:
+    """Orden abierta normalizada. 'raw' conserva el dict original del exchange."""
+    __slots__ = ('order_id', 'symbol', 'side', 'position_side', 'tipo', 'rol',
+                 'precio', 'stop_price', 'qty', 'status', 'firma', 'raw', 'alta')
+
+    TIPOS_SL = ('STOP_MARKET', 'STOP', 'TRAILING_STOP_MARKET')
+    TIPOS_TP = ('LIMIT', 'TAKE_PROFIT', 'TAKE_PROFIT_MARKET')
+
+    def __init__(self, raw, alta=0):
+        self.raw = raw
+        self.alta = alta    # Versión del libro en que se insertó
+        self.order_id = str(raw['orderId'])
+        self.symbol = raw.get('symbol')
+        self.side = raw.get('side')
+        self.position_side = raw.get('positionSide', 'BOTH')
+        self.tipo = raw.get('type')
+        self.precio = float(raw.get('price', 0) or 0)
+        self.stop_price = float(raw.get('stopPrice', 0) or raw.get('activationPrice', 0) or 0)
+        self.qty = float(raw.get('origQty', raw.get('quantity', 0)) or 0)
+        self.status = raw.get('status')
+        self.firma = self.firma_de(raw)
+
+        # Rol respecto a la posición: solo las órdenes del lado de salida protegen
+        lado_salida = {'LONG': 'SELL', 'SHORT': 'BUY'}.get(self.position_side)
+        if self.side == lado_salida and self.tipo in self.TIPOS_SL: self.rol = 'SL'
+        elif self.side == lado_salida and self.tipo in self.TIPOS_TP: self.rol = 'TP'
+        else: self.rol = 'ENTRADA'
+
+    @staticmethod
+    def firma_de(raw):
+        """Campos que, si cambian, obligan a reindexar la orden."""
+        return (raw.get('status'), raw.get('price'), raw.get('stopPrice'),
+                raw.get('origQty', raw.get('quantity')), raw.get('executedQty'), raw.get('updateTime'))
+
+
+class LibroOrdenes:
+    """
+    LIBRO LOCAL V1.3:
+    - Órdenes por id + índices secundarios:
+      (positionSide, side, type) y (positionSide, rol) con rol SL/TP/ENTRADA.
+    - Consultas O(1): sl_activo('LONG'), tps('SHORT'), buscar(...).
+    - reconciliar(lista_api) arma primero el diff y solo aplica altas, bajas y cambios.
+    - Concurrencia (un escritor a la vez, lectores sin lock):
+      * Cada grupo de un índice es inmutable: una mutación publica un grupo nuevo
+        (copia solo del grupo tocado, no del libro) con una asignación atómica.
+      * Alta: primero la orden, después los grupos. Baja: primero los grupos, después
+        la orden. Un lector nunca ve en un índice un id ausente del libro (salvo una
+        baja en curso, que las consultas descartan).
+    - reconciliar(lista, desde=version): la foto se leyó cuando el libro iba por
+      'desde'. Las altas y bajas locales posteriores (cada orden guarda la versión de
+      su alta; cada baja deja una marca) prevalecen sobre esa foto. Supone una
+      sincronización a la vez: al aplicarla se purgan las marcas que ya cubre.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._ordenes = {}
+        self._por_clave = {}   # (position_side, side, tipo) -> {oid: None} inmutable (orden de inserción)
+        self._por_rol = {}     # (position_side, rol) -> {oid: None} inmutable
+        self._bajas = {}       # oid -> versión de la baja local (para fotos leídas antes)
+        self.version = 0
+
+    def __len__(self):
+        return len(self._ordenes)
+
+    def __contains__(self, order_id):
+        return str(order_id) in self._ordenes
+
+    @property
+    def ordenes(self):
+        return MappingProxyType(self._ordenes)
+
+    # =========================================================================
+    # MUTACIONES (UN ESCRITOR A LA VEZ)
+    # =========================================================================
+
+    def insertar(self, raw):
+        with self._lock:
+            self.version += 1
+            orden = self._insertar(raw)
+            self._bajas.pop(orden.order_id, None)
+        return orden
+
+    def eliminar(self, order_id):
+        oid = str(order_id)
+        with self._lock:
+            orden = self._eliminar(oid)
+            # Aun sin orden local, la marca impide que una foto previa la resucite
+            self.version += 1
+            self._bajas[oid] = self.version
+        return orden
+
+    def reconciliar(self, raw_orders, desde=None):
+        """
+        Aplica la foto del exchange como diff. Retorna (altas, bajas, cambios).
+        El diff se calcula antes de tocar nada (bajo el lock de escritura, que los
+        lectores no toman): sin cambios, no se publica nada.
+        desde: versión del libro al pedir la foto (None = la foto manda en todo).
+        """
+        remotas = {str(o['orderId']): o for o in raw_orders}
+        with self._lock:
+            ordenes = self._ordenes
+            tope = self.version if desde is None else desde
+            # Lo tocado localmente después de pedir la foto no se pisa con ella
+            previa = lambda oid: ordenes[oid].alta <= tope
+            vigente = lambda oid: self._bajas.get(oid, -1) <= tope
+            bajas = [oid for oid in ordenes if oid not in remotas and previa(oid)]
+            altas = [raw for oid, raw in remotas.items() if oid not in ordenes and vigente(oid)]
+            cambios = [raw for oid, raw in remotas.items()
+                       if oid in ordenes and previa(oid) and OrdenLocal.firma_de(raw) != ordenes[oid].firma]
+            if bajas or altas or cambios:
+                self.version += 1
+                for oid in bajas: self._eliminar(oid)
+                for raw in altas + cambios: self._insertar(raw)
+            self._bajas = {oid: v for oid, v in self._bajas.items() if v > tope}
+        return len(altas), len(bajas), len(cambios)
+
+    @staticmethod
+    def _con(indice, clave, oid):
+        grupo = dict(indice.get(clave, {}))
+        grupo[oid] = None
+        indice[clave] = grupo
+
+    @staticmethod
+    def _sin(indice, clave, oid):
+        grupo = indice.get(clave)
+        if grupo is None or oid not in grupo: return
+        if len(grupo) == 1:
+            del indice[clave]
+            return
+        grupo = dict(grupo)
+        del grupo[oid]
+        indice[clave] = grupo
+
+    def _insertar(self, raw):
+        orden = OrdenLocal(raw, self.version)
+        previa = self._ordenes.get(orden.order_id)
+        if previa: self._desindexar(previa)
+        self._ordenes[orden.order_id] = orden
+        self._con(self._por_clave, (orden.position_side, orden.side, orden.tipo), orden.order_id)
+        self._con(self._por_rol, (orden.position_side, orden.rol), orden.order_id)
+        return orden
+
+    def _eliminar(self, order_id):
+        orden = self._ordenes.get(order_id)
+        if orden is None: return None
+        self._desindexar(orden)
+        del self._ordenes[order_id]
+        return orden
+
+    def _desindexar(self, orden):
+        self._sin(self._por_clave, (orden.position_side, orden.side, orden.tipo), orden.order_id)
+        self._sin(self._por_rol, (orden.position_side, orden.rol), orden.order_id)
+
+    # =========================================================================
+    # CONSULTAS (SIN LOCK)
+    # =========================================================================
+
+    def buscar(self, position_side, side=None, tipo=None, rol=None):
+        if rol is not None:
+            ids = self._por_rol.get((position_side, rol), {})
+        else:
+            ids = self._por_clave.get((position_side, side, tipo), {})
+        ordenes = self._ordenes
+        return [o for o in map(ordenes.get, ids) if o is not None]
+
+    def sl_activo(self, position_side):
+        """Primera orden SL vigente de la posición (o None)."""
+        ordenes = self._ordenes
+        for oid in self._por_rol.get((position_side, 'SL'), {}):
+            orden = ordenes.get(oid)
+            if orden is not None: return orden
+        return None
+
+    def tps(self, position_side):
+        return self.buscar(position_side, rol='TP')
+
+    def como_dict(self):
+        """Vista compatible con el libro plano anterior: {orderId: dict_exchange}."""
+        return {oid: o.raw for oid, o in dict(self._ordenes).items()}
@@ -0,0 +1,238 @@
+# =============================================================================
+# UBICACIÓN: core/scheduler.py
+# DESCRIPCIÓN: PLANIFICADOR COOPERATIVO V1.1 (PLAZOS MONOTÓNICOS + PRIORIDAD + TAREAS PESADAS EN HILOS + HILOS DEDICADOS)
+# =============================================================================
+
+import time
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from config.config import Config
+from core.latency import obtener_latencia
+
+class Tarea:
+    """Tarea con nombre: periódica (periodo en s) o por evento (periodo None)."""
+    __slots__ = ('nombre', 'fn', 'periodo', 'prioridad', 'pesada', 'hilo', 'encadenar',
+                 'proximo', 'pendientes', 'futuro', 'stats')
+
+    def __init__(self, nombre, fn, periodo, prioridad, pesada, encadenar, proximo, hilo=None):
+        self.nombre = nombre
+        self.fn = fn
+        self.periodo = periodo
+        self.prioridad = prioridad
+        self.pesada = pesada or hilo is not None
+        self.hilo = hilo                # Hilo dedicado con nombre (None = pool compartido)
+        self.encadenar = encadenar
+        self.proximo = proximo          # Plazo monotónico (None = solo por evento)
+        self.pendientes = deque()       # Argumentos de disparar() aún no atendidos
+        self.futuro = None              # Ejecución en curso en el pool (pesadas)
+        self.stats = {'ejecuciones': 0, 'total_s': 0.0, 'max_s': 0.0, 'ultima_s': 0.0,
+                      'excesos': 0, 'atrasos': 0, 'solapes': 0, 'fallos': 0}
+
+    def vencida(self, ahora):
+        if self.futuro is not None: return False
+        return bool(self.pendientes) or (self.proximo is not None and ahora >= self.proximo)
+
+
+class Scheduler:
+    """
+    PLANIFICADOR COOPERATIVO V1.1:
+    - Reemplaza el contador 'cycle_counter % N': cada tarea tiene su plazo en reloj
+      monotónico y el siguiente se calcula desde el plazo anterior (sin deriva).
+      Si una tarea se atrasa más de un periodo, se saltan los tics perdidos (se cuenta
+      'atrasos'): nunca hay ráfagas de recuperación.
+    - Prioridad: en cada paso corre la tarea vencida de menor 'prioridad'. La auditoría
+      de posiciones (prioridad 0) se vuelve a evaluar después de cada tarea ligera.
+    - Tareas pesadas (pesada=True) van al pool de hilos: el bucle solo recoge el resultado
+      y el latido sigue a 1 s. Nunca corren dos instancias de la misma tarea ('solapes').
+      Con encadenar='NOMBRE', el resultado dispara esa tarea por evento.
+    - hilo='NOMBRE': la tarea corre en un hilo dedicado con ese nombre, fuera del pool.
+      Las tareas que comparten hilo quedan serializadas entre sí (p. ej. todo lo que
+      coloca órdenes) sin bloquear al bucle ni competir con las pesadas.
+    - Métricas por tarea: ejecuciones, media / máx / última duración, excesos (duración
+      mayor al periodo), atrasos, solapes y fallos; cada duración va también a la
+      telemetría de latencia como TAREA_<nombre>.
+    - Los fallos se entregan a al_fallar(nombre, excepción) siempre en el hilo del bucle.
+    """
+    def __init__(self, config=Config, logger=None, al_fallar=None):
+        scfg = config.SchedulerConfig
+        self.log = logger
+        self.al_fallar = al_fallar
+        self.tareas = {}
+        self.pool = ThreadPoolExecutor(max_workers=scfg.WORKERS, thread_name_prefix="Tarea")
+        self.hilos = {}     # nombre -> ThreadPoolExecutor de un solo hilo
+        self._despertar = threading.Event()
+        self._lock = threading.Lock()
+        self._activo = False
+
+    # =========================================================================
+    # REGISTRO
+    # =========================================================================
+
+    def periodica(self, nombre, fn, periodo, prioridad=5, pesada=False, encadenar=None, inmediata=True, desfase=None,
+                  hilo=None):
+        """
+        desfase (s): alinea los plazos al reloj de pared, en múltiplos de 'periodo' más
+        'desfase' (p. ej. 2 s después de cada cierre de vela). La primera ejecución
+        también es inmediata si inmediata=True.
+        """
+        proximo = time.monotonic() + (0.0 if inmediata else periodo)
+        if desfase is not None:
+            proximo = time.monotonic() + (desfase - time.time()) % periodo
+        tarea = Tarea(nombre, fn, float(periodo), prioridad, pesada, encadenar, proximo, self._hilo(hilo))
+        # Arranque inmediato sin romper la alineación: cuenta como un disparo suelto
+        if desfase is not None and inmediata: tarea.pendientes.append(())
+        self.tareas[nombre] = tarea
+
+    def por_evento(self, nombre, fn, prioridad=5, pesada=False, encadenar=None, hilo=None):
+        self.tareas[nombre] = Tarea(nombre, fn, None, prioridad, pesada, encadenar, None, self._hilo(hilo))
+
+    def _hilo(self, nombre):
+        if nombre is None: return None
+        if nombre not in self.hilos:
+            self.hilos[nombre] = ThreadPoolExecutor(max_workers=1, thread_name_prefix=nombre)
+        return nombre
+
+    # =========================================================================
+    # CONTROL (CUALQUIER HILO)
+    # =========================================================================
+
+    def disparar(self, nombre, *args):
+        with self._lock:
+            self.tareas[nombre].pendientes.append(args)
+        self._despertar.set()
+
+    def posponer(self, nombre, segundos):
+        """Mueve el próximo plazo (p. ej. pausa de red del latido)."""
+        tarea = self.tareas[nombre]
+        tarea.proximo = time.monotonic() + segundos
+
+    def detener(self):
+        self._activo = False
+        self._despertar.set()
+        self.pool.shutdown(wait=False)
+        for hilo in self.hilos.values(): hilo.shutdown(wait=False)
+
+    # =========================================================================
+    # BUCLE
+    # =========================================================================
+
+    def correr(self):
+        self._activo = True
+        while self._activo:
+            self.paso()
+            espera = self._espera()
+            if espera > 0:
+                self._despertar.wait(espera)
+            self._despertar.clear()
+
+    def paso(self):
+        """Recoge las pesadas terminadas y ejecuta las vencidas por prioridad. Retorna cuántas corrió."""
+        self._recoger()
+        n = 0
+        ejecutadas = set()
+        while n <= 2 * len(self.tareas):
+            ahora = time.monotonic()
+            candidatas = [t for t in self.tareas.values() if t.nombre not in ejecutadas and t.vencida(ahora)]
+            if not candidatas: break
+            tarea = min(candidatas, key=lambda t: (t.prioridad, t.proximo or 0.0))
+            # Una vez por paso, salvo la prioritaria (0): si vuelve a vencer tras una
+            # tarea lenta, pasa otra vez delante del resto
+            if tarea.prioridad > 0: ejecutadas.add(tarea.nombre)
+            self._lanzar(tarea, ahora)
+            n += 1
+        return n
+
+    def _espera(self):
+        ahora = time.monotonic()
+        plazos = []
+        for t in self.tareas.values():
+            if t.futuro is not None: continue   # Al terminar despierta al bucle
+            if t.pendientes:
+                return 0.0
+            elif t.proximo is not None:
+                plazos.append(t.proximo)
+        return max(0.0, min(plazos) - ahora) if plazos else 0.5
+
+    def _avanzar(self, tarea, ahora):
+        if tarea.proximo is None or tarea.proximo > ahora: return
+        tarea.proximo += tarea.periodo
+        if tarea.proximo <= ahora:
+            perdidos = int((ahora - tarea.proximo) // tarea.periodo) + 1
+            tarea.stats['atrasos'] += perdidos
+            tarea.proximo += perdidos * tarea.periodo
+
+    def _lanzar(self, tarea, ahora):
+        args = ()
+        if tarea.pendientes:
+            with self._lock: args = tarea.pendientes.popleft()
+        else:
+            self._avanzar(tarea, ahora)
+
+        if tarea.pesada:
+            pool = self.hilos[tarea.hilo] if tarea.hilo else self.pool
+            tarea.futuro = pool.submit(self._medir, tarea, args)
+            tarea.futuro.add_done_callback(lambda _f: self._despertar.set())
+            return
+
+        ok, resultado = self._medir(tarea, args)
+        self._cerrar(tarea, ok, resultado)
+
+    def _medir(self, tarea, args):
+        t0 = time.perf_counter()
+        try:
+            ok, resultado = True, tarea.fn(*args)
+        except Exception as e:
+            ok, resultado = False, e
+        dur = time.perf_counter() - t0
+        st = tarea.stats
+        st['ejecuciones'] += 1
+        st['total_s'] += dur
+        st['ultima_s'] = dur
+        if dur > st['max_s']: st['max_s'] = dur
+        if tarea.periodo and dur > tarea.periodo:
+            st['excesos'] += 1
+            if self.log: self.log.registrar_error("SCHEDULER", f"⏱️ {tarea.nombre} excedió su periodo: {dur:.2f}s > {tarea.periodo:g}s")
+        obtener_latencia().registrar(f"TAREA_{tarea.nombre}", dur)
+        return ok, resultado
+
+    def _recoger(self):
+        for tarea in self.tareas.values():
+            f = tarea.futuro
+            if f is None or not f.done(): continue
+            tarea.futuro = None
+            ok, resultado = f.result()
+            self._cerrar(tarea, ok, resultado)
+            # Si venció mientras corría, el próximo tic cuenta como solape (no se encola)
+            if tarea.proximo is not None and tarea.proximo <= time.monotonic():
+                tarea.stats['solapes'] += 1
+                self._avanzar(tarea, time.monotonic())
+
+    def _cerrar(self, tarea, ok, resultado):
+        if not ok:
+            tarea.stats['fallos'] += 1
+            if self.al_fallar: self.al_fallar(tarea.nombre, resultado)
+            elif self.log: self.log.registrar_error("SCHEDULER", f"❌ {tarea.nombre}: {resultado}")
+            return
+        if tarea.encadenar and resultado is not None:
+            self.disparar(tarea.encadenar, resultado)
+
+    # =========================================================================
+    # MÉTRICAS
+    # =========================================================================
+
+    def metricas(self):
+        res = {}
+        ahora = time.monotonic()
+        for nombre, t in self.tareas.items():
+            st = dict(t.stats)
+            n = st['ejecuciones']
+            st['media_ms'] = round(st.pop('total_s') / n * 1000, 2) if n else 0.0
+            st['max_ms'] = round(st.pop('max_s') * 1000, 2)
+            st['ultima_ms'] = round(st.pop('ultima_s') * 1000, 2)
+            st['periodo'] = t.periodo
+            st['en_curso'] = t.futuro is not None
+            st['hilo'] = t.hilo
+            st['proximo_en'] = round(t.proximo - ahora, 3) if t.proximo is not None else None
+            res[nombre] = st
+        return res
@@ -0,0 +1,129 @@
+# =============================================================================
+# UBICACIÓN: core/state_store.py
+# DESCRIPCIÓN: ESTADO COMPARTIDO V1.1 (COPY-ON-WRITE: ESCRITURA CON LOCK, LECTURA SIN LOCK)
+# =============================================================================
+
+import threading
+from collections.abc import MutableMapping
+from types import MappingProxyType
+
+class StateStore(MutableMapping):
+    """
+    ESTADO COMPARTIDO V1.1:
+    - Reemplazo directo de un dict compartido entre hilos (custodias del Comptroller).
+    - Escritura: bajo lock se arma un dict nuevo y se publica la referencia (asignación
+      atómica). Las escrituras quedan serializadas aunque lleguen de varios hilos
+      (workers de cartera, bucle principal).
+    - Lectura: get / in / items() / values() recorren la foto vigente sin lock; una
+      mutación concurrente nunca rompe una iteración en curso ("dict changed size").
+    - version: se incrementa en cada publicación (detección de cambios con un int).
+    - Los valores publicados no se modifican en sitio: quien cambia un registro publica
+      uno nuevo (store[key] = {**pos, ...} o reemplazar()). Así foto() / items() nunca
+      copian un dict a medio escribir.
+    - reemplazar(cambios): publica varios registros en una sola versión, solo para las
+      claves que siguen presentes (un refresco no resucita una posición ya cerrada).
+    - foto(): copia de dos niveles para consumidores externos (dashboard, HTTP, procesos).
+    """
+    def __init__(self, datos=None):
+        self._lock = threading.Lock()
+        self._vista = MappingProxyType(dict(datos or {}))
+        self.version = 0
+
+    # =========================================================================
+    # LECTURA (SIN LOCK)
+    # =========================================================================
+
+    def __getitem__(self, key):
+        return self._vista[key]
+
+    def __iter__(self):
+        return iter(self._vista)
+
+    def __len__(self):
+        return len(self._vista)
+
+    def __contains__(self, key):
+        return key in self._vista
+
+    def get(self, key, defecto=None):
+        return self._vista.get(key, defecto)
+
+    # Vistas de UNA versión (las de MutableMapping releen self[key] en cada paso)
+    def keys(self):
+        return self._vista.keys()
+
+    def items(self):
+        return self._vista.items()
+
+    def values(self):
+        return self._vista.values()
+
+    def vista(self):
+        """Mapping inmutable vigente (referencia, sin copia)."""
+        return self._vista
+
+    def foto(self):
+        """{key: copia del valor} consistente con una sola versión."""
+        return {k: dict(v) if isinstance(v, dict) else v for k, v in self._vista.items()}
+
+    # =========================================================================
+    # ESCRITURA (COPY-ON-WRITE)
+    # =========================================================================
+
+    def _publicar(self, nuevo):
+        self._vista = MappingProxyType(nuevo)
+        self.version += 1
+
+    def __setitem__(self, key, valor):
+        with self._lock:
+            nuevo = dict(self._vista)
+            nuevo[key] = valor
+            self._publicar(nuevo)
+
+    def __delitem__(self, key):
+        with self._lock:
+            nuevo = dict(self._vista)
+            del nuevo[key]
+            self._publicar(nuevo)
+
+    def pop(self, key, *defecto):
+        """Atómico (el pop de MutableMapping haría lectura + borrado por separado)."""
+        with self._lock:
+            if key not in self._vista:
+                if defecto: return defecto[0]
+                raise KeyError(key)
+            nuevo = dict(self._vista)
+            valor = nuevo.pop(key)
+            self._publicar(nuevo)
+            return valor
+
+    def update(self, *args, **kwargs):
+        with self._lock:
+            nuevo = dict(self._vista)
+            nuevo.update(*args, **kwargs)
+            self._publicar(nuevo)
+
+    def reemplazar(self, cambios):
+        """Publica cambios solo sobre claves existentes. Retorna cuántas se reemplazaron."""
+        with self._lock:
+            vigentes = {k: v for k, v in cambios.items() if k in self._vista}
+            if vigentes:
+                nuevo = dict(self._vista)
+                nuevo.update(vigentes)
+                self._publicar(nuevo)
+            return len(vigentes)
+
+    def setdefault(self, key, defecto=None):
+        with self._lock:
+            if key in self._vista: return self._vista[key]
+            nuevo = dict(self._vista)
+            nuevo[key] = defecto
+            self._publicar(nuevo)
+            return defecto
+
+    def clear(self):
+        with self._lock:
+            if self._vista: self._publicar({})
+
+    def __repr__(self):
+        return f"StateStore({dict(self._vista)!r})"
@@ -0,0 +1,251 @@
+# =============================================================================
+# UBICACIÓN: data/bulk_sync.py
+# DESCRIPCIÓN: SINCRONIZADOR MASIVO DE VELAS V1.0 (MULTI-SÍMBOLO CONCURRENTE)
+# =============================================================================
+
+import os
+import time
+import json
+import pandas as pd
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from config.config import Config
+
+INTERVALOS_MS = {
+    '1m': 60_000, '2m': 120_000, '3m': 180_000, '5m': 300_000, '15m': 900_000, '30m': 1_800_000,
+    '1h': 3_600_000, '2h': 7_200_000, '4h': 14_400_000, '1d': 86_400_000
+}
+COLUMNAS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+class BulkSynchronizer:
+    """
+    SINCRONIZADOR MASIVO V1.0:
+    - Planifica los rangos faltantes de cada (símbolo, timeframe) desde el índice de
+      último timestamp (leído de la cola del CSV, sin cargar el archivo entero).
+    - Lanza los bloques de 1000 velas en paralelo; el ritmo lo pone el gobernador
+      de peso (prioridad BACKFILL), no un sleep fijo.
+    - Escribe cada bloque en el CSV en cuanto llega y es contiguo (append), así que
+      una interrupción deja el archivo consistente y la siguiente pasada reanuda.
+    """
+    BLOQUE = 1000
+    VELAS_INICIALES = 1500
+
+    def __init__(self, api_manager, base_dir=None, max_hilos=None):
+        self.api = api_manager
+        self.base_dir = base_dir or Config.DIR_DATA
+        self.max_hilos = max_hilos or Config.PortfolioConfig.WORKERS_IO
+        self.indice = {}      # (symbol, tf) -> último timestamp en disco
+
+    def ruta(self, symbol, tf):
+        return os.path.join(self.base_dir, f"{symbol}_{tf}.csv")
+
+    def ruta_plan(self, symbol):
+        """Plan de reparación que deja tools/data_auditor.py para este símbolo."""
+        return os.path.join(self.base_dir, f"{symbol}_repair_plan.json")
+
+    # =========================================================================
+    # ÍNDICE DE ÚLTIMO TIMESTAMP
+    # =========================================================================
+
+    def ultimo_ts(self, symbol, tf):
+        clave = (symbol, tf)
+        if clave not in self.indice:
+            self.indice[clave] = self._leer_ultimo_ts(self.ruta(symbol, tf))
+        return self.indice[clave]
+
+    @staticmethod
+    def _ultima_linea(path):
+        """Última fila de datos del CSV leyendo solo la cola del archivo."""
+        if not os.path.exists(path): return None
+        with open(path, 'rb') as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - 4096))
+            lineas = f.read().decode(errors='ignore').strip().splitlines()
+        return lineas[-1] if lineas else None
+
+    @classmethod
+    def _leer_ultimo_ts(cls, path):
+        """None si no existe, está vacío o solo tiene cabecera."""
+        try:
+            campo = (cls._ultima_linea(path) or '').split(',')[0].strip()
+            return int(campo) if campo.isdigit() else None
+        except Exception: return None
+
+    # =========================================================================
+    # PLANIFICACIÓN
+    # =========================================================================
+
+    def planificar(self, pares, ahora_ms=None):
+        """pares: [(symbol, tf)]. Retorna {(symbol, tf): [inicio_bloque_ms, ...]} ordenado."""
+        ahora_ms = ahora_ms or int(time.time() * 1000)
+        plan = {}
+        for symbol, tf in pares:
+            paso = INTERVALOS_MS[tf]
+            ultimo = self.ultimo_ts(symbol, tf)
+            # Se re-pide la última vela: puede haberse guardado aún abierta
+            inicio = ultimo if ultimo is not None else ahora_ms - self.VELAS_INICIALES * paso
+            inicio -= inicio % paso
+            bloques = list(range(inicio, ahora_ms + 1, self.BLOQUE * paso))
+            if bloques: plan[(symbol, tf)] = bloques
+        return plan
+
+    # =========================================================================
+    # EJECUCIÓN
+    # =========================================================================
+
+    def sincronizar(self, symbols, timeframes=('1m',)):
+        """
+        Sincroniza todos los (símbolo, tf). Retorna {(symbol, tf): velas_nuevas_escritas}.
+        """
+        plan = self.planificar([(s, tf) for s in symbols for tf in timeframes])
+        if not plan: return {}
+
+        total = sum(len(b) for b in plan.values())
+        if total > len(plan):
+            print(f"📥 [BULK] {len(plan)} series, {total} bloques pendientes...")
+
+        escritas = {clave: 0 for clave in plan}
+        pendientes = {clave: {} for clave in plan}      # bloques llegados fuera de orden
+        siguiente = {clave: 0 for clave in plan}        # índice del próximo bloque a escribir
+
+        with ThreadPoolExecutor(max_workers=self.max_hilos) as pool:
+            futuros = {}
+            for clave, bloques in plan.items():
+                for i, inicio in enumerate(bloques):
+                    futuros[pool.submit(self._descargar, clave[0], clave[1], inicio)] = (clave, i)
+
+            # Las escrituras ocurren solo en este hilo, a medida que llegan los bloques
+            for fut in as_completed(futuros):
+                clave, i = futuros[fut]
+                try: velas = fut.result()
+                except Exception: velas = None
+                pendientes[clave][i] = velas
+
+                # Escribir el prefijo contiguo disponible de la serie
+                while siguiente[clave] in pendientes[clave]:
+                    lote = pendientes[clave].pop(siguiente[clave])
+                    if lote is None:
+                        # Hueco por error: se corta aquí, la próxima pasada reanuda desde el índice
+                        siguiente[clave] = len(plan[clave])
+                        pendientes[clave].clear()
+                        break
+                    escritas[clave] += self._anexar(clave[0], clave[1], lote)
+                    siguiente[clave] += 1
+                if siguiente[clave] >= len(plan[clave]): pendientes[clave].clear()
+        return escritas
+
+    def _descargar(self, symbol, tf, inicio):
+        """
+        None = bloque fallido (get_klines devolvió None: error de red / API).
+        Un bloque corto es válido: símbolo listado dentro de la ventana o mantenimiento
+        del exchange. Se escribe lo que haya y la serie sigue con el bloque siguiente.
+        """
+        klines = self.api.get_klines(symbol, tf, limit=self.BLOQUE, startTime=int(inicio))
+        if klines is None: return None
+        return [(int(k[0]), float(k[1]), float(k[2]), float(k[3]), float(k[4]), float(k[5])) for k in klines]
+
+    def _anexar(self, symbol, tf, velas):
+        """Append incremental al CSV. Reemplaza la última vela si llega actualizada."""
+        path = self.ruta(symbol, tf)
+        ultimo = self.ultimo_ts(symbol, tf)
+        if ultimo is not None:
+            velas = [v for v in velas if v[0] >= ultimo]
+            if velas and velas[0][0] == ultimo:
+                # Misma vela sin cambios: nada que escribir (ni que re-sembrar)
+                if len(velas) == 1 and self._linea(velas[0]) == self._ultima_linea(path): return 0
+                self._truncar_ultima_linea(path)
+        if not velas: return 0
+
+        nuevo = not os.path.exists(path) or os.path.getsize(path) == 0
+        with open(path, 'a', newline='') as f:
+            if nuevo: f.write(",".join(COLUMNAS) + "\n")
+            f.writelines(self._linea(v) + "\n" for v in velas)
+        self.indice[(symbol, tf)] = velas[-1][0]
+        return len(velas)
+
+    @staticmethod
+    def _linea(vela):
+        return ",".join(str(x) for x in vela)
+
+    @staticmethod
+    def _truncar_ultima_linea(path):
+        """Quita la última fila del CSV (vela que pudo guardarse aún abierta)."""
+        with open(path, 'rb+') as f:
+            f.seek(0, os.SEEK_END)
+            tam = f.tell()
+            inicio = max(0, tam - 4096)
+            f.seek(inicio)
+            cola = f.read().rstrip(b'\r\n')
+            corte = cola.rfind(b'\n')
+            if corte >= 0: f.truncate(inicio + corte + 1)
+
+    # =========================================================================
+    # REPARACIÓN (PLAN DEL AUDITOR)
+    # =========================================================================
+
+    def aplicar_plan(self, symbol):
+        """
+        Aplica el plan de tools/data_auditor.py si existe: re-descarga solo los rangos
+        marcados y reescribe el maestro en streaming (orden + sin duplicados).
+        Retorna la lista de derivados a regenerar ([] si no había plan).
+        """
+        path_plan = self.ruta_plan(symbol)
+        if not os.path.exists(path_plan): return []
+        try:
+            with open(path_plan) as f: plan = json.load(f)
+        except Exception: return []
+
+        tf = plan.get('maestro', '1m')
+        paso = INTERVALOS_MS[tf]
+        rangos = plan.get('refetch', [])
+        bloques = [(inicio, r['fin']) for r in rangos
+                   for inicio in range(r['inicio'], r['fin'] + 1, self.BLOQUE * paso)]
+        print(f"🛠️ [BULK] Plan de reparación {symbol}: {len(rangos)} rangos, {len(bloques)} bloques...")
+
+        velas = {}
+        with ThreadPoolExecutor(max_workers=self.max_hilos) as pool:
+            futuros = {pool.submit(self._descargar, symbol, tf, inicio): fin for inicio, fin in bloques}
+            fallidos = 0
+            for fut in as_completed(futuros):
+                try: lote = fut.result()
+                except Exception: lote = None
+                if lote is None:
+                    fallidos += 1
+                    continue
+                velas.update((v[0], v) for v in lote if v[0] <= futuros[fut])
+
+        if rangos or plan.get('reescribir'):
+            self._reescribir(symbol, tf, velas)
+        if fallidos:
+            # El plan queda pendiente: la próxima pasada re-descarga lo que faltó
+            print(f"⚠️ [BULK] {symbol}: {fallidos} bloques de reparación fallidos, plan pendiente.")
+            return plan.get('regenerar', [])
+        # El plan se conserva como evidencia; la próxima auditoría genera uno nuevo
+        os.replace(path_plan, path_plan + ".aplicado")
+        return plan.get('regenerar', [])
+
+    def _reescribir(self, symbol, tf, nuevas, chunksize=250_000):
+        """Mezcla en streaming el CSV con las velas re-descargadas (prevalecen las nuevas)."""
+        path = self.ruta(symbol, tf)
+        tmp = path + ".tmp"
+        extra = pd.DataFrame(sorted(nuevas.values()), columns=COLUMNAS)
+        ultimo = -1
+        with open(tmp, 'w', newline='') as out:
+            out.write(",".join(COLUMNAS) + "\n")
+            if os.path.exists(path):
+                for chunk in pd.read_csv(path, usecols=COLUMNAS, chunksize=chunksize):
+                    tope = int(chunk['timestamp'].max())
+                    propias, extra = extra[extra['timestamp'] <= tope], extra[extra['timestamp'] > tope]
+                    ultimo = self._volcar(out, chunk, propias, ultimo)
+            self._volcar(out, extra.iloc[0:0], extra, ultimo)
+        os.replace(tmp, path)
+        self.indice.pop((symbol, tf), None)
+
+    @staticmethod
+    def _volcar(out, locales, nuevas, ultimo):
+        # Estable: a igual timestamp gana la re-descargada (va primero, keep='first')
+        df = pd.concat([nuevas, locales]).sort_values('timestamp', kind='mergesort')
+        df = df.drop_duplicates(subset='timestamp', keep='first')
+        df = df[df['timestamp'] > ultimo]
+        if df.empty: return ultimo
+        df.to_csv(out, header=False, index=False)
+        return int(df['timestamp'].iloc[-1])
@@ -0,0 +1,50 @@
+# =============================================================================
+# UBICACIÓN: data/indicator_state.py
+# DESCRIPCIÓN: ESTADO DE INDICADORES V1.0 (ARRAYS NUMPY POR TIMEFRAME)
+# =============================================================================
+
+import numpy as np
+from config.config import Config
+
+class IndicatorState:
+    """
+    ESTADO DE INDICADORES V1.0:
+    - Foto por ciclo de los DataFrames del PrecisionLab convertida a matrices float64
+      (una sola conversión por timeframe, solo la cola de VENTANA_ESTADO velas).
+    - Acceso por índice de columna precompilado: ultimo('15m', 'rsi') y
+      serie('1h', 'close') no pasan por pandas.
+    """
+    def __init__(self, ventana=None):
+        self.ventana = ventana or Config.FeatureConfig.VENTANA_ESTADO
+        self.columnas = {}   # tf -> {columna: índice}
+        self.matrices = {}   # tf -> np.ndarray (filas x columnas)
+
+    @classmethod
+    def desde_data_map(cls, data_map, ventana=None):
+        estado = cls(ventana)
+        for tf, df in data_map.items(): estado.actualizar(tf, df)
+        return estado
+
+    def actualizar(self, tf, df):
+        if df is None or df.empty: return
+        cols = [c for c in df.columns if c != 'datetime' and np.issubdtype(df[c].dtype, np.number)]
+        self.columnas[tf] = {c: i for i, c in enumerate(cols)}
+        self.matrices[tf] = df[cols].tail(self.ventana).to_numpy(dtype=np.float64)
+
+    def __contains__(self, tf):
+        return tf in self.matrices
+
+    def nombres(self, tf):
+        return list(self.columnas.get(tf, {}))
+
+    def serie(self, tf, col):
+        """Vista de la columna (más antigua -> más reciente). None si no existe."""
+        idx = self.columnas.get(tf, {}).get(col)
+        if idx is None: return None
+        return self.matrices[tf][:, idx]
+
+    def ultimo(self, tf, col, defecto=np.nan):
+        idx = self.columnas.get(tf, {}).get(col)
+        mat = self.matrices.get(tf)
+        if idx is None or mat is None or not len(mat): return defecto
+        return mat[-1, idx]
@@ -1,74 +1,243 @@
 # =============================================================================
 # UBICACIÓN: execution/comptroller.py
-# DESCRIPCIÓN: CONTRALOR V19.4 (HEDGE FIX FOR ORPHANS + BLACKBOX)
+# DESCRIPCIÓN: CONTRALOR V19.6 (HEDGE FIX FOR ORPHANS + BLACKBOX + ARRANQUE EN CALIENTE + ESTADO COW)
 # =============================================================================
 
+import time
+import uuid
+import threading
 from config.config import Config
+from execution.trigger_engine import TriggerEngine
+from logs.event_journal import obtener_journal
+from core.state_store import StateStore
 try:
     from logs.system_logger import SystemLogger
 except ImportError:
     SystemLogger = None
 
 class Comptroller:
-    def __init__(self, config, order_manager, financials, logger, evaluator=None):
+    def __init__(self, config, order_manager, financials, logger, evaluator=None, risk_book=None):
         self.cfg = config
         self.om = order_manager
+        self.symbol = getattr(order_manager, 'symbol', config.SYMBOL)
+        self.risk = risk_book
         self.fin = financials
         self.log = logger
         self.eval = evaluator 
-        self.posiciones_activas = {} 
+        # Copy-on-write: lectores (dashboard, custodia, cartera) iteran sin lock
+        self.posiciones_activas = StateStore()
+        self.triggers = TriggerEngine()
+        self.ultimo_precio = None
+        self._extremos = {}     # key -> [max, min] de precio desde la entrada (o la restauración)
+        # Leer-modificar-publicar de registros: latido (bucle) y operaciones (hilo dedicado)
+        self._lock = threading.RLock()
 
     def aceptar_custodia(self, paquete_orden):
         symbol = paquete_orden['symbol']
         key = f"{symbol}_{paquete_orden['side']}"
         
-        # Inicializar métricas
-        paquete_orden['max_price'] = paquete_orden['entry_price'] 
-        paquete_orden['min_price'] = paquete_orden['entry_price']
-        paquete_orden['be_triggered'] = False
-        paquete_orden['tp1_hit'] = False 
-        
-        self.posiciones_activas[key] = paquete_orden
+        # Inicializar métricas (registro propio: lo publicado no se toca en sitio)
+        paquete_orden = {**paquete_orden,
+                         'max_price': paquete_orden['entry_price'],
+                         'min_price': paquete_orden['entry_price'],
+                         'be_triggered': False,
+                         'tp1_hit': False}
+
+        with self._lock:
+            self.posiciones_activas[key] = paquete_orden
+            self._extremos[key] = [paquete_orden['max_price'], paquete_orden['min_price']]
+            self._armar_triggers(key, paquete_orden)
+        if self.risk: self.risk.ocupar(key)
+        obtener_journal().registrar('CUSTODY_ACCEPTED', paquete_orden.get('id'), symbol, paquete_orden['side'],
+                                    price=paquete_orden['entry_price'], qty=paquete_orden.get('qty'),
+                                    strategy=paquete_orden.get('strategy'))
         if self.log: self.log.registrar_actividad("COMP", f"🛡️ Custodia iniciada: {key}")
 
     def auditar_posiciones(self, current_price):
+        """
+        Latido por tick: solo trabaja si el precio cruza un nivel armado (TriggerEngine).
+        PnL / máximos / mínimos se calculan bajo demanda con refrescar_metricas().
+        """
+        self.ultimo_precio = current_price
         if not self.posiciones_activas: return
 
-        for key, pos in list(self.posiciones_activas.items()):
-            pos['current_price'] = current_price
-            side = pos['side']
-            entry = float(pos['entry_price'])
-            
-            # Actualizar High/Low locales
-            if current_price > pos['max_price']: pos['max_price'] = current_price
-            if current_price < pos['min_price']: pos['min_price'] = current_price
+        with self._lock:
+            for ext in self._extremos.values():
+                if current_price > ext[0]: ext[0] = current_price
+                elif current_price < ext[1]: ext[1] = current_price
 
-            # PnL %
-            if side == 'LONG': pnl_pct = (current_price - entry) / entry
-            else: pnl_pct = (entry - current_price) / entry
-            
-            pos['pnl_pct'] = pnl_pct
+        # Trailing agrupado durante el intervalo mínimo: se envía ahora el último precio
+        self.om.slm.procesar_pendientes(current_price)
+
+        cruces = self.triggers.evaluar(current_price)
+        if not cruces: return
 
-            # Verificar SL actualizado
-            tiene_sl, sl_real, _ = self.fin.verificar_si_tiene_sl_local(side)
-            if tiene_sl: pos['sl_price'] = sl_real
+        with self._lock:
+            self._gestionar(cruces, current_price)
 
-            # ROUTING DE ESTRATEGIA
+    def _gestionar(self, cruces, current_price):
+        self.refrescar_metricas()
+        for key, _tipo in cruces:
+            pos = self.posiciones_activas.get(key)
+            if pos is None:
+                self.triggers.desarmar(key)
+                continue
+            pos = dict(pos)   # La gestión trabaja sobre una copia y la publica al final
+
+            # ROUTING DE ESTRATEGIA (las reglas re-validan su condición)
             strategy = pos.get('strategy', 'MANUAL')
             
             if strategy == 'GAMMA' or strategy == 'RECOVERY':
-                self._gestion_gamma_v4_6(pos, current_price, pnl_pct)
+                self._gestion_gamma_v4_6(pos, current_price, pos['pnl_pct'])
             elif strategy == 'SWING':
-                self._gestion_swing(pos, current_price, pnl_pct)
+                self._gestion_swing(pos, current_price, pos['pnl_pct'])
             elif strategy == 'SHADOW':
-                self._gestion_shadow(pos, current_price, pnl_pct)
+                self._gestion_shadow(pos, current_price, pos['pnl_pct'])
+
+            self.posiciones_activas.reemplazar({key: pos})
+            self._armar_triggers(key, pos)
+
+    def refrescar_metricas(self):
+        """
+        Actualiza current_price, max/min, pnl_pct y sl_price de cada posición (lectores y
+        disparos). Publica registros nuevos en una sola versión del StateStore.
+        """
+        precio = self.ultimo_precio
+        if precio is None: return
+        with self._lock:
+            self._refrescar(precio)
+
+    def _refrescar(self, precio):
+        nuevos = {}
+        for key, pos in self.posiciones_activas.items():
+            pos = nuevos[key] = dict(pos)
+            side = pos['side']
+            entry = float(pos['entry_price'])
+            pos['current_price'] = precio
+
+            # Actualizar High/Low locales (extremos propios de esta posición)
+            hi, lo = self._extremos.get(key, (precio, precio))
+            if hi > pos.get('max_price', entry): pos['max_price'] = hi
+            if lo < pos.get('min_price', entry): pos['min_price'] = lo
+
+            # PnL %
+            if side == 'LONG': pos['pnl_pct'] = (precio - entry) / entry
+            else: pos['pnl_pct'] = (entry - precio) / entry
+
+            # Verificar SL actualizado (índice del SLManager)
+            sl_activo = self.om.slm.activo(pos['symbol'], side)
+            if sl_activo: pos['sl_price'] = sl_activo['price']
+
+        if nuevos: self.posiciones_activas.reemplazar(nuevos)
+
+    def _armar_triggers(self, key, pos):
+        """Precalcula los próximos precios que cambiarían el estado de la posición."""
+        strategy = pos.get('strategy', 'MANUAL')
+        entry = float(pos['entry_price'])
+        signo = 1 if pos['side'] == 'LONG' else -1
+        direccion = 'ARRIBA' if signo == 1 else 'ABAJO'
+        niveles = []
+
+        if strategy == 'GAMMA' or strategy == 'RECOVERY':
+            cfg = self.cfg.GammaConfig
+            if not pos.get('be_triggered'):
+                niveles.append((direccion, entry * (1 + signo * cfg.BE_ACTIVATION), 'BE'))
+            else:
+                # Siguiente paso del trailing: el SL propuesto supera al vigente (o al ya pedido)
+                # por al menos el paso mínimo del SLManager
+                paso = self.cfg.ExecutionConfig.SL_MIN_STEP_PCT
+                sl_ref = pos.get('sl_objetivo') or pos.get('sl_price')
+                if sl_ref:
+                    if signo == 1:
+                        sl_ref = max(sl_ref, pos.get('sl_price') or sl_ref)
+                        nivel = sl_ref * (1 + paso) / (1 - cfg.TRAILING_DIST)
+                    else:
+                        sl_ref = min(sl_ref, pos.get('sl_price') or sl_ref)
+                        nivel = sl_ref * (1 - paso) / (1 + cfg.TRAILING_DIST)
+                    niveles.append((direccion, nivel, 'TRAILING'))
+
+        elif strategy == 'SWING':
+            if not pos.get('tp1_hit'):
+                niveles.append((direccion, entry * (1 + signo * self.cfg.SwingConfig.TP1_DIST), 'TP1'))
+
+        self.triggers.armar(key, niveles)
+
+    def restaurar_custodia(self, posiciones):
+        """
+        Arranque en caliente desde la foto de CustodyStore:
+        Una lectura de posiciones + una de órdenes abiertas; se conserva el estado de
+        gestión (BE, TP1, max/min, estrategia) y solo se repara lo que difiere.
+        Lo que exista en el exchange y no en la foto queda para adoptar_posiciones_huerfanas().
+        """
+        if not posiciones: return 0
+        t0 = time.perf_counter()
+        try:
+            pos_info = self.om.api.get_position_info(self.symbol)
+            orders = self.om.api.get_open_orders(self.symbol)
+            if pos_info is None or orders is None: raise Exception("Lectura de exchange fallida")
+        except Exception as e:
+            self.log.registrar_error("COMP", f"⚠️ Arranque en caliente abortado ({e}). Se usará adopción.")
+            return 0
+        if isinstance(pos_info, dict): pos_info = [pos_info]
+
+        reales = {}
+        for p in pos_info:
+            amt = float(p['positionAmt'])
+            if amt != 0: reales['LONG' if amt > 0 else 'SHORT'] = abs(amt)
+        abiertas = {str(o['orderId']): o for o in orders}
+
+        restauradas = 0
+        for key, pos in posiciones.items():
+            side = pos['side']
+            if pos.get('symbol') != self.symbol or key in self.posiciones_activas: continue
+
+            if side not in reales:
+                self.log.registrar_actividad("COMP", f"🏳️ {key} cerrada mientras el bot estaba detenido.")
+                obtener_journal().registrar('POSITION_CLOSED', pos.get('id'), self.symbol, side, reason="CLOSED_OFFLINE")
+                continue
+
+            # Qty real (TPs ejecutados durante la parada) y órdenes que siguen vivas
+            pos = dict(pos)
+            pos['qty'] = reales[side]
+            pos['tp_order_ids'] = [t for t in pos.get('tp_order_ids', []) if str(t) in abiertas]
+
+            exit_side = 'SELL' if side == 'LONG' else 'BUY'
+            stops = [o for o in orders if o['side'] == exit_side and o.get('positionSide', side) == side
+                     and o['type'] in ('STOP_MARKET', 'STOP')]
+            sl = abiertas.get(str(pos.get('sl_order_id')))
+            if sl not in stops: sl = stops[0] if stops else None
+
+            if sl:
+                pos['sl_order_id'], pos['sl_price'] = sl['orderId'], float(sl.get('stopPrice', 0))
+                self.om.slm.registrar(self.symbol, side, sl['orderId'], pos['sl_price'])
+            else:
+                # El stop desapareció: se repone en el último nivel conocido (trailing incluido)
+                if not pos.get('sl_price'):
+                    sl_pct = self.cfg.GammaConfig.SL_NORMAL
+                    entry = float(pos['entry_price'])
+                    pos['sl_price'] = entry * (1 - sl_pct) if side == 'LONG' else entry * (1 + sl_pct)
+                self.log.registrar_error("COMP", f"⚠️ {key} sin SL en exchange. Reponiendo @ {pos['sl_price']}")
+                pos['sl_order_id'] = self.om._colocar_sl_seguro(self.symbol, side, pos['sl_price']) or "FAILED"
+
+            self.posiciones_activas[key] = pos
+            entry = float(pos['entry_price'])
+            self._extremos[key] = [pos.get('max_price', entry), pos.get('min_price', entry)]
+            if self.risk: self.risk.ocupar(key)
+            self._armar_triggers(key, pos)
+            obtener_journal().registrar('CUSTODY_RESTORED', pos.get('id'), self.symbol, side,
+                                        price=pos['entry_price'], qty=pos['qty'], strategy=pos.get('strategy'))
+            restauradas += 1
+
+        ms = (time.perf_counter() - t0) * 1000
+        self.log.registrar_actividad("COMP", f"♻️ Arranque en caliente: {restauradas} custodias restauradas ({ms:.0f} ms)")
+        return restauradas
 
     def adoptar_posiciones_huerfanas(self):
         """
         Recuperación tras reinicio (Versión V19.4 - Hedge Fixed):
         """
         try:
-            pos_info = self.om.api.get_position_info(self.cfg.SYMBOL)
+            pos_info = self.om.api.get_position_info(self.symbol)
             if not pos_info: return
             if isinstance(pos_info, dict): pos_info = [pos_info]
 
@@ -77,90 +246,73 @@ class Comptroller:
                 if amt == 0: continue
                 
                 side = 'LONG' if amt > 0 else 'SHORT'
-                key = f"{self.cfg.SYMBOL}_{side}"
+                key = f"{self.symbol}_{side}"
                 entry_price = float(p['entryPrice'])
 
                 if key in self.posiciones_activas: continue
 
                 self.log.registrar_actividad("COMP", f"🚑 Adoptando Huérfana: {side} @ {entry_price}")
+                # Id propio antes de blindar: los SL/TP repuestos quedan enlazados en el journal
+                pos_id = f"REC-{uuid.uuid4().hex[:8]}"
+                obtener_journal().registrar('POSITION_ADOPTED', pos_id, self.symbol, side,
+                                            price=entry_price, qty=abs(amt), strategy='RECOVERY')
                 
                 has_sl = False
                 existing_tps = 0
                 
                 try:
-                    orders = self.om.api.client.get_open_orders(symbol=self.cfg.SYMBOL)
+                    orders = self.om.api.get_open_orders(self.symbol)
+                    if orders is None: raise Exception("Lectura de órdenes abiertas fallida")
                     if orders:
                         exit_side = 'SELL' if side == 'LONG' else 'BUY'
                         for o in orders:
                             if o['side'] == exit_side:
-                                if o['type'] in ['STOP_MARKET', 'STOP']: has_sl = True
+                                if o['type'] in ['STOP_MARKET', 'STOP']:
+                                    has_sl = True
+                                    self.om.slm.registrar(self.symbol, side, o['orderId'], float(o.get('stopPrice', 0)))
                                 if o['type'] == 'LIMIT': existing_tps += 1
                 except Exception as e:
                     self.log.registrar_error("COMP", f"⚠️ Fallo leyendo órdenes abiertas ({str(e)}). Asumiendo SIN protección.")
                     has_sl = False
                     existing_tps = 0
 
-                # A. SL de Emergencia
-                sl_id = "UNKNOWN"
+                # A. SL de Emergencia (solo si falta)
+                sl_price = None
                 if not has_sl:
                     self.log.registrar_error("COMP", f"⚠️ Posición {side} SIN SL detectado. Creando protección...")
                     sl_pct = self.cfg.GammaConfig.SL_NORMAL
                     sl_price = entry_price * (1 - sl_pct) if side == 'LONG' else entry_price * (1 + sl_pct)
-                    sl_id = self.om._colocar_sl_seguro(self.cfg.SYMBOL, side, sl_price)
-                    if not sl_id: sl_id = "FAILED"
                 else:
                     self.log.registrar_actividad("COMP", f"✅ SL detectado en exchange.")
 
-                # B. Restauración de TPs (CON PARCHE HEDGE)
-                tp_ids = []
+                # B. Restauración de TPs (solo si no hay LIMITs de salida)
+                tps = []
                 if existing_tps == 0:
                     self.log.registrar_actividad("COMP", f"🔧 Restaurando TPs LIMIT en el libro...")
-                    
                     cfg = self.cfg.GammaConfig
-                    qty_total = abs(amt)
-                    
-                    tp1_dist = cfg.TP_1_DIST
-                    tp1_qty = qty_total * cfg.TP_1_QTY
-                    tp1_price = entry_price * (1 + tp1_dist) if side == 'LONG' else entry_price * (1 - tp1_dist)
-                    
-                    tp2_dist = cfg.TP_2_DIST
-                    tp2_qty = qty_total * cfg.TP_2_QTY
-                    tp2_price = entry_price * (1 + tp2_dist) if side == 'LONG' else entry_price * (1 - tp2_dist)
-                    
-                    # --- TP1 ---
-                    tp1_payload = self.om.director.construir_take_profit_limit(
-                        self.cfg.SYMBOL, side, self.om._blindar_float(tp1_qty, self.om.qty_precision), tp1_price
-                    )
-                    # PARCHE HEDGE MODE
-                    if 'reduceOnly' in tp1_payload: del tp1_payload['reduceOnly']
-                    tp1_payload['positionSide'] = side
-
-                    ok1, res1 = self.om.api.execute_generic_order(tp1_payload)
-                    if ok1: 
-                        tp_ids.append(res1['orderId'])
-                        self.log.registrar_actividad("COMP", f"💎 TP1 Recuperado: {tp1_price}")
-                    else:
-                        self.log.registrar_error("COMP", f"❌ Fallo TP1 Recuperación: {res1}")
-
-                    # --- TP2 ---
-                    tp2_payload = self.om.director.construir_take_profit_limit(
-                        self.cfg.SYMBOL, side, self.om._blindar_float(tp2_qty, self.om.qty_precision), tp2_price
-                    )
-                    # PARCHE HEDGE MODE
-                    if 'reduceOnly' in tp2_payload: del tp2_payload['reduceOnly']
-                    tp2_payload['positionSide'] = side
-
-                    ok2, res2 = self.om.api.execute_generic_order(tp2_payload)
-                    if ok2: 
-                        tp_ids.append(res2['orderId'])
-                        self.log.registrar_actividad("COMP", f"💎 TP2 Recuperado: {tp2_price}")
-                    else:
-                        self.log.registrar_error("COMP", f"❌ Fallo TP2 Recuperación: {res2}")
+                    signo = 1 if side == 'LONG' else -1
+                    tp_map = [
+                        {'id': 'TP1', 'price_target': entry_price * (1 + signo * cfg.TP_1_DIST), 'qty_pct': cfg.TP_1_QTY},
+                        {'id': 'TP2', 'price_target': entry_price * (1 + signo * cfg.TP_2_DIST), 'qty_pct': cfg.TP_2_QTY}
+                    ]
+                    tps = self.om._preparar_tps(tp_map, abs(amt))
                 else:
                     self.log.registrar_actividad("COMP", f"✅ {existing_tps} TPs (Limit) detectados en libro.")
 
+                # C. Envío de la protección faltante (lote único o secuencial)
+                sl_id = "UNKNOWN"
+                tp_ids = []
+                if self.cfg.ExecutionConfig.BRACKET_BATCH:
+                    nuevo_sl, tp_ids = self.om._colocar_bracket(self.symbol, side, sl_price, tps)
+                else:
+                    nuevo_sl = self.om._colocar_sl_seguro(self.symbol, side, sl_price) if sl_price is not None else None
+                    if tps: tp_ids = self.om._colocar_tps_secuencial(self.symbol, side, tps)
+                if sl_price is not None: sl_id = nuevo_sl or "FAILED"
+                if tps and len(tp_ids) < len(tps):
+                    self.log.registrar_error("COMP", f"❌ Recuperación parcial de TPs: {len(tp_ids)}/{len(tps)}")
+
                 paquete = {
-                    'symbol': self.cfg.SYMBOL, 'side': side, 'qty': abs(amt),
+                    'id': pos_id, 'symbol': self.symbol, 'side': side, 'qty': abs(amt),
                     'entry_price': entry_price, 'strategy': 'RECOVERY',
                     'sl_order_id': sl_id, 'tp_order_ids': tp_ids,
                     'mode': 'HEDGE',
@@ -168,6 +320,9 @@ class Comptroller:
                     'be_triggered': False, 'tp1_hit': False
                 }
                 self.posiciones_activas[key] = paquete
+                self._extremos[key] = [entry_price, entry_price]
+                if self.risk: self.risk.ocupar(key)
+                self._armar_triggers(key, paquete)
                 self.log.registrar_actividad("COMP", f"🛡️ Custodia restaurada y blindada para {key}")
 
         except Exception as e:
@@ -184,13 +339,19 @@ class Comptroller:
                 if self.log: self.log.registrar_actividad("COMP", "🔓 Break Even Activado (+0.5% Asegurado)")
 
         if pos['be_triggered']:
+            # Referencia = el SL más protector entre el vigente y el ya pedido (un BE
+            # agrupado por el SLManager aún no figura en sl_price), igual que _armar_triggers
             distancia = cfg.TRAILING_DIST
+            sl_vigente = pos.get('sl_price')
+            sl_ref = pos.get('sl_objetivo') or sl_vigente
             if pos['side'] == 'LONG':
+                if sl_vigente: sl_ref = max(sl_ref, sl_vigente)
                 propuesto = curr * (1 - distancia)
-                if propuesto > pos['sl_price']: self._mover_sl(pos, propuesto)
+                if sl_ref is None or propuesto > sl_ref: self._mover_sl(pos, propuesto)
             else:
+                if sl_vigente: sl_ref = min(sl_ref, sl_vigente)
                 propuesto = curr * (1 + distancia)
-                if propuesto < pos['sl_price']: self._mover_sl(pos, propuesto)
+                if sl_ref is None or propuesto < sl_ref: self._mover_sl(pos, propuesto)
 
     def _gestion_swing(self, pos, curr, pnl_pct):
         cfg = self.cfg.SwingConfig
@@ -199,6 +360,8 @@ class Comptroller:
             qty_close = qty_total * cfg.TP1_QTY_PCT
             if self.log: self.log.registrar_actividad("COMP", f"⭐ TP1 SWING alcanzado. Cerrando {qty_close:.3f}")
             if self.om.reducir_posicion(pos['symbol'], qty_close, "TP1_SWING"):
+                obtener_journal().registrar('TP_HIT', pos.get('id'), pos['symbol'], pos['side'], tp='TP1',
+                                            price=curr, qty=qty_close)
                 pos['qty'] -= qty_close
                 pos['tp1_hit'] = True
                 self._mover_sl(pos, pos['entry_price'])
@@ -207,29 +370,65 @@ class Comptroller:
         pass
 
     def _mover_sl(self, pos, nuevo_precio):
-        if abs(nuevo_precio - pos.get('sl_price', 0)) / (pos.get('sl_price', 1)) < 0.001: return
+        # Paso mínimo e intervalo por posición los aplica el SLManager
+        pos['sl_objetivo'] = nuevo_precio
         exito = self.om.actualizar_stop_loss(pos['symbol'], pos['side'], nuevo_precio)
         if exito: pos['sl_price'] = nuevo_precio
 
     def sincronizar_con_exchange(self):
         try:
+            # Solo custodias anteriores a la lectura: una aceptada mientras tanto aún no figura
+            previas = set(self.posiciones_activas)
             real_positions = self.fin.obtener_posiciones_activas_simple()
             real_keys = set(f"{p['symbol']}_{p['side']}" for p in real_positions)
-            
-            keys_to_delete = [k for k in self.posiciones_activas if k not in real_keys]
-            
-            for k in keys_to_delete:
-                if self.eval:
-                    pos_data = self.posiciones_activas[k]
-                    last_price = pos_data.get('current_price', pos_data['entry_price'])
-                    last_pnl = pos_data.get('pnl_pct', 0.0)
-                    self.eval.registrar_salida(
-                        trade_id=pos_data.get('id', 'UNKNOWN'),
-                        close_price=last_price,
-                        pnl_pct=last_pnl,
-                        reason="EXCHANGE_CLOSED"
-                    )
-
-                del self.posiciones_activas[k]
-                if self.log: self.log.registrar_actividad("COMP", f"🏳️ Posición Finalizada: {k}")
-        except Exception: pass
\ No newline at end of file
+
+            with self._lock:
+                self._cerrar_ausentes([k for k in previas if k not in real_keys])
+        except Exception: pass
+
+    def _cerrar_ausentes(self, keys_to_delete):
+        keys_to_delete = [k for k in keys_to_delete if k in self.posiciones_activas]
+        if keys_to_delete: self.refrescar_metricas()
+
+        for k in keys_to_delete:
+            self._desmontar(k, "EXCHANGE_CLOSED")
+
+    def cerrar_todo(self, reason="PANIC"):
+        """
+        Pánico (Telegram / consola), después de OrderManager.cerrar_posicion():
+        desmonta cada custodia igual que un cierre detectado en el exchange y descarta los
+        SL agrupados del SLManager (un pendiente no debe reponer un stop sin posición).
+        """
+        with self._lock:
+            keys = list(self.posiciones_activas)
+            if keys: self.refrescar_metricas()
+            for k in keys:
+                # OrderManager.cerrar_posicion ya registró el cierre en el journal
+                self._desmontar(k, reason, journal=False)
+            self.om.slm.olvidar(self.symbol)
+            self.triggers.desarmar_todo()
+            self._extremos.clear()
+        return len(keys)
+
+    def _desmontar(self, k, reason, journal=True):
+        if self.eval:
+            pos_data = self.posiciones_activas[k]
+            last_price = pos_data.get('current_price', pos_data['entry_price'])
+            last_pnl = pos_data.get('pnl_pct', 0.0)
+            self.eval.registrar_salida(
+                trade_id=pos_data.get('id', 'UNKNOWN'),
+                close_price=last_price,
+                pnl_pct=last_pnl,
+                reason=reason
+            )
+
+        pos_cerrada = self.posiciones_activas.pop(k)
+        if journal:
+            obtener_journal().registrar('POSITION_CLOSED', pos_cerrada.get('id'), pos_cerrada['symbol'],
+                                        pos_cerrada['side'], reason=reason,
+                                        price=pos_cerrada.get('current_price'), pnl_pct=pos_cerrada.get('pnl_pct'))
+        if self.risk: self.risk.liberar(k)
+        self.om.slm.olvidar(pos_cerrada['symbol'], pos_cerrada['side'])
+        self.triggers.desarmar(k)
+        self._extremos.pop(k, None)
+        if self.log: self.log.registrar_actividad("COMP", f"🏳️ Posición Finalizada: {k} ({reason})")
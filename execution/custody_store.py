@@ -0,0 +1,104 @@
+# =============================================================================
+# UBICACIÓN: execution/custody_store.py
+# DESCRIPCIÓN: FOTO DE CUSTODIA V1.0 (SNAPSHOT ATÓMICO + ARRANQUE EN CALIENTE)
+# =============================================================================
+
+import os
+import json
+import time
+import threading
+from config.config import Config
+
+class CustodyStore:
+    """
+    FOTO DE CUSTODIA V1.0:
+    - Persiste las posiciones en custodia del Comptroller (be_triggered, tp1_hit,
+      max/min, estrategia, SL/TP vigentes) y la memoria anti-duplicados del Shooter.
+    - Escritura atómica: tmp + fsync + os.replace (un corte nunca deja la foto a medias).
+    - Periódica y barata: como máximo una cada SNAPSHOT_INTERVAL y solo si cambió algo.
+      La periódica corre como tarea del hilo de operaciones (nunca en el latido); las
+      forzadas (entradas, pánico, apagado) pueden llegar de otros hilos: el lock
+      serializa las escrituras (comparten el .tmp).
+    - restaurar(): recarga la foto y delega en Comptroller.restaurar_custodia(), que
+      reconcilia solo la diferencia contra el exchange.
+    """
+    VERSION = 1
+    # Campos derivados del precio en vivo: se recalculan con refrescar_metricas()
+    VOLATILES = ('current_price', 'pnl_pct')
+
+    def __init__(self, symbol, config=Config, base_dir=None):
+        self.dir = base_dir or config.DIR_STATE
+        os.makedirs(self.dir, exist_ok=True)
+        self.path = os.path.join(self.dir, f"custody_{symbol}.json")
+        self.intervalo = config.CustodyConfig.SNAPSHOT_INTERVAL
+        self._ultimo = 0.0
+        self._firma = None
+        self._lock = threading.Lock()
+        self.stats = {'snapshots': 0, 'sin_cambios': 0, 'fallos': 0}
+
+    # =========================================================================
+    # ESCRITURA
+    # =========================================================================
+
+    def capturar(self, comp, shooter=None):
+        comp.refrescar_metricas()   # Vuelca max/min acumulados por el latido
+        posiciones = {}
+        for key, pos in comp.posiciones_activas.items():
+            posiciones[key] = {c: v for c, v in pos.items() if c not in self.VOLATILES}
+        return {
+            'posiciones': posiciones,
+            'shooter': sorted(shooter.memory) if shooter is not None else []
+        }
+
+    def guardar(self, comp, shooter=None, forzar=False):
+        """Retorna True si escribió una foto nueva."""
+        ahora = time.monotonic()
+        if not forzar and ahora - self._ultimo < self.intervalo: return False
+        with self._lock:
+            self._ultimo = ahora
+            return self._escribir(comp, shooter)
+
+    def _escribir(self, comp, shooter):
+        try:
+            foto = self.capturar(comp, shooter)
+            firma = json.dumps(foto, sort_keys=True, default=str)
+            if firma == self._firma:
+                self.stats['sin_cambios'] += 1
+                return False
+
+            foto.update(version=self.VERSION, ts=time.time())
+            tmp = self.path + ".tmp"
+            with open(tmp, 'w') as f:
+                json.dump(foto, f, default=str)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp, self.path)
+            self._firma = firma
+            self.stats['snapshots'] += 1
+            return True
+        except Exception:
+            self.stats['fallos'] += 1
+            return False
+
+    # =========================================================================
+    # LECTURA / ARRANQUE EN CALIENTE
+    # =========================================================================
+
+    def cargar(self):
+        """Foto válida o None (inexistente, corrupta o de otra versión)."""
+        if not os.path.exists(self.path): return None
+        try:
+            with open(self.path) as f: foto = json.load(f)
+        except Exception:
+            # Se aparta para diagnóstico; el arranque sigue por la vía de adopción
+            os.replace(self.path, self.path + ".corrupto")
+            return None
+        if foto.get('version') != self.VERSION: return None
+        return foto
+
+    def restaurar(self, comp, shooter=None):
+        """Retorna el número de custodias restauradas (0 = arranque en frío)."""
+        foto = self.cargar()
+        if not foto: return 0
+        if shooter is not None: shooter.memory.update(dict.fromkeys(foto.get('shooter', []), True))
+        return comp.restaurar_custodia(foto.get('posiciones', {}))
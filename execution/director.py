@@ -114,6 +114,19 @@ class BinanceOrderDirector:
             
         return payload
 
+    def construir_bracket(self, symbol, side, sl_price=None, tps=()):
+        """
+        Lote de protección para /fapi/v1/batchOrders: [SL, TP1, TP2, ...].
+        tps: [{'qty', 'price'}]. En Hedge Mode se omite reduceOnly (error -1106):
+        positionSide + lado contrario ya garantizan el cierre.
+        """
+        lote = []
+        if sl_price is not None:
+            lote.append(self.construir_stop_loss(symbol, side, sl_price))
+        for tp in tps:
+            lote.append(self.construir_take_profit_limit(symbol, side, tp['qty'], tp['price'], reduce_only=False))
+        return lote
+
     # =========================================================================
     # 3. UTILIDADES DE BLINDAJE
     # =========================================================================
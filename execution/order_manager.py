@@ -7,6 +7,10 @@ import time
 import math
 import uuid
 from execution.director import BinanceOrderDirector
+from execution.sl_manager import SLManager
+from core.latency import obtener_latencia
+from logs.log_writer import obtener_escritor
+from logs.event_journal import obtener_journal
 
 class OrderManager:
     """
@@ -15,13 +19,16 @@ class OrderManager:
       en _esperar_llenado. Esto causaba "Posición no detectada" por latencia
       de la API, generando órdenes duplicadas.
     """
-    def __init__(self, config, api_manager, logger, financials):
+    def __init__(self, config, api_manager, logger, financials, symbol=None):
         self.cfg = config
+        self.symbol = symbol or config.SYMBOL
         self.api = api_manager
         self.log = logger
         self.fin = financials
         self.director = BinanceOrderDirector(config)
         self.sec = config.ExecutionConfig
+        self.lat = obtener_latencia()
+        self.slm = SLManager(config, self, logger)
         
         self.qty_precision = 1     
         self.price_precision = 2   
@@ -30,9 +37,9 @@ class OrderManager:
 
     def _calibrar_precision_con_exchange(self):
         try:
-            info = self.api.client.exchange_info()
+            info = self.api.get_exchange_info()
             for symbol_data in info['symbols']:
-                if symbol_data['symbol'] == self.cfg.SYMBOL:
+                if symbol_data['symbol'] == self.symbol:
                     for f in symbol_data['filters']:
                         if f['filterType'] == 'LOT_SIZE':
                             step = float(f['stepSize'])
@@ -43,6 +50,9 @@ class OrderManager:
                             self.price_precision = int(round(-math.log(tick, 10), 0))
                     break
         except Exception: pass
+        # El Director formatea los payloads con la precisión real del símbolo
+        self.director.qty_prec = self.qty_precision
+        self.director.price_prec = self.price_precision
 
     def _blindar_float(self, value, precision):
         try:
@@ -74,8 +84,11 @@ class OrderManager:
             return False, None
             
         plan['qty'] = qty_blindada
-        payload_entrada = self.director.construir_entrada(plan)
-        ok_entry, resp_entry = self.api.execute_generic_order(payload_entrada)
+        with self.lat.span('DIRECTOR'):
+            payload_entrada = self.director.construir_entrada(plan)
+        t_entrada = time.perf_counter()
+        with self.lat.span('API_ENTRADA'):
+            ok_entry, resp_entry = self.api.execute_generic_order(payload_entrada)
 
         if not ok_entry:
             self.log.registrar_error("OM", f"❌ Fallo API Entrada: {resp_entry}")
@@ -83,68 +96,55 @@ class OrderManager:
             
         order_id = resp_entry['orderId']
         self.log.registrar_actividad("OM", f"⏳ Orden enviada ({order_id}). Esperando fill...")
+        journal = obtener_journal()
+        journal.registrar('ORDER_SUBMITTED', plan.get('id'), symbol, side, order_id=order_id,
+                          qty=qty_blindada, strategy=plan.get('strategy'))
         
         # --- PASO 2 & 3: VERIFICACIÓN (CORREGIDO) ---
-        fill_price, filled_qty = self._esperar_llenado_y_verificar_posicion(symbol, order_id, side)
+        with self.lat.span('FILL'):
+            fill_price, filled_qty = self._esperar_llenado_y_verificar_posicion(symbol, order_id, side)
         
         if fill_price == 0:
             self.log.registrar_error("OM", "⚠️ Posición no detectada tras orden. Cancelando...")
             self.api.cancel_order(symbol, order_id)
+            journal.registrar('ORDER_CANCELLED', plan.get('id'), order_id=order_id, reason='NO_FILL')
             return False, None
 
         plan['entry_price'] = fill_price
         plan['qty'] = filled_qty 
+        self.fin.cuenta.invalidar()
         self.log.registrar_actividad("OM", f"✅ POSICIÓN CONFIRMADA @ {fill_price}")
+        journal.registrar('ENTRY_FILLED', plan.get('id'), symbol, side, order_id=order_id,
+                          price=fill_price, qty=filled_qty, strategy=plan.get('strategy'))
 
-        # --- PASO 4: STOP LOSS ---
-        sl_id = self._colocar_sl_seguro(symbol, side, plan['sl_price'])
+        # --- PASO 4 & 5: PROTECCIÓN (STOP LOSS + TAKE PROFITS) ---
+        tps = self._preparar_tps(plan.get('tp_map', []), filled_qty)
+        if self.sec.BRACKET_BATCH:
+            # Un solo round trip: SL + TPs en lote, reintentando solo los rechazos
+            with self.lat.span('BRACKET'):
+                sl_id, tp_ids = self._colocar_bracket(symbol, side, plan['sl_price'], tps)
+        else:
+            with self.lat.span('SL'):
+                sl_id = self._colocar_sl_seguro(symbol, side, plan['sl_price'])
+            tp_ids = []
+        if sl_id:
+            self.lat.desde('ENTRADA_A_PROTECCION', t_entrada)
+            self.lat.desde('SENAL_A_PROTECCION', plan.get('t_senal'))
         if not sl_id:
             self.log.registrar_error("OM", "🚨 CRÍTICO: FALLO SL. CERRANDO POSICIÓN.")
             self.cerrar_posicion(symbol, "EMERGENCY_SL_FAIL")
             return False, None
 
-        # --- PASO 5: TAKE PROFITS (CORREGIDO HEDGE MODE) ---
-        tp_ids = []
-        if 'tp_map' in plan:
-            self.log.registrar_actividad("OM", f"⚙️ Configurando {len(plan['tp_map'])} TPs...")
-            
-            for tp in plan['tp_map']:
-                tp_qty = self._blindar_float(filled_qty * tp['qty_pct'], self.qty_precision)
-                
-                if tp_qty < self.min_qty:
-                    continue
-
-                tp_payload = self.director.construir_take_profit_limit(
-                    symbol, side, tp_qty, tp['price_target']
-                )
-                
-                # --- PARCHE HEDGE MODE ---
-                # Eliminar reduceOnly porque provoca error -1106 en Hedge Mode
-                if 'reduceOnly' in tp_payload: del tp_payload['reduceOnly']
-                # Asegurar que indicamos qué posición cerrar
-                tp_payload['positionSide'] = side 
-
-                # Reintentos
-                tp_placed = False
-                for i in range(2): 
-                    ok_tp, resp_tp = self.api.execute_generic_order(tp_payload)
-                    if ok_tp:
-                        tp_ids.append(resp_tp['orderId'])
-                        self.fin.registrar_orden_en_libro(resp_tp)
-                        self.log.registrar_actividad("OM", f"💎 TP {tp['id']} Colocado: {tp_qty} @ {tp['price_target']}")
-                        tp_placed = True
-                        break
-                    else:
-                        self.log.registrar_error("OM", f"⚠️ Rechazo TP {tp['id']}: {resp_tp}")
-                        time.sleep(0.5)
-                
-                if not tp_placed:
-                    self.log.registrar_error("OM", f"❌ ERROR FINAL: No se pudo colocar TP {tp['id']}")
+        if not self.sec.BRACKET_BATCH and tps:
+            with self.lat.span('TP'):
+                tp_ids = self._colocar_tps_secuencial(symbol, side, tps)
+        self.lat.desde('SENAL_A_BRACKET', plan.get('t_senal'))
+        self.lat.exportar()
 
         # --- PASO 6: REGISTRO ---
         estado_tps = "HARD_TPS_OK" if len(tp_ids) > 0 else "NO_TPS_PLACED"
         paquete_completo = {
-            'id': str(uuid.uuid4())[:8], 'symbol': symbol, 'side': side,
+            'id': plan.get('id') or str(uuid.uuid4())[:8], 'symbol': symbol, 'side': side,
             'entry_price': fill_price, 'qty': filled_qty,
             'sl_price': plan['sl_price'], 'sl_order_id': sl_id,
             'tp_order_ids': tp_ids, 'strategy': plan['strategy'], 'mode': plan.get('mode', 'UNKNOWN')
@@ -152,17 +152,14 @@ class OrderManager:
         self._registrar_en_csv(paquete_completo, estado_tps)
         return True, paquete_completo
 
-    def actualizar_stop_loss(self, symbol, side, new_sl_price):
-        new_id = self._colocar_sl_seguro(symbol, side, new_sl_price)
-        if new_id:
-            active, _, old_id = self.fin.verificar_si_tiene_sl_local(side)
-            if active and str(old_id) != str(new_id):
-                self.api.cancel_order(symbol, old_id)
-                self.fin.eliminar_orden_del_libro(old_id)
-            return new_id
-        return None
+    def actualizar_stop_loss(self, symbol, side, new_sl_price, forzar=False):
+        """
+        Delegado al SLManager: reemplaza el stop indexado de (symbol, side).
+        Los pasos pequeños o demasiado seguidos se agrupan (ver SL_MIN_STEP_PCT / SL_MIN_INTERVAL).
+        """
+        return self.slm.solicitar(symbol, side, new_sl_price, forzar=forzar)
 
-    def _colocar_sl_seguro(self, symbol, side, price):
+    def _colocar_sl_seguro(self, symbol, side, price, evento='SL_PLACED'):
         price = round(float(price), self.price_precision)
         payload = self.director.construir_stop_loss(symbol, side, price)
         # SL en Director probablemente también tenga reduceOnly, pero STOP_MARKET suele manejarlo diferente.
@@ -174,13 +171,110 @@ class OrderManager:
             ok, resp = self.api.execute_generic_order(payload)
             if ok:
                 self.fin.registrar_orden_en_libro(resp)
+                self.slm.registrar(symbol, side, resp['orderId'], price)
                 self.log.registrar_actividad("OM", f"🛡️ SL Protegido @ {price}")
+                obtener_journal().registrar(evento, None, symbol, side, order_id=resp['orderId'], price=price)
                 return resp['orderId']
             time.sleep(self.sec.RETRY_DELAY)
         return None
 
+    def _preparar_tps(self, tp_map, filled_qty):
+        """Traduce el tp_map del plan a [{'id', 'qty', 'price'}] descartando lotes bajo el mínimo."""
+        tps = []
+        for tp in tp_map:
+            tp_qty = self._blindar_float(filled_qty * tp['qty_pct'], self.qty_precision)
+            if tp_qty < self.min_qty: continue
+            tps.append({'id': tp['id'], 'qty': tp_qty, 'price': tp['price_target']})
+        return tps
+
+    def _colocar_bracket(self, symbol, side, sl_price=None, tps=()):
+        """
+        BRACKET EN LOTE: envía SL (opcional) + TPs en una sola petición batchOrders.
+        Analiza el resultado orden por orden y reintenta SOLO las rechazadas
+        (SL hasta MAX_RETRIES_SL, cada TP hasta 2 intentos como en el modo secuencial).
+        Retorna (sl_id | None, [tp_ids]).
+        """
+        if sl_price is not None: sl_price = round(float(sl_price), self.price_precision)
+        lote = self.director.construir_bracket(symbol, side, sl_price, tps)
+        etiquetas = (['SL'] if sl_price is not None else []) + [tp['id'] for tp in tps]
+        specs = ([None] if sl_price is not None else []) + list(tps)
+        if not lote: return None, []
+
+        if tps: self.log.registrar_actividad("OM", f"⚙️ Enviando bracket en lote ({len(lote)} órdenes)...")
+
+        colocadas = {}
+        pendientes = list(range(len(lote)))
+        intento = 0
+        while pendientes:
+            intento += 1
+            respuestas = self.api.execute_batch_orders([lote[i] for i in pendientes])
+            reintentar = []
+            for i, (ok, resp) in zip(pendientes, respuestas):
+                etq = etiquetas[i]
+                if ok:
+                    colocadas[i] = resp['orderId']
+                    self.fin.registrar_orden_en_libro(resp)
+                    if etq == 'SL':
+                        self.slm.registrar(symbol, side, resp['orderId'], sl_price)
+                        self.log.registrar_actividad("OM", f"🛡️ SL Protegido @ {sl_price}")
+                        obtener_journal().registrar('SL_PLACED', None, symbol, side, order_id=resp['orderId'], price=sl_price)
+                    else:
+                        self.log.registrar_actividad("OM", f"💎 TP {etq} Colocado: {specs[i]['qty']} @ {specs[i]['price']}")
+                        obtener_journal().registrar('TP_PLACED', None, symbol, side, order_id=resp['orderId'], tp=etq,
+                                                    price=specs[i]['price'], qty=specs[i]['qty'])
+                    continue
+
+                self.log.registrar_error("OM", f"⚠️ Rechazo {etq} (lote): {resp}")
+                max_intentos = self.sec.MAX_RETRIES_SL if etq == 'SL' else 2
+                if intento < max_intentos: reintentar.append(i)
+                elif etq != 'SL': self.log.registrar_error("OM", f"❌ ERROR FINAL: No se pudo colocar TP {etq}")
+
+            pendientes = reintentar
+            if pendientes: time.sleep(self.sec.RETRY_DELAY)
+
+        sl_id = colocadas.get(0) if sl_price is not None else None
+        offset = 1 if sl_price is not None else 0
+        tp_ids = [colocadas[i] for i in range(offset, len(lote)) if i in colocadas]
+        return sl_id, tp_ids
+
+    def _colocar_tps_secuencial(self, symbol, side, tps):
+        """Modo legacy (BRACKET_BATCH=False): un TP por petición con su propio reintento."""
+        tp_ids = []
+        self.log.registrar_actividad("OM", f"⚙️ Configurando {len(tps)} TPs...")
+        for tp in tps:
+            tp_payload = self.director.construir_take_profit_limit(
+                symbol, side, tp['qty'], tp['price']
+            )
+            
+            # --- PARCHE HEDGE MODE ---
+            # Eliminar reduceOnly porque provoca error -1106 en Hedge Mode
+            if 'reduceOnly' in tp_payload: del tp_payload['reduceOnly']
+            # Asegurar que indicamos qué posición cerrar
+            tp_payload['positionSide'] = side 
+
+            # Reintentos
+            tp_placed = False
+            for i in range(2): 
+                ok_tp, resp_tp = self.api.execute_generic_order(tp_payload)
+                if ok_tp:
+                    tp_ids.append(resp_tp['orderId'])
+                    self.fin.registrar_orden_en_libro(resp_tp)
+                    self.log.registrar_actividad("OM", f"💎 TP {tp['id']} Colocado: {tp['qty']} @ {tp['price']}")
+                    obtener_journal().registrar('TP_PLACED', None, symbol, side, order_id=resp_tp['orderId'], tp=tp['id'],
+                                                price=tp['price'], qty=tp['qty'])
+                    tp_placed = True
+                    break
+                else:
+                    self.log.registrar_error("OM", f"⚠️ Rechazo TP {tp['id']}: {resp_tp}")
+                    time.sleep(0.5)
+            
+            if not tp_placed:
+                self.log.registrar_error("OM", f"❌ ERROR FINAL: No se pudo colocar TP {tp['id']}")
+        return tp_ids
+
     def cerrar_posicion(self, symbol, reason="EXIT"):
         self.api.cancel_all_open_orders(symbol)
+        self.slm.olvidar(symbol)
         self.fin.sincronizar_libro_con_api()
         try:
             p_data = self._leer_datos_posicion(symbol)
@@ -191,7 +285,9 @@ class OrderManager:
                 qty = abs(amt)
                 # place_market_order no usa reduceOnly por defecto, es seguro.
                 self.api.place_market_order(symbol, close_side, qty, position_side=side)
+                self.fin.cuenta.invalidar()
                 self.log.registrar_actividad("OM", f"🏳️ Cierre Total ({reason})")
+                obtener_journal().registrar('POSITION_CLOSED', None, symbol, side, qty=qty, reason=reason)
                 return True
         except: return False
         return False
@@ -210,6 +306,8 @@ class OrderManager:
             # CORRECCIÓN PARA HEDGE MODE: reduce_only=False
             # El cierre se garantiza por position_side + lado opuesto
             self.api.place_market_order(symbol, close_side, final_qty, position_side=side, reduce_only=False)
+            self.fin.cuenta.invalidar()
+            obtener_journal().registrar('POSITION_REDUCED', None, symbol, side, qty=final_qty, reason=reason)
             return True
         except: return False
 
@@ -222,7 +320,7 @@ class OrderManager:
         """
         for i in range(15):
             try:
-                order = self.api.client.query_order(symbol=symbol, orderId=order_id)
+                order = self.api.query_order(symbol, order_id)
                 if order['status'] == 'FILLED':
                     return float(order['avgPrice']), float(order['executedQty'])
             except: pass
@@ -230,9 +328,11 @@ class OrderManager:
         return 0, 0
 
     def _registrar_en_csv(self, p, tp_status="HARD_TPS"):
+        # Encolado en el LogWriter: la escritura a disco no bloquea el camino de la orden
         try:
-            line = f"{p['id']},{p.get('timestamp', '')},{p['strategy']},{p['side']},{p['entry_price']},{p['qty']},{p['sl_price']},{p['sl_order_id']},{tp_status},OPEN\n"
-            with open(self.cfg.FILE_LOG_ORDERS, 'a') as f: f.write(line)
+            obtener_escritor().escribir('ORDENES', [p['id'], p.get('timestamp', ''), p['strategy'], p['side'],
+                                                    p['entry_price'], p['qty'], p['sl_price'], p['sl_order_id'],
+                                                    tp_status, 'OPEN'])
         except: pass
 
     def cancelar_orden_especifica(self, symbol, order_id, motivo="MANUAL"):
@@ -240,6 +340,7 @@ class OrderManager:
             self.api.cancel_order(symbol, order_id)
             self.fin.eliminar_orden_del_libro(order_id)
             self.log.registrar_actividad("OM", f"🗑️ Orden {order_id} cancelada ({motivo}).")
+            obtener_journal().registrar('ORDER_CANCELLED', None, symbol, order_id=order_id, reason=motivo)
             return True
         except Exception as e:
             self.log.registrar_error("OM", f"Fallo cancelando {order_id}: {e}")
@@ -0,0 +1,246 @@
+# =============================================================================
+# UBICACIÓN: execution/portfolio.py
+# DESCRIPCIÓN: RUNTIME DE CARTERA V1.0 (WORKERS POR SÍMBOLO + RISK BOOK GLOBAL)
+# =============================================================================
+
+import threading
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+from config.config import Config
+from core.financials import Financials
+from core.account_snapshot import AccountSnapshot
+from data.historical_manager import HistoricalManager
+from data.bulk_sync import BulkSynchronizer
+from execution.order_manager import OrderManager
+from execution.comptroller import Comptroller
+from execution.custody_store import CustodyStore
+from logic.shooter import Shooter
+
+# =============================================================================
+# ANÁLISIS (CPU) - ejecutable en procesos hijos
+# =============================================================================
+
+_BRAINS = {}
+
+def _analizar_simbolo(symbol, marcas=None):
+    """
+    Lee el caché en disco del símbolo y corre el Brain por eventos de vela. Sin estado
+    compartido: puede ejecutarse en un proceso hijo (un Brain por símbolo y proceso);
+    las marcas de vela viajan con la llamada porque el símbolo puede caer en otro proceso.
+    Retorna (señales, rsi_15m, marcas).
+    """
+    from logic.brain import Brain
+    hist = HistoricalManager(None, None, symbol=symbol)
+    data_map = {tf: hist.obtener_dataframe_cache(tf) for tf in ('15m', '1h', '4h')}
+    if any(df.empty for df in data_map.values()): return [], None, marcas
+
+    if symbol not in _BRAINS: _BRAINS[symbol] = Brain(Config)
+    brain = _BRAINS[symbol]
+    signals = brain.analizar_eventos(data_map, marcas)
+    for sig in signals: sig['symbol'] = symbol
+    rsi = data_map['15m'].iloc[-1]['rsi'] if 'rsi' in data_map['15m'].columns else None
+    return signals, rsi, brain.eventos.exportar_marcas()
+
+
+class RiskBook:
+    """
+    RISK BOOK V1.0:
+    Cupos globales de la cartera (MAX_RISK_SLOTS) compartidos por todos los símbolos.
+    Una key (SYMBOL_SIDE) ocupa un cupo; la re-entrada sobre la misma key no consume otro.
+    Las reservas cubren la ventana entre la aprobación del Shooter y la custodia.
+    """
+    def __init__(self, max_slots):
+        self.max_slots = max_slots
+        self._lock = threading.Lock()
+        self.ocupadas = set()
+        self.reservas = set()
+        self.rechazos = 0
+
+    def reservar(self, key):
+        with self._lock:
+            if key in self.ocupadas or key in self.reservas: return key in self.ocupadas
+            if len(self.ocupadas | self.reservas) >= self.max_slots:
+                self.rechazos += 1
+                return False
+            self.reservas.add(key)
+            return True
+
+    def cancelar_reserva(self, key):
+        with self._lock: self.reservas.discard(key)
+
+    def ocupar(self, key):
+        with self._lock:
+            self.ocupadas.add(key)
+            self.reservas.discard(key)
+
+    def liberar(self, key):
+        with self._lock: self.ocupadas.discard(key)
+
+    def resumen(self):
+        with self._lock:
+            return {'ocupadas': sorted(self.ocupadas), 'reservas': sorted(self.reservas),
+                    'max': self.max_slots, 'rechazos': self.rechazos}
+
+
+class SymbolWorker:
+    """
+    WORKER POR SÍMBOLO V1.0:
+    Financials / OrderManager / Comptroller / HistoricalManager / Shooter propios del símbolo.
+    API, gobernador de peso y foto de cuenta son compartidos por toda la cartera.
+    """
+    def __init__(self, symbol, config, api, logger, risk_book, cuenta):
+        self.symbol = symbol
+        self.log = logger
+        self.risk = risk_book
+        self.fin = Financials(config, api, symbol=symbol, cuenta=cuenta)
+        self.om = OrderManager(config, api, logger, self.fin, symbol=symbol)
+        self.comp = Comptroller(config, self.om, self.fin, logger, risk_book=risk_book)
+        self.hist = HistoricalManager(api, logger, symbol=symbol)
+        self.shooter = Shooter(self.om, self.fin)
+        self.custodia = CustodyStore(symbol, config)
+        self.ultimo_rsi = None
+        self.marcas_velas = None        # Eventos de vela: última fila vista por timeframe
+        self._lock = threading.Lock()   # Un ciclo a la vez por símbolo
+
+    def latido(self, precio):
+        self.comp.auditar_posiciones(precio)
+
+    def guardar_custodia(self):
+        self.custodia.guardar(self.comp, self.shooter)
+
+    def sincronizar(self, velas_actualizadas=None):
+        self.sincronizar_custodia()
+        self.sincronizar_datos(velas_actualizadas)
+
+    def sincronizar_custodia(self):
+        with self._lock:
+            self.fin.sincronizar_libro_con_api()
+            self.comp.sincronizar_con_exchange()
+
+    def sincronizar_datos(self, velas_actualizadas=None):
+        # Solo velas y derivados en disco: puede correr fuera del hilo del latido
+        self.hist.sincronizar_infraestructura_datos(velas_actualizadas)
+
+    def ejecutar_senales(self, signals):
+        with self._lock:
+            for sig in signals:
+                plan = self.shooter.validar_y_crear_plan(sig, self.comp.posiciones_activas)
+                if not plan: continue
+
+                key = f"{self.symbol}_{plan['side']}"
+                if not self.risk.reservar(key):
+                    self.log.registrar_actividad("PORTFOLIO", f"⛔ {key}: Cupos globales de cartera llenos.")
+                    continue
+                try:
+                    self.log.registrar_actividad("PORTFOLIO", f"⚡ SEÑAL APROBADA: {self.symbol} {plan['strategy']} ({plan['side']})")
+                    exito, paquete = self.om.ejecutar_estrategia(plan)
+                    if exito and paquete:
+                        self.comp.aceptar_custodia(paquete)
+                        self.custodia.guardar(self.comp, self.shooter, forzar=True)
+                finally:
+                    self.risk.cancelar_reserva(key)
+
+
+class PortfolioRuntime:
+    """
+    RUNTIME DE CARTERA V1.0:
+    - Latido: un solo ticker para todos los símbolos (peso 2) y auditoría por símbolo.
+    - Estrategia: sync masivo de velas (BulkSynchronizer), sync por símbolo en hilos (I/O),
+      análisis en procesos (CPU, escala con núcleos), ejecución en hilos. El gobernador de peso REST es único para todo el proceso.
+    - RiskBook global: MAX_RISK_SLOTS se respeta sobre toda la cartera.
+    """
+    def __init__(self, config, api, logger, symbols=None):
+        pcfg = config.PortfolioConfig
+        self.cfg = config
+        self.api = api
+        self.log = logger
+        self.symbols = list(symbols or config.SYMBOLS)
+        self.risk = RiskBook(config.MAX_RISK_SLOTS)
+        self.cuenta = AccountSnapshot(config, api)
+        self.sync = BulkSynchronizer(api)
+
+        self.workers = {}
+        for s in self.symbols:
+            if s != config.SYMBOL and hasattr(api, 'configurar_simbolo'): api.configurar_simbolo(s)
+            self.workers[s] = SymbolWorker(s, config, api, logger, self.risk, self.cuenta)
+
+        self.pool_io = ThreadPoolExecutor(max_workers=max(1, min(pcfg.WORKERS_IO, len(self.symbols))))
+        procesos = min(pcfg.PROCESOS_ANALISIS, len(self.symbols))
+        # spawn: los hijos no heredan locks tomados por los hilos del proceso padre
+        self.pool_cpu = ProcessPoolExecutor(max_workers=procesos, mp_context=multiprocessing.get_context('spawn')) if procesos > 1 else None
+
+    def _seguro(self, symbol, etapa, fn, *args):
+        try: return fn(*args)
+        except Exception as e:
+            self.log.registrar_error("PORTFOLIO", f"❌ {symbol} [{etapa}]: {e}")
+            return None
+
+    # =========================================================================
+    # CICLOS
+    # =========================================================================
+
+    def iniciar(self):
+        self.cuenta.iniciar()
+        for s, w in self.workers.items():
+            self._seguro(s, 'RESTAURACION', w.custodia.restaurar, w.comp, w.shooter)
+            self._seguro(s, 'ADOPCION', w.comp.adoptar_posiciones_huerfanas)
+            self._seguro(s, 'SYNC', w.fin.sincronizar_libro_con_api)
+        self.log.registrar_actividad("PORTFOLIO", f"🌐 Cartera activa: {len(self.symbols)} símbolos.")
+
+    def latido(self):
+        precios = self.api.get_ticker_prices()
+        if not precios: raise Exception("API Price Zero")
+        for s, w in self.workers.items():
+            precio = precios.get(s)
+            if precio: self._seguro(s, 'LATIDO', w.latido, precio)
+        return precios
+
+    def ciclo_estrategia(self):
+        self.ejecutar_estrategia(self.preparar_estrategia())
+
+    def preparar_estrategia(self):
+        """Velas + análisis, sin tocar libros ni custodias (apto para un hilo del planificador)."""
+        # 1. I/O: velas de toda la cartera en un solo plan de bloques concurrentes,
+        #    luego derivados por símbolo en paralelo
+        nuevas = self._seguro('*', 'VELAS', self.sync.sincronizar, self.symbols) or {}
+        actualizados = {s: nuevas.get((s, '1m'), 0) > 0 for s in self.symbols}
+        list(self.pool_io.map(lambda s: self._seguro(s, 'SYNC', self.workers[s].sincronizar_datos, actualizados[s]), self.symbols))
+
+        # 2. CPU: Brain por símbolo (procesos si hay núcleos disponibles)
+        pool = self.pool_cpu or self.pool_io
+        futuros = {s: pool.submit(_analizar_simbolo, s, self.workers[s].marcas_velas) for s in self.symbols}
+        resultados = {}
+        for s, f in futuros.items():
+            res = self._seguro(s, 'ANALISIS', f.result)
+            if res: resultados[s], self.workers[s].ultimo_rsi, self.workers[s].marcas_velas = res
+        return resultados
+
+    def ejecutar_estrategia(self, resultados):
+        """Libro + custodia y ejecución por símbolo (hilo de operaciones: el latido sigue en el bucle)."""
+        list(self.pool_io.map(lambda s: self._seguro(s, 'SYNC', self.workers[s].sincronizar_custodia), self.symbols))
+
+        # 3. Ejecución por símbolo en paralelo (el RiskBook arbitra los cupos)
+        tareas = [self.pool_io.submit(self._seguro, s, 'EJECUCION', self.workers[s].ejecutar_senales, sig)
+                  for s, sig in resultados.items() if sig]
+        for t in tareas: t.result()
+
+    def guardar_custodias(self):
+        """Fotos periódicas de custodia (json + fsync): hilo de operaciones, nunca el latido."""
+        for s, w in self.workers.items():
+            self._seguro(s, 'FOTO', w.guardar_custodia)
+
+    def posiciones(self):
+        """Todas las custodias de la cartera (dashboard / consultas)."""
+        res = []
+        for w in self.workers.values():
+            w.comp.refrescar_metricas()
+            res.extend(w.comp.posiciones_activas.foto().values())
+        return res
+
+    def detener(self):
+        for s, w in self.workers.items():
+            self._seguro(s, 'FOTO', w.custodia.guardar, w.comp, w.shooter, True)
+        self.cuenta.detener()
+        self.pool_io.shutdown(wait=False)
+        if self.pool_cpu: self.pool_cpu.shutdown(wait=False)
@@ -0,0 +1,180 @@
+# =============================================================================
+# UBICACIÓN: execution/sl_manager.py
+# DESCRIPCIÓN: GESTOR DE STOP LOSS V1.1 (ÍNDICE ACTIVO + COALESCENCIA DE TRAILING)
+# =============================================================================
+
+import time
+import threading
+
+class SLManager:
+    """
+    GESTOR DE SL V1.1:
+    - Índice del stop activo por (symbol, positionSide): id y precio sin recorrer el libro.
+    - Coalescencia del trailing: se ignoran pasos menores a SL_MIN_STEP_PCT y,
+      dentro de SL_MIN_INTERVAL, solo se guarda el último precio pedido (pendiente).
+    - Reemplazo: Binance solo permite modificar (PUT /fapi/v1/order) órdenes LIMIT,
+      así que un STOP_MARKET se reemplaza colocando el nuevo y cancelando el anterior
+      por su id indexado (la posición nunca queda sin stop).
+    - Las llamadas a la API (alta con reintentos + cancelación) corren fuera del lock.
+      Una key con reemplazo en curso acumula el siguiente precio como pendiente; si la
+      posición se olvida mientras tanto, el stop recién colocado se cancela.
+    - procesar_pendientes(precio) ajusta un pendiente viejo al lado protector del precio
+      actual, o lo descarta si ya no mejora al stop vigente.
+    """
+    def __init__(self, config, order_manager, logger):
+        self.cfg = config
+        self.om = order_manager
+        self.log = logger
+        self.sec = config.ExecutionConfig
+        self._lock = threading.RLock()
+
+        self.indice = {}       # (symbol, side) -> {'order_id', 'price', 'ts'}
+        self.pendientes = {}   # (symbol, side) -> precio más reciente solicitado
+        self._en_vuelo = set() # Keys con un reemplazo en la red (fuera del lock)
+        self._epoca = {}       # (symbol, side) -> contador de olvidar()
+        self.stats = {'solicitudes': 0, 'ignoradas_paso': 0, 'coalescidas': 0,
+                      'reemplazos': 0, 'fallos': 0, 'descartadas': 0}
+
+    # =========================================================================
+    # ÍNDICE
+    # =========================================================================
+
+    def registrar(self, symbol, side, order_id, price):
+        with self._lock:
+            self.indice[(symbol, side)] = {'order_id': str(order_id), 'price': float(price), 'ts': time.monotonic()}
+
+    def olvidar(self, symbol, side=None):
+        """Descarta el stop indexado (posición cerrada o cancel_all)."""
+        with self._lock:
+            lados = [side] if side else ['LONG', 'SHORT']
+            for s in lados:
+                self.indice.pop((symbol, s), None)
+                self.pendientes.pop((symbol, s), None)
+                self._epoca[(symbol, s)] = self._epoca.get((symbol, s), 0) + 1
+
+    def activo(self, symbol, side):
+        """Retorna {'order_id', 'price', 'ts'} o None. Siembra el índice desde el libro local una vez."""
+        with self._lock:
+            entrada = self.indice.get((symbol, side))
+            if entrada: return entrada
+            tiene, precio, oid = self.om.fin.verificar_si_tiene_sl_local(side)
+            if tiene:
+                self.indice[(symbol, side)] = {'order_id': str(oid), 'price': precio, 'ts': 0.0}
+                return self.indice[(symbol, side)]
+            return None
+
+    # =========================================================================
+    # ACTUALIZACIÓN
+    # =========================================================================
+
+    def solicitar(self, symbol, side, precio, forzar=False):
+        """
+        Pide mover el SL a 'precio'. Retorna el id del nuevo stop si se colocó ahora,
+        None si se ignoró, quedó pendiente o falló.
+        """
+        precio = float(precio)
+        key = (symbol, side)
+        with self._lock:
+            self.stats['solicitudes'] += 1
+            actual = self.activo(symbol, side)
+
+            if actual and not forzar:
+                ref = actual['price'] or precio
+                if abs(precio - actual['price']) / ref < self.sec.SL_MIN_STEP_PCT:
+                    self.stats['ignoradas_paso'] += 1
+                    return None
+            # Reemplazo en curso o intervalo mínimo sin cumplir: queda el último precio pedido
+            if key in self._en_vuelo or (actual and not forzar
+                                         and time.monotonic() - actual['ts'] < self.sec.SL_MIN_INTERVAL):
+                if key in self.pendientes: self.stats['coalescidas'] += 1
+                self.pendientes[key] = precio
+                return None
+
+            self.pendientes.pop(key, None)
+            epoca = self._tomar(key)
+        return self._reemplazar(symbol, side, precio, actual, epoca)
+
+    def procesar_pendientes(self, precio_actual=None):
+        """
+        Envía los precios pendientes cuyo intervalo mínimo ya venció. Retorna cuántos se enviaron.
+        Con precio_actual, un pendiente que quedó del lado equivocado del precio se ajusta
+        (o se descarta si ya no mejora al stop vigente).
+        """
+        listos = []
+        with self._lock:
+            ahora = time.monotonic()
+            for key, precio in list(self.pendientes.items()):
+                if key in self._en_vuelo: continue
+                actual = self.indice.get(key)
+                if actual and ahora - actual['ts'] < self.sec.SL_MIN_INTERVAL: continue
+                del self.pendientes[key]
+                precio = self._ajustar(key[1], precio, precio_actual, actual)
+                if precio is None:
+                    self.stats['descartadas'] += 1
+                    continue
+                listos.append((key, precio, actual, self._tomar(key)))
+
+        # Red fuera del lock: solicitar / olvidar / activo no esperan a los reintentos
+        enviados = 0
+        for (symbol, side), precio, actual, epoca in listos:
+            if self._reemplazar(symbol, side, precio, actual, epoca): enviados += 1
+        return enviados
+
+    def _ajustar(self, side, precio, precio_actual, actual):
+        """Stop LONG por debajo del precio, SHORT por encima (con margen de un paso mínimo)."""
+        if not precio_actual: return precio
+        margen = self.sec.SL_MIN_STEP_PCT
+        if side == 'LONG':
+            precio = min(precio, precio_actual * (1 - margen))
+            if actual and precio <= actual['price']: return None
+        else:
+            precio = max(precio, precio_actual * (1 + margen))
+            if actual and precio >= actual['price']: return None
+        return precio
+
+    def _tomar(self, key):
+        """Marca la key en vuelo (bajo lock). Retorna la época para detectar un olvidar() concurrente."""
+        self._en_vuelo.add(key)
+        return self._epoca.get(key, 0)
+
+    def _reemplazar(self, symbol, side, precio, actual, epoca):
+        key = (symbol, side)
+        try:
+            nuevo_id = self.om._colocar_sl_seguro(symbol, side, precio, evento='SL_MOVED')
+            if not nuevo_id:
+                self.stats['fallos'] += 1
+                return None
+
+            with self._lock:
+                olvidada = self._epoca.get(key, 0) != epoca
+            if olvidada:
+                # La posición se cerró mientras se colocaba: el stop nuevo no protege nada
+                self.om.api.cancel_order(symbol, nuevo_id)
+                self.om.fin.eliminar_orden_del_libro(nuevo_id)
+                with self._lock:
+                    entrada = self.indice.get(key)
+                    if entrada and entrada['order_id'] == str(nuevo_id): del self.indice[key]
+                self.stats['descartadas'] += 1
+                return None
+
+            # _colocar_sl_seguro ya indexó el nuevo stop: retiramos el anterior por id
+            if actual and str(actual['order_id']) != str(nuevo_id):
+                self.om.api.cancel_order(symbol, actual['order_id'])
+                self.om.fin.eliminar_orden_del_libro(actual['order_id'])
+            self.stats['reemplazos'] += 1
+            return nuevo_id
+        finally:
+            with self._lock: self._en_vuelo.discard(key)
+
+    # =========================================================================
+    # MÉTRICAS
+    # =========================================================================
+
+    def metricas(self):
+        with self._lock:
+            m = dict(self.stats)
+            m['pendientes'] = len(self.pendientes)
+            m['indexados'] = len(self.indice)
+            # Cada solicitud evitada ahorra un alta + una cancelación firmadas
+            m['llamadas_evitadas'] = 2 * (m['ignoradas_paso'] + m['coalescidas'])
+            return m
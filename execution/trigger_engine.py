@@ -0,0 +1,87 @@
+# =============================================================================
+# UBICACIÓN: execution/trigger_engine.py
+# DESCRIPCIÓN: MOTOR DE NIVELES DE DISPARO V1.0 (HEAPS ARRIBA/ABAJO)
+# =============================================================================
+
+import heapq
+import itertools
+import threading
+
+class TriggerEngine:
+    """
+    MOTOR DE DISPAROS V1.0:
+    - Cada posición arma los próximos precios que cambiarían su estado
+      (activación BE, siguiente paso de trailing, TP1 swing...).
+    - Dos heaps: niveles que disparan al SUBIR (min-heap) y al BAJAR (max-heap).
+    - Un tick sin cruces solo mira la cima de ambos heaps: O(1).
+      Cada cruce cuesta O(log n) independientemente de cuántas posiciones haya.
+    - Re-armar una posición invalida sus niveles anteriores por versión (borrado perezoso).
+      Las versiones salen de un contador global: nunca se repiten aunque la key se desarme.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._arriba = []     # (precio, seq, key, tipo, version)
+        self._abajo = []      # (-precio, seq, key, tipo, version)
+        self._version = {}    # key -> versión vigente
+        self._seq = itertools.count()
+        self.disparos = 0
+
+    def armar(self, key, niveles):
+        """
+        niveles: [(direccion, precio, tipo)] con direccion 'ARRIBA' (precio >= nivel)
+        o 'ABAJO' (precio <= nivel). Sustituye los niveles previos de la key.
+        """
+        with self._lock:
+            # Versión global monotónica: tras desarmar + armar, los niveles viejos siguen inválidos
+            version = next(self._seq)
+            self._version[key] = version
+            for direccion, precio, tipo in niveles:
+                if precio is None: continue
+                if direccion == 'ARRIBA':
+                    heapq.heappush(self._arriba, (precio, next(self._seq), key, tipo, version))
+                else:
+                    heapq.heappush(self._abajo, (-precio, next(self._seq), key, tipo, version))
+            self._compactar()
+
+    def desarmar(self, key):
+        with self._lock:
+            self._version.pop(key, None)
+
+    def desarmar_todo(self):
+        with self._lock:
+            self._version.clear()
+            self._arriba, self._abajo = [], []
+
+    def evaluar(self, precio):
+        """Retorna [(key, tipo)] de los niveles cruzados por 'precio' (cada key a lo sumo una vez)."""
+        cruzados = []
+        vistos = set()
+        with self._lock:
+            while self._arriba and self._arriba[0][0] <= precio:
+                _, _, key, tipo, version = heapq.heappop(self._arriba)
+                if self._version.get(key) == version and key not in vistos:
+                    vistos.add(key); cruzados.append((key, tipo))
+            while self._abajo and -self._abajo[0][0] >= precio:
+                _, _, key, tipo, version = heapq.heappop(self._abajo)
+                if self._version.get(key) == version and key not in vistos:
+                    vistos.add(key); cruzados.append((key, tipo))
+            self.disparos += len(cruzados)
+        return cruzados
+
+    def proximos(self, key):
+        """Niveles vigentes de una key (para diagnóstico): [(direccion, precio, tipo)]."""
+        with self._lock:
+            version = self._version.get(key)
+            res = [('ARRIBA', p, t) for p, _, k, t, v in self._arriba if k == key and v == version]
+            res += [('ABAJO', -p, t) for p, _, k, t, v in self._abajo if k == key and v == version]
+            return res
+
+    def _compactar(self):
+        # Los niveles invalidados solo salen al cruzarse: si se acumulan, se reconstruye
+        vivos = len(self._version)
+        for nombre in ('_arriba', '_abajo'):
+            heap = getattr(self, nombre)
+            if len(heap) > 64 and len(heap) > 4 * vivos:
+                heap = [e for e in heap if self._version.get(e[2]) == e[4]]
+                heapq.heapify(heap)
+                setattr(self, nombre, heap)
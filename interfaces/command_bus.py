@@ -0,0 +1,75 @@
+# =============================================================================
+# UBICACIÓN: interfaces/command_bus.py
+# DESCRIPCIÓN: BUS DE COMANDOS V1.0 (COLA HACIA EL HILO DE OPERACIONES + FOTO DE SOLO LECTURA)
+# =============================================================================
+
+import time
+import queue
+from types import MappingProxyType
+
+class CommandBus:
+    """
+    BUS DE COMANDOS V1.0:
+    - Las interfaces (Telegram, consola) ya no tocan Comptroller / OrderManager desde
+      sus hilos: encolan la acción y el hilo de operaciones la ejecuta en procesar(),
+      serializada con la ejecución de estrategias (el Comptroller serializa sus
+      registros con auditar_posiciones()).
+    - Los comandos de consulta (status, pnl, balance) se responden desde la foto que
+      el bucle publica con publicar_foto(): lectura inmutable, sin llamadas a la API.
+    """
+    MAX_POR_CICLO = 5   # Acciones ejecutadas por pasada (el resto espera a la siguiente)
+
+    def __init__(self):
+        self.cola = queue.SimpleQueue()
+        self.handlers = {}
+        self._foto = MappingProxyType({})
+        self.stats = {'encolados': 0, 'ejecutados': 0, 'fallidos': 0, 'desconocidos': 0}
+
+    # =========================================================================
+    # INTERFACES (CUALQUIER HILO)
+    # =========================================================================
+
+    def registrar(self, accion, fn):
+        self.handlers[accion] = fn
+
+    def encolar(self, accion, *args, responder=None):
+        """responder(resultado | excepción): callback opcional, corre en el hilo que procesa la cola."""
+        self.cola.put((accion, args, responder, time.time()))
+        self.stats['encolados'] += 1
+
+    def foto(self):
+        return self._foto
+
+    # =========================================================================
+    # HILO DE OPERACIONES
+    # =========================================================================
+
+    def publicar_foto(self, foto):
+        self._foto = MappingProxyType(foto)
+
+    def procesar(self, maximo=None):
+        """Ejecuta hasta 'maximo' acciones pendientes. Retorna cuántas ejecutó."""
+        n = 0
+        for _ in range(maximo or self.MAX_POR_CICLO):
+            try: accion, args, responder, _ts = self.cola.get_nowait()
+            except queue.Empty: break
+            fn = self.handlers.get(accion)
+            if fn is None:
+                self.stats['desconocidos'] += 1
+                continue
+            try:
+                resultado = fn(*args)
+                self.stats['ejecutados'] += 1
+            except Exception as e:
+                resultado = e
+                self.stats['fallidos'] += 1
+            if responder:
+                try: responder(resultado)
+                except Exception: pass
+            n += 1
+        return n
+
+    def metricas(self):
+        m = dict(self.stats)
+        m['pendientes'] = self.cola.qsize()
+        return m
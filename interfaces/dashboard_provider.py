@@ -0,0 +1,168 @@
+# =============================================================================
+# UBICACIÓN: interfaces/dashboard_provider.py
+# DESCRIPCIÓN: PROVEEDOR DE MATRIZ DASHBOARD V1.0 (ESTADO VIVO + CIERRE DE VELA)
+# =============================================================================
+
+import io
+import os
+import threading
+from types import MappingProxyType
+import numpy as np
+import pandas as pd
+from config.config import Config
+from data.indicator_state import IndicatorState
+from tools.precision_lab import PrecisionLab
+
+class DashboardProvider:
+    """
+    PROVEEDOR DE MATRIZ V1.0:
+    - Reemplaza a Calculator.generar_matriz_dashboard en el render: la matriz sale de
+      los indicadores que el sistema ya mantiene (data_map del ciclo / CSV derivados del
+      PrecisionLab), no de releer y re-muestrear todo el maestro 1m.
+    - Cada timeframe se recalcula solo cuando cierra una vela (cambia su último timestamp);
+      los archivos sin cambios (mtime) ni se abren, y de los que sí se lee solo la cola.
+    - snapshot() entrega una vista inmutable ya armada: el render no calcula nada.
+    """
+    TFS_VISUALES = ['1m', '3m', '5m', '15m', '30m', '1h', '4h', '1d']
+    VENTANA = 60          # Velas de cola por timeframe (StochRSI y volumen medio)
+    VENTANA_1M = 300      # El maestro 1m no trae indicadores: se calculan sobre su cola
+
+    def __init__(self, symbol=None, base_dir=None):
+        self.symbol = symbol or Config.SYMBOL
+        self.base_dir = base_dir or Config.DIR_DATA
+        self.lab = PrecisionLab()
+        self.estado = IndicatorState(self.VENTANA)
+        self._firmas = {}     # tf -> (mtime, tamaño) del archivo ya procesado
+        self._ultimo_ts = {}  # tf -> timestamp de la última vela procesada
+        self._filas = {}      # tf -> fila de la matriz
+        self._snapshot = MappingProxyType({})
+        self._lock = threading.Lock()
+        self.stats = {'actualizaciones': 0, 'velas_cerradas': 0}
+
+    # =========================================================================
+    # LECTURA (RENDER)
+    # =========================================================================
+
+    def snapshot(self):
+        """Matriz {tf: {rsi, adx, macd_hist, stoch_k, bb_width, vol_change, trend}} inmutable."""
+        return self._snapshot
+
+    # =========================================================================
+    # ACTUALIZACIÓN (CICLO DE ESTRATEGIA)
+    # =========================================================================
+
+    def actualizar(self, data_map=None):
+        """
+        data_map: DataFrames ya cargados en el ciclo ({'15m': df, ...}); se reutilizan
+        tal cual. El resto de timeframes se leen por cola solo si su archivo cambió.
+        Retorna la lista de timeframes con vela nueva.
+        """
+        data_map = data_map or {}
+        with self._lock:
+            cerrados = []
+            for tf in self.TFS_VISUALES:
+                try:
+                    df = data_map.get(tf)
+                    if df is None: df = self._leer_si_cambio(tf)
+                    if df is None or df.empty: continue
+                    ts = int(df['timestamp'].iloc[-1])
+                    if self._ultimo_ts.get(tf) == ts: continue
+
+                    self.estado.actualizar(tf, df)
+                    self._filas[tf] = self._fila(tf)
+                    self._ultimo_ts[tf] = ts
+                    cerrados.append(tf)
+                except Exception: continue
+
+            self.stats['actualizaciones'] += 1
+            if cerrados:
+                self.stats['velas_cerradas'] += len(cerrados)
+                # Dict nuevo por publicación: el render nunca ve una matriz a medio armar
+                self._snapshot = MappingProxyType({tf: MappingProxyType(fila) for tf, fila in self._filas.items()})
+            return cerrados
+
+    def _leer_si_cambio(self, tf):
+        path = os.path.join(self.base_dir, f"{self.symbol}_{tf}.csv")
+        try:
+            st = os.stat(path)
+        except OSError: return None
+        firma = (st.st_mtime_ns, st.st_size)
+        if self._firmas.get(tf) == firma: return None
+        self._firmas[tf] = firma
+
+        if tf == '1m':
+            df = self._leer_cola(path, self.VENTANA_1M)
+            return self.lab.calcular_indicadores_full(df) if df is not None and not df.empty else None
+        return self._leer_cola(path, self.VENTANA)
+
+    @staticmethod
+    def _leer_cola(path, n):
+        """Cabecera + últimas n filas del CSV leyendo solo el final del archivo."""
+        with open(path, 'rb') as f:
+            cabecera = f.readline()
+            inicio = f.tell()
+            f.seek(0, os.SEEK_END)
+            fin = f.tell()
+            bloque = 8192
+            datos = b''
+            while fin > inicio and datos.count(b'\n') <= n:
+                paso = min(bloque, fin - inicio)
+                fin -= paso
+                f.seek(fin)
+                datos = f.read(paso) + datos
+                bloque *= 2
+        lineas = datos.splitlines()
+        if fin > inicio: lineas = lineas[1:]   # Primera línea del bloque puede venir cortada
+        if not lineas: return None
+        return pd.read_csv(io.BytesIO(cabecera + b'\n'.join(lineas[-n:]) + b'\n'))
+
+    # =========================================================================
+    # FILA DE LA MATRIZ
+    # =========================================================================
+
+    def _fila(self, tf):
+        e = self.estado
+        def v(col, defecto):
+            x = e.ultimo(tf, col, defecto)
+            return defecto if x != x else float(x)
+
+        # BB width en % del precio (misma escala que el BBB de pandas_ta)
+        mid = v('bb_mid', 0.0)
+        bb_width = v('bb_width', 0.0) / mid * 100 if mid else 0.0
+
+        fila = {
+            'rsi': v('rsi', 50.0),
+            'adx': v('adx', 0.0),
+            'macd_hist': v('macd_hist', 0.0),
+            'stoch_k': self._stoch_k(e.serie(tf, 'rsi')),
+            'bb_width': bb_width,
+            'vol_change': self._vol_change(e.serie(tf, 'volume'))
+        }
+        fila['trend'] = self._trend(fila['macd_hist'], fila['rsi'])
+        return fila
+
+    @staticmethod
+    def _stoch_k(rsi, largo=14, suavizado=3):
+        """StochRSI %K (14, 3) sobre la cola de RSI ya calculada."""
+        if rsi is None or len(rsi) < largo + suavizado - 1: return 50.0
+        ventanas = np.lib.stride_tricks.sliding_window_view(rsi[-(largo + suavizado - 1):], largo)
+        lo, hi = ventanas.min(axis=1), ventanas.max(axis=1)
+        rango = hi - lo
+        stoch = np.where(rango > 0, (ventanas[:, -1] - lo) / np.where(rango > 0, rango, 1) * 100, 50.0)
+        k = float(np.nanmean(stoch))
+        return 50.0 if k != k else k
+
+    @staticmethod
+    def _trend(macd, rsi):
+        # Mismo criterio que Calculator._calc_trend_score (sin arrastrar pandas_ta)
+        if macd > 0 and rsi > 45: return 1
+        if macd < 0 and rsi < 55: return -1
+        return 0
+
+    @staticmethod
+    def _vol_change(vol):
+        if vol is None or len(vol) < 21: return "EQ"
+        vol_ma = vol[-20:].mean()
+        if vol[-1] > vol_ma * 1.1: return "UP"
+        if vol[-1] < vol_ma * 0.9: return "DN"
+        return "EQ"
@@ -0,0 +1,142 @@
+# =============================================================================
+# UBICACIÓN: interfaces/dashboard_service.py
+# DESCRIPCIÓN: SERVICIO DE DASHBOARD V1.0 (HILO PROPIO + LIVE DIFERENCIAL + JSON LOCAL)
+# =============================================================================
+
+import json
+import time
+import queue
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from config.config import Config
+from interfaces.dashboard import RICH_AVAILABLE
+
+if RICH_AVAILABLE:
+    try: from rich.live import Live
+    except ImportError: Live = None
+else: Live = None
+
+class DashboardService:
+    """
+    SERVICIO DE DASHBOARD V1.0:
+    - El bucle de trading solo publica una foto (put_nowait en un buzón de 1 lugar):
+      si el render va atrasado, la foto pendiente se reemplaza por la más nueva.
+    - Un hilo propio arma la vista (Dashboard.construir) y la pinta con rich.Live:
+      actualización en el sitio, sin clear ni reimpresión de pantalla completa.
+      Fotos idénticas a la anterior no se repintan.
+    - Opcional: endpoint HTTP JSON de solo lectura (GET /estado) con la misma foto
+      y la matriz del DashboardProvider.
+    """
+    def __init__(self, dashboard, config=Config):
+        dcfg = config.DashboardConfig
+        self.dash = dashboard
+        self.intervalo = 1.0 / max(dcfg.REFRESCO_MAX, 1)
+        self.host = dcfg.HTTP_HOST
+        self.puerto = dcfg.HTTP_PUERTO
+        self.buzon = queue.Queue(maxsize=1)
+        self.ultima = None        # Última foto publicada (la lee el endpoint HTTP)
+        self.servidor = None
+        self._activo = False
+        self.stats = {'publicadas': 0, 'reemplazadas': 0, 'renders': 0, 'sin_cambios': 0, 'fallos': 0}
+
+    # =========================================================================
+    # PRODUCTOR (BUCLE DE TRADING)
+    # =========================================================================
+
+    def publicar(self, foto):
+        """No bloquea nunca. 'foto' debe ser una copia: el hilo de render la lee después."""
+        self.ultima = foto
+        self.stats['publicadas'] += 1
+        try:
+            self.buzon.put_nowait(foto)
+        except queue.Full:
+            try:
+                self.buzon.get_nowait()
+                self.stats['reemplazadas'] += 1
+            except queue.Empty: pass
+            try: self.buzon.put_nowait(foto)
+            except queue.Full: pass
+
+    # =========================================================================
+    # CICLO DE VIDA
+    # =========================================================================
+
+    def iniciar(self):
+        self._activo = True
+        threading.Thread(target=self._bucle, name="Dashboard", daemon=True).start()
+        if self.puerto: self._iniciar_http()
+
+    def detener(self):
+        self._activo = False
+        if self.servidor:
+            self.servidor.shutdown()
+            self.servidor = None
+
+    # =========================================================================
+    # HILO DE RENDER
+    # =========================================================================
+
+    def _bucle(self):
+        if Live is None:
+            # Sin rich: modo texto del Dashboard, igual fuera del bucle de trading
+            while self._activo:
+                foto = self._siguiente()
+                if foto is not None: self.dash.render(foto)
+            return
+
+        anterior = None
+        with Live(console=self.dash.console, auto_refresh=False, transient=False) as live:
+            while self._activo:
+                foto = self._siguiente()
+                if foto is None: continue
+                if foto == anterior:
+                    self.stats['sin_cambios'] += 1
+                    continue
+                try:
+                    live.update(self.dash.construir(foto), refresh=True)
+                    anterior = foto
+                    self.stats['renders'] += 1
+                except Exception:
+                    self.stats['fallos'] += 1
+                time.sleep(self.intervalo)   # Tope de refresco: las fotos intermedias se reemplazan
+
+    def _siguiente(self):
+        try: return self.buzon.get(timeout=0.5)
+        except queue.Empty: return None
+
+    # =========================================================================
+    # ENDPOINT JSON (SOLO LECTURA)
+    # =========================================================================
+
+    def estado_json(self):
+        foto = dict(self.ultima or {})
+        provider = getattr(self.dash, 'provider', None)
+        if provider is not None:
+            foto['matriz'] = {tf: dict(fila) for tf, fila in provider.snapshot().items()}
+        foto['ts'] = time.time()
+        return json.dumps(foto, default=str)
+
+    def _iniciar_http(self):
+        servicio = self
+
+        class _Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/estado'):
+                    self.send_error(404)
+                    return
+                cuerpo = servicio.estado_json().encode()
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(cuerpo)))
+                self.end_headers()
+                self.wfile.write(cuerpo)
+
+            def log_message(self, *args): pass   # Sin eco en la consola del dashboard
+
+        try:
+            self.servidor = ThreadingHTTPServer((self.host, self.puerto), _Handler)
+            self.servidor.daemon_threads = True
+            threading.Thread(target=self.servidor.serve_forever, name="DashboardHTTP", daemon=True).start()
+        except OSError as e:
+            print(f"⚠️ [DASHBOARD] Endpoint HTTP no disponible en {self.host}:{self.puerto} ({e})")
+            self.servidor = None
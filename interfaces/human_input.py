@@ -6,12 +6,14 @@
 import threading
 import sys
 from config.config import Config 
+from core.latency import obtener_latencia
 
 class HumanInput:
     """
     CONSOLA TÁCTICA V18:
     - Permite inyección manual de órdenes GAMMA.
     - Asegura el etiquetado correcto (GAMMA_NORMAL) para aplicar SL del 2%.
+    - Órdenes y pánico van por el CommandBus del bot (los ejecuta el hilo de operaciones).
     """
     def __init__(self, telegram_bot, comptroller, order_manager, shooter, logger, financials):
         self.tele = telegram_bot
@@ -23,6 +25,12 @@ class HumanInput:
         self.thread = None
         self.running = True
 
+        self.bus = getattr(telegram_bot, 'bus', None)
+        self.custodia = getattr(telegram_bot, 'custodia', None)
+        if self.bus:
+            self.bus.registrar('CLI_SENAL', self._inyectar_flujo)
+            self.bus.registrar('CLI_PANICO', self._protocolo_panico)
+
     def iniciar(self):
         self.thread = threading.Thread(target=self._escuchar_teclado, daemon=True)
         self.thread.start()
@@ -43,17 +51,19 @@ class HumanInput:
     def _procesar_comando(self, cmd):
         # --- COMANDOS GAMMA V4.6 ---
         # l/s -> Gamma Normal (SL 2.0%)
-        if cmd == 'l':  self._inyectar_flujo('LONG', 'GAMMA', 'GAMMA_NORMAL')
-        elif cmd == 's': self._inyectar_flujo('SHORT', 'GAMMA', 'GAMMA_NORMAL')
+        if cmd == 'l':  self._despachar('CLI_SENAL', 'LONG', 'GAMMA', 'GAMMA_NORMAL')
+        elif cmd == 's': self._despachar('CLI_SENAL', 'SHORT', 'GAMMA', 'GAMMA_NORMAL')
         
         # hl/hs -> Gamma Hedge (SL 1.5% - Sniper Manual)
-        elif cmd == 'hl': self._inyectar_flujo('LONG', 'GAMMA', 'GAMMA_HEDGE')
-        elif cmd == 'hs': self._inyectar_flujo('SHORT', 'GAMMA', 'GAMMA_HEDGE')
+        elif cmd == 'hl': self._despachar('CLI_SENAL', 'LONG', 'GAMMA', 'GAMMA_HEDGE')
+        elif cmd == 'hs': self._despachar('CLI_SENAL', 'SHORT', 'GAMMA', 'GAMMA_HEDGE')
         
         # --- GESTIÓN ---
-        elif cmd == 'panic': self._protocolo_panico()
+        elif cmd == 'panic': self._despachar('CLI_PANICO')
         elif cmd == 'status': self._mostrar_status()
-        elif cmd == 'bal': print(f"💰 Balance: ${self.fin.get_balance_total():.2f}")
+        elif cmd == 'bal': print(f"💰 Balance: ${self.fin.get_balance_total(prioridad='VISUAL'):.2f}")
+        elif cmd == 'net': self._mostrar_red()
+        elif cmd == 'lat': print(obtener_latencia().reporte_texto())
         elif cmd == 'help': self._mostrar_ayuda()
         elif cmd == 'exit': 
             print("🛑 Cerrando interfaz manual...")
@@ -61,6 +71,14 @@ class HumanInput:
         else:
             print("❌ Comando desconocido. Usa 'help'.")
 
+    def _despachar(self, accion, *args):
+        """Con bus: se encola para el hilo de operaciones. Sin bus: ejecución directa (legacy)."""
+        if self.bus:
+            print("⏳ Comando en cola para el próximo latido...")
+            self.bus.encolar(accion, *args)
+        elif accion == 'CLI_SENAL': self._inyectar_flujo(*args)
+        elif accion == 'CLI_PANICO': self._protocolo_panico()
+
     def _inyectar_flujo(self, side, strategy_name, mode_tag):
         """
         Crea señal sintética para el Shooter.
@@ -95,8 +113,9 @@ class HumanInput:
             exito, paquete = self.om.ejecutar_estrategia(plan)
             
             if exito and paquete:
-                # 4. Custodia
+                # 4. Custodia (foto forzada, como las entradas automáticas)
                 self.comp.aceptar_custodia(paquete)
+                if self.custodia: self.custodia.guardar(self.comp, self.shooter, forzar=True)
                 
                 msg = (f"🚀 MANUAL OK: {side} | Entry: {paquete['entry_price']} | SL: {paquete['sl_price']}")
                 print(msg)
@@ -111,15 +130,29 @@ class HumanInput:
         print("\n🚨🚨 ALERTA ROJA: PÁNICO ACTIVADO 🚨🚨")
         self.tele.enviar_mensaje("🚨 EJECUTANDO PROTOCOLO DE PÁNICO MANUAL")
         self.om.cerrar_posicion(self.om.cfg.SYMBOL, reason="PANIC_CLI")
-        self.comp.posiciones_activas.clear()
+        self.comp.cerrar_todo("PANIC_CLI")
+        if self.custodia: self.custodia.guardar(self.comp, self.shooter, forzar=True)
         print("✅ PÁNICO FINALIZADO.")
 
     def _mostrar_status(self):
-        self.comp.sincronizar_con_exchange() 
-        print(f"\n📊 ESTATUS ({len(self.comp.posiciones_activas)} Posiciones)")
-        for key, p in self.comp.posiciones_activas.items():
+        # Foto publicada por el bucle principal (sin sincronizar desde este hilo)
+        posiciones = self.bus.foto().get('positions', []) if self.bus else list(self.comp.posiciones_activas.foto().values())
+        print(f"\n📊 ESTATUS ({len(posiciones)} Posiciones)")
+        for p in posiciones:
             print(f"   🔹 {p['symbol']} {p['side']} | Entry: {p['entry_price']} | PnL: {p.get('pnl_pct',0)*100:.2f}% | SL: {p.get('sl_price')}")
 
+    def _mostrar_red(self):
+        print("\n📡 TRANSPORTE HTTP (Keep-Alive)")
+        try:
+            for clase, m in self.om.api.metricas_transporte().items():
+                print(f"   🔹 {clase:<8} | Peticiones: {m['peticiones']} | Conexiones nuevas: {m['conexiones_nuevas']} | Reuso: {m['reuso_pct']:.1f}%")
+            g = self.om.api.metricas_gobernador()
+            print(f"\n⚖️ PESO REST | Tokens: {g['tokens']}/{g['capacidad']:.0f} | Servidor 1m: {g['peso_servidor_1m']} | Bloqueos: {g['bloqueos']}")
+            for prio, e in g['esperas'].items():
+                print(f"   🔹 {prio:<8} | Cola: {g['cola'][prio]} | Atendidas: {e['atendidas']} | Espera media: {e['espera_media_ms']}ms | Máx: {e['espera_max_ms']}ms")
+        except Exception as e:
+            print(f"⚠️ Métricas no disponibles: {e}")
+
     def _mostrar_ayuda(self):
         print("\n🔰 COMANDOS GAMMA V18 🔰")
         print(" l      : Gamma Normal LONG  (SL 2.0%)")
@@ -127,4 +160,6 @@ class HumanInput:
         print(" hl     : Gamma Hedge LONG   (SL 1.5%)")
         print(" hs     : Gamma Hedge SHORT  (SL 1.5%)")
         print(" status : Ver posiciones")
+        print(" net    : Métricas de conexiones HTTP y peso REST")
+        print(" lat    : Latencias del order path (p50/p95/p99)")
         print(" panic  : ⚠️ CERRAR TODO")
\ No newline at end of file
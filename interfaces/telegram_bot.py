@@ -1,12 +1,17 @@
 # =============================================================================
 # UBICACIÓN: interfaces/telegram_bot.py
-# DESCRIPCIÓN: TELEGRAM BOT V19.0 (CON REPORTE DE INTENCIÓN DETALLADO)
+# DESCRIPCIÓN: TELEGRAM BOT V19.2 (ENVÍO ASÍNCRONO + LONG POLLING CON OFFSET PERSISTIDO + BUS DE COMANDOS)
 # =============================================================================
 
+import os
+import json
 import threading
 import time
-import requests
 from config.config import Config
+from connections.transport import obtener_transporte
+from core.latency import obtener_latencia
+from interfaces.telegram_notifier import TelegramNotifier
+from interfaces.command_bus import CommandBus
 
 class TelegramBot:
     """
@@ -14,37 +19,56 @@ class TelegramBot:
     - Control Remoto para Gamma V4.6.
     - Reporte de Intención de Entrada (Pre-Trade).
     - Reporte de Ejecución y Pánico.
+    - Salida por TelegramNotifier: enviar_mensaje() solo encola (no bloquea la operativa).
+    - Entrada por long polling (getUpdates con timeout) y offset persistido: un reinicio
+      no vuelve a ejecutar comandos ya leídos. Solo se atiende al chat configurado.
+    - /long, /short, /panic viajan por el CommandBus y los ejecuta el hilo de operaciones;
+      /status, /pnl, /balance, /latency se responden desde la foto publicada.
     """
-    def __init__(self, config, shooter, comptroller, order_manager, logger, financials):
+    def __init__(self, config, shooter, comptroller, order_manager, logger, financials, bus=None, custodia=None):
         self.cfg = config
         self.shooter = shooter
         self.comp = comptroller
         self.om = order_manager
         self.log = logger
         self.fin = financials
+        self.custodia = custodia   # CustodyStore: foto forzada tras entradas / pánico manuales
         
         self.token = config.TELEGRAM_TOKEN
         self.chat_id = config.TELEGRAM_CHAT_ID
         self.running = False
 
+        # Pool propio (clase TELEGRAM): keep-alive y aislado del tráfico de órdenes
+        self.transporte = obtener_transporte()
+        self.http = self.transporte.sesion('TELEGRAM')
+        self.api_url = f"{config.TelegramConfig.BASE_URL.rstrip('/')}/bot{self.token}"
+        self.notifier = TelegramNotifier(self.token, self.chat_id, config, logger)
+        self.path_offset = os.path.join(config.DIR_STATE, "telegram_offset.json")
+
+        self.bus = bus or CommandBus()
+        self.bus.registrar('TG_SENAL', self._inyectar_senal)
+        self.bus.registrar('TG_PANICO', self._protocolo_panico)
+
     def iniciar(self):
         if not self.token or not self.chat_id:
             self.log.registrar_error("TELEGRAM", "Credenciales vacías.")
             return
 
         self.running = True
+        self.notifier.iniciar()
         t = threading.Thread(target=self._poll_updates, daemon=True)
         t.start()
         self.enviar_mensaje(f"🤖 **{self.cfg.BOT_NAME}** Online\nVersión: {self.cfg.VERSION}\nModo: {Config.MODE}")
 
     def enviar_mensaje(self, texto):
+        """Encola el mensaje; el hilo del notificador agrupa, respeta límites y reintenta."""
         if not self.running: return
-        url = f"https://api.telegram.org/bot{self.token}/sendMessage"
-        data = {"chat_id": self.chat_id, "text": texto, "parse_mode": "Markdown"}
-        try:
-            requests.post(url, data=data, timeout=5)
-        except Exception as e:
-            self.log.registrar_error("TELEGRAM", f"Fallo envío: {e}")
+        if not self.notifier.encolar(texto):
+            self.log.registrar_error("TELEGRAM", "Cola de salida llena: mensaje descartado.")
+
+    def detener(self):
+        self.notifier.detener()
+        self.running = False
 
     # --- NUEVA FUNCIÓN DE REPORTE DE INTENCIÓN ---
     def reportar_intencion_entrada(self, plan):
@@ -90,42 +114,78 @@ class TelegramBot:
         except Exception as e:
             self.log.registrar_error("TELEGRAM", f"Error armando reporte intención: {e}")
 
+    # =========================================================================
+    # ENTRADA: LONG POLLING
+    # =========================================================================
+
+    def _cargar_offset(self):
+        try:
+            with open(self.path_offset) as f: return int(json.load(f).get('offset', 0))
+        except Exception: return 0
+
+    def _guardar_offset(self, offset):
+        try:
+            os.makedirs(os.path.dirname(self.path_offset), exist_ok=True)
+            tmp = self.path_offset + ".tmp"
+            with open(tmp, 'w') as f: json.dump({'offset': offset}, f)
+            os.replace(tmp, self.path_offset)
+        except Exception as e:
+            self.log.registrar_error("TELEGRAM", f"No se pudo persistir offset: {e}")
+
     def _poll_updates(self):
-        offset = 0
-        url = f"https://api.telegram.org/bot{self.token}/getUpdates"
+        offset = self._cargar_offset()
+        url = f"{self.api_url}/getUpdates"
+        espera_pol = self.cfg.TelegramConfig.POLL_TIMEOUT
+        params = {"timeout": espera_pol, "allowed_updates": json.dumps(["message"])}
+        backoff = 1.0
         
         while self.running:
             try:
-                # Long polling
-                resp = requests.get(url, params={"offset": offset, "timeout": 20}, timeout=30)
-                if resp.status_code == 200:
-                    result = resp.json().get("result", [])
-                    for update in result:
-                        offset = update["update_id"] + 1
-                        if "message" in update and "text" in update["message"]:
-                            self._procesar_comando(update["message"]["text"])
+                # Long polling: la petición queda abierta hasta que llega un mensaje (o vence)
+                params["offset"] = offset
+                resp = self.http.get(url, params=params, timeout=espera_pol + 10)
+                if resp.status_code != 200: raise Exception(f"HTTP {resp.status_code}")
+                result = resp.json().get("result", [])
+                if result:
+                    # Se persiste ANTES de despachar: un corte nunca re-ejecuta un /long
+                    offset = result[-1]["update_id"] + 1
+                    self._guardar_offset(offset)
+                for update in result:
+                    msg = update.get("message") or {}
+                    if "text" not in msg: continue
+                    if str(msg.get("chat", {}).get("id")) != str(self.chat_id): continue
+                    self._procesar_comando(msg["text"])
+                backoff = 1.0
             except Exception:
-                time.sleep(5)
-            time.sleep(0.5)
+                time.sleep(backoff)
+                backoff = min(backoff * 2, 60)
 
     def _procesar_comando(self, texto):
-        cmd = texto.strip().lower()
+        cmd = texto.strip().lower().split('@')[0]
         
-        # --- COMANDOS OPERATIVOS ---
-        if cmd == '/long': self._inyectar_senal('LONG', 'GAMMA', 'GAMMA_NORMAL')
-        elif cmd == '/short': self._inyectar_senal('SHORT', 'GAMMA', 'GAMMA_NORMAL')
-        elif cmd == '/panic': self._protocolo_panico()
+        # --- COMANDOS OPERATIVOS (al hilo de operaciones) ---
+        if cmd == '/long': self._encolar('TG_SENAL', 'LONG', 'GAMMA', 'GAMMA_NORMAL')
+        elif cmd == '/short': self._encolar('TG_SENAL', 'SHORT', 'GAMMA', 'GAMMA_NORMAL')
+        elif cmd == '/panic':
+            self.enviar_mensaje("🚨 **PÁNICO RECIBIDO: CERRANDO TODO**")
+            self.bus.encolar('TG_PANICO')
         
-        # --- COMANDOS INFORMATIVOS ---
+        # --- COMANDOS INFORMATIVOS (foto de solo lectura) ---
         elif cmd == '/status': self._reportar_status()
-        elif cmd == '/balance': 
-            bal = self.fin.get_balance_total()
-            self.enviar_mensaje(f"💰 Balance: **${bal:,.2f}**")
+        elif cmd == '/pnl': self._reportar_pnl()
+        elif cmd == '/balance':
+            bal = self.bus.foto().get('financials', {}).get('balance')
+            if bal is None: self.enviar_mensaje("⏳ Balance aún no disponible.")
+            else: self.enviar_mensaje(f"💰 Balance: **${bal:,.2f}**")
+        elif cmd == '/latency': self.enviar_mensaje(f"```\n{obtener_latencia().reporte_texto()}\n```")
         elif cmd == '/help': self._enviar_ayuda()
 
-    def _inyectar_senal(self, side, strategy_name, mode_tag):
+    def _encolar(self, accion, side, strategy_name, mode_tag):
         self.enviar_mensaje(f"⚡ Procesando **{side}** ({mode_tag})...")
-        
+        self.bus.encolar(accion, side, strategy_name, mode_tag)
+
+    def _inyectar_senal(self, side, strategy_name, mode_tag):
+        # Corre en el hilo de operaciones (CommandBus.procesar)
         try: price = self.om.api.get_ticker_price(self.cfg.SYMBOL)
         except: price = 0
         
@@ -145,6 +205,7 @@ class TelegramBot:
             
             if exito and paquete:
                 self.comp.aceptar_custodia(paquete)
+                self._guardar_custodia()
                 self.log.registrar_actividad("TELEGRAM", f"Orden Remota OK: {side}")
                 self.enviar_mensaje("✅ **Orden Confirmada en Exchange**")
             else:
@@ -153,30 +214,51 @@ class TelegramBot:
             self.enviar_mensaje("⛔ **Shooter RECHAZÓ la orden.**\n(Cupos llenos o Riesgo alto)")
 
     def _protocolo_panico(self):
-        self.enviar_mensaje("🚨 **PÁNICO RECIBIDO: CERRANDO TODO**")
+        # Corre en el hilo de operaciones (CommandBus.procesar)
         self.om.cerrar_posicion(self.cfg.SYMBOL, reason="TELEGRAM_PANIC")
-        self.comp.posiciones_activas.clear()
+        self.comp.cerrar_todo("TELEGRAM_PANIC")
+        self._guardar_custodia()
         self.enviar_mensaje("✅ Posiciones cerradas y memoria limpia.")
 
+    def _guardar_custodia(self):
+        # Igual que las entradas automáticas: un reinicio no debe perder la custodia manual
+        if self.custodia: self.custodia.guardar(self.comp, self.shooter, forzar=True)
+
     def _reportar_status(self):
-        self.comp.sincronizar_con_exchange()
-        if not self.comp.posiciones_activas:
+        posiciones = self.bus.foto().get('positions', [])
+        if not posiciones:
             self.enviar_mensaje("💤 Sin posiciones activas.")
             return
             
         msg = "📊 **POSICIONES ACTIVAS**\n"
-        for pid, p in self.comp.posiciones_activas.items():
+        for p in posiciones:
             pnl = p.get('pnl_pct', 0) * 100
             msg += f"🔹 {p['side']} | PnL: {pnl:+.2f}% | SL: {p.get('sl_price')}\n"
         self.enviar_mensaje(msg)
 
+    def _reportar_pnl(self):
+        foto = self.bus.foto()
+        posiciones = foto.get('positions', [])
+        total = 0.0
+        msg = "💹 **PNL NO REALIZADO**\n"
+        for p in posiciones:
+            usd = float(p.get('qty', 0)) * float(p.get('entry_price', 0)) * p.get('pnl_pct', 0)
+            total += usd
+            msg += f"🔹 {p['side']} {p.get('strategy', '')} | {p.get('pnl_pct', 0) * 100:+.2f}% | ${usd:+,.2f}\n"
+        msg += f"**TOTAL: ${total:+,.2f}**"
+        bal = foto.get('financials', {}).get('balance')
+        if bal: msg += f" ({total / bal * 100:+.2f}% del balance)"
+        self.enviar_mensaje(msg)
+
     def _enviar_ayuda(self):
         msg = (
             "🔰 **COMANDOS V19** 🔰\n\n"
             "/long - Gamma Normal LONG\n"
             "/short - Gamma Normal SHORT\n"
             "/status - Ver PnL y SL\n"
+            "/pnl - PnL no realizado (USD)\n"
             "/balance - Ver Saldo USDT\n"
+            "/latency - Latencias p50/p95/p99\n"
             "/panic - 🚨 CERRAR TODO"
         )
         self.enviar_mensaje(msg)
\ No newline at end of file
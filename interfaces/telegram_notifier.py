@@ -0,0 +1,153 @@
+# =============================================================================
+# UBICACIÓN: interfaces/telegram_notifier.py
+# DESCRIPCIÓN: NOTIFICADOR TELEGRAM V1.0 (COLA ACOTADA + COALESCENCIA + REINTENTOS)
+# =============================================================================
+
+import time
+import queue
+import threading
+from collections import deque
+from config.config import Config
+from connections.transport import obtener_transporte
+
+class TelegramNotifier:
+    """
+    NOTIFICADOR TELEGRAM V1.0:
+    - encolar() es un put_nowait en una cola acotada: el camino de órdenes nunca espera
+      a Telegram (si la cola está llena, el mensaje se descarta y se cuenta).
+    - Un hilo de fondo agrupa las ráfagas (ventana COALESCENCIA, hasta MAX_CARACTERES)
+      en un único sendMessage.
+    - Límites de Telegram: INTERVALO_MIN entre envíos y MAX_POR_MINUTO por chat.
+    - Reintentos con backoff exponencial ante fallos de red / 5xx; en 429 se respeta
+      el retry_after que devuelve la API. Markdown inválido (400) se reenvía como texto plano.
+    """
+    def __init__(self, token, chat_id, config=Config, logger=None, base_url=None):
+        tcfg = config.TelegramConfig
+        self.tcfg = tcfg
+        self.chat_id = chat_id
+        self.log = logger
+        self.url = f"{(base_url or tcfg.BASE_URL).rstrip('/')}/bot{token}/sendMessage"
+        self.cola = queue.Queue(maxsize=tcfg.COLA_MAX)
+        self.enviados = deque(maxlen=tcfg.MAX_POR_MINUTO)   # Instantes de los últimos envíos
+
+        self.transporte = obtener_transporte()
+        self.http = self.transporte.sesion('TELEGRAM')
+        self._activo = False
+        self._hilo = None
+        self._ocupado = threading.Event()
+        self.stats = {'encolados': 0, 'descartados': 0, 'enviados': 0, 'agrupados': 0,
+                      'reintentos': 0, 'fallidos': 0}
+
+    # =========================================================================
+    # PRODUCTORES (NO BLOQUEAN)
+    # =========================================================================
+
+    def encolar(self, texto):
+        try:
+            self.cola.put_nowait(texto)
+            self.stats['encolados'] += 1
+            return True
+        except queue.Full:
+            self.stats['descartados'] += 1
+            return False
+
+    def pendientes(self):
+        return self.cola.qsize()
+
+    # =========================================================================
+    # CICLO DE VIDA
+    # =========================================================================
+
+    def iniciar(self):
+        if self._activo: return
+        self._activo = True
+        self._hilo = threading.Thread(target=self._bucle, name="TelegramNotifier", daemon=True)
+        self._hilo.start()
+
+    def detener(self, timeout=5.0):
+        """Intenta vaciar lo pendiente antes de parar (apagado ordenado)."""
+        limite = time.monotonic() + timeout
+        while (not self.cola.empty() or self._ocupado.is_set()) and time.monotonic() < limite:
+            time.sleep(0.05)
+        self._activo = False
+
+    # =========================================================================
+    # HILO EMISOR
+    # =========================================================================
+
+    def _bucle(self):
+        while self._activo:
+            try: primero = self.cola.get(timeout=0.5)
+            except queue.Empty: continue
+            self._ocupado.set()
+            try:
+                for texto in self._agrupar(primero):
+                    self._esperar_cupo()
+                    self._enviar(texto)
+            finally:
+                self._ocupado.clear()
+
+    def _agrupar(self, primero):
+        """Junta lo que llegue durante la ventana; parte en bloques de MAX_CARACTERES."""
+        partes = [primero]
+        limite = time.monotonic() + self.tcfg.COALESCENCIA
+        while True:
+            restante = limite - time.monotonic()
+            if restante <= 0: break
+            try: partes.append(self.cola.get(timeout=restante))
+            except queue.Empty: break
+
+        bloques, actual = [], ""
+        for p in partes:
+            p = p[:self.tcfg.MAX_CARACTERES]
+            if actual and len(actual) + 2 + len(p) > self.tcfg.MAX_CARACTERES:
+                bloques.append(actual)
+                actual = p
+            else:
+                actual = f"{actual}\n\n{p}" if actual else p
+        if actual: bloques.append(actual)
+        self.stats['agrupados'] += len(partes) - len(bloques)
+        return bloques
+
+    def _esperar_cupo(self):
+        ahora = time.monotonic()
+        espera = 0.0
+        if self.enviados:
+            espera = self.enviados[-1] + self.tcfg.INTERVALO_MIN - ahora
+            if len(self.enviados) == self.enviados.maxlen:
+                espera = max(espera, self.enviados[0] + 60 - ahora)
+        if espera > 0: time.sleep(espera)
+
+    def _enviar(self, texto):
+        data = {"chat_id": self.chat_id, "text": texto, "parse_mode": "Markdown"}
+        backoff = 1.0
+        for intento in range(self.tcfg.REINTENTOS):
+            if intento: self.stats['reintentos'] += 1
+            espera = backoff
+            try:
+                resp = self.http.post(self.url, data=data, timeout=self.transporte.timeout('TELEGRAM'))
+                if resp.status_code == 200:
+                    self.enviados.append(time.monotonic())
+                    self.stats['enviados'] += 1
+                    return True
+                if resp.status_code == 429:
+                    try: espera = float(resp.json().get('parameters', {}).get('retry_after', backoff))
+                    except Exception: pass
+                elif resp.status_code == 400 and 'parse_mode' in data:
+                    # Markdown roto (p. ej. un '_' suelto): mismo texto sin formato
+                    data.pop('parse_mode')
+                    continue
+                elif resp.status_code < 500:
+                    break   # Error del cliente (token/chat inválido): reintentar no sirve
+            except Exception: pass
+            time.sleep(espera)
+            backoff = min(backoff * 2, self.tcfg.BACKOFF_MAX)
+
+        self.stats['fallidos'] += 1
+        if self.log: self.log.registrar_error("TELEGRAM", f"Fallo envío tras reintentos ({len(texto)} caracteres)")
+        return False
+
+    def metricas(self):
+        m = dict(self.stats)
+        m['pendientes'] = self.pendientes()
+        return m
@@ -1,35 +1,65 @@
 # =============================================================================
 # UBICACIÓN: logic/brain.py
-# DESCRIPCIÓN: CEREBRO TRÍADA V18 (GAMMA V4.6 + LEGACY SUPPORT)
+# DESCRIPCIÓN: CEREBRO TRÍADA V18.2 (GAMMA V4.6 + LEGACY SUPPORT + EVENTOS DE VELA + REGISTRO DE ESTRATEGIAS)
 # =============================================================================
 
 from config.config import Config
 from tools.StructureScanner_2 import StructureScanner
+from logic.candle_events import CandleEvents
+from logic.strategies import crear, distancia_fibo
 import pandas as pd
 import pandas_ta as ta
 import numpy as np
 
 class Brain:
     """
-    CEREBRO TRÍADA V18:
+    CEREBRO TRÍADA V18.2:
     - Gamma V4.6 (Lógica Activa Principal).
     - Swing V3 (Lógica Preservada).
     - Shadow V2 (Lógica Preservada).
+    - Las estrategias son plugins de logic/strategies.py: Brain solo arma el estado de la
+      vela (fila + contexto Fibo) y llama a on_bar(); el mismo código tiene versión
+      vectorizada (senales) para backtests.
+    - En vivo (analizar_eventos): cada estrategia se suscribe a su TIMEFRAME / EVENTO.
+      Gamma al cierre de 15m, Swing al cierre de 1h (minuto 0), Shadow a cada cambio
+      intrabar de la 15m en formación (toques de Bollinger).
+    - Los scanners estructurales se reconstruyen solo si su timeframe cambió desde la
+      última evaluación que los necesitó.
+    - analizar_mercado evalúa todo sobre la última fila (backtests / system_check).
     """
-    def __init__(self, config):
+    FRECUENCIAS = {'15m': '15min', '1h': '1h', '4h': '4h'}
+
+    def __init__(self, config, estrategias=None):
         self.cfg = config
         # Cache para scanners (evita recalcular todo cada ciclo)
         self.scanners = {
             '1h': None,
             '4h': None
         }
+        self._firmas_scanner = {}
+        self.estrategias = estrategias or crear(config)
+        self.eventos = CandleEvents()
+        for est in self.estrategias:
+            self.eventos.suscribir(est.TIMEFRAME, est.EVENTO, self._suscriptor(est))
+
+    def analizar_eventos(self, data_map, marcas=None):
+        """
+        Modo en vivo: solo evalúa las estrategias cuyo evento de vela ocurrió desde la
+        llamada anterior. 'marcas' permite continuar el estado desde otro proceso.
+        """
+        if not all(k in data_map for k in ['15m', '1h', '4h']):
+            return []
+        if any(data_map[k].empty for k in ['15m', '1h', '4h']):
+            return []
+        self.eventos.cargar_marcas(marcas)
+        return self.eventos.publicar(data_map)
 
     def analizar_mercado(self, data_map):
         """
         Analiza el mercado buscando señales en todas las estrategias activas.
         """
         signals = []
-        
+
         # 1. Validar datos mínimos requeridos
         if not all(k in data_map for k in ['15m', '1h', '4h']):
             return []
@@ -37,156 +67,66 @@ class Brain:
         df_15m = data_map['15m']
         df_1h = data_map['1h']
         df_4h = data_map['4h']
-        
+
         # Validar que no estén vacíos
         if df_15m.empty or df_1h.empty or df_4h.empty:
             return []
 
-        # 2. Actualizar Scanners Contextuales (1H y 4H)
-        # Usamos StructureScanner_2 para obtener la data estructural
-        self.scanners['1h'] = StructureScanner(df_1h)
-        self.scanners['1h'].precompute()
-        
-        self.scanners['4h'] = StructureScanner(df_4h)
-        self.scanners['4h'].precompute()
-
-        # 3. Datos de la vela actual (15m)
-        row_15m = df_15m.iloc[-1]
-        
-        # --- TIMESTAMP SAFEGUARD ---
-        raw_ts = row_15m.get('timestamp')
-        if raw_ts is None: raw_ts = row_15m.name 
+        # 2. Datos de la vela actual (15m)
+        timestamp = self._timestamp(df_15m.iloc[-1])
 
-        try:
-            if isinstance(raw_ts, (int, float, np.integer, np.floating)):
-                timestamp = pd.to_datetime(raw_ts, unit='ms')
-            else:
-                timestamp = pd.to_datetime(raw_ts)
-        except Exception:
-            timestamp = pd.Timestamp.now()
+        # 3. Estrategias (Swing solo al inicio de hora: su vela 1H recién abre)
+        for est in self.estrategias:
+            freq = self.FRECUENCIAS.get(est.TIMEFRAME)
+            if est.TIMEFRAME != '15m' and freq and timestamp != timestamp.floor(freq): continue
+            sig = self._evaluar(est, data_map[est.TIMEFRAME].iloc[-1], data_map, timestamp)
+            if sig: signals.append(sig)
 
-        # -------------------------------------
-        # ESTRATEGIAS
-        # -------------------------------------
+        return signals
 
-        # 1. SWING V3 (Inicio de hora - Estructural)
-        if timestamp.minute == 0: 
-            sig_swing = self._check_swing(df_1h, self.scanners['4h'], df_4h, timestamp)
-            if sig_swing: signals.append(sig_swing)
+    # =========================================================================
+    # SUSCRIPCIONES (EVENTOS DE VELA)
+    # =========================================================================
 
-        # 2. GAMMA V4.6 (Scalping 15m - Lógica Nueva)
-        sig_gamma = self._check_gamma_v4_6(row_15m, self.scanners['1h'], df_1h, timestamp)
-        if sig_gamma: signals.append(sig_gamma)
+    def _suscriptor(self, est):
+        def evaluar(evento, data_map):
+            row = data_map[est.TIMEFRAME].iloc[evento['idx']]
+            return self._evaluar(est, row, data_map, self._timestamp(row))
+        return evaluar
 
-        # 3. SHADOW V2 (Reversión - Bandas Bollinger)
-        sig_shadow = self._check_shadow(row_15m, timestamp)
-        if sig_shadow: signals.append(sig_shadow)
+    def _evaluar(self, est, row, data_map, ts):
+        estado = dict(row)
+        for columna, tf in est.CONTEXTO.items():
+            estado[columna] = self._get_dist(ts, self._scanner(tf, data_map[tf]), data_map[tf])
+        codigo = est.on_bar(estado)
+        return est.senal(codigo, row, ts) if codigo else None
 
-        return signals
+    def _scanner(self, tf, df):
+        # Usamos StructureScanner_2 para obtener la data estructural
+        firma = (len(df), df.index[-1], float(df['close'].iat[-1]))
+        if self.scanners.get(tf) is None or self._firmas_scanner.get(tf) != firma:
+            self.scanners[tf] = StructureScanner(df)
+            self.scanners[tf].precompute()
+            self._firmas_scanner[tf] = firma
+        return self.scanners[tf]
 
     # =========================================================================
-    # MOTORES LÓGICOS
+    # UTILIDADES
     # =========================================================================
 
+    @staticmethod
+    def _timestamp(row):
+        # --- TIMESTAMP SAFEGUARD ---
+        raw_ts = row.get('timestamp')
+        if raw_ts is None: raw_ts = row.name
+
+        try:
+            if isinstance(raw_ts, (int, float, np.integer, np.floating)):
+                return pd.to_datetime(raw_ts, unit='ms')
+            return pd.to_datetime(raw_ts)
+        except Exception:
+            return pd.Timestamp.now()
+
     def _get_dist(self, ts, scanner, df_context):
         """Calcula distancia al nivel Fibo más cercano (StructureScanner_2)."""
-        try:
-            idx = len(df_context) - 1
-            ctx = scanner.get_fibonacci_context(idx)
-            
-            if not ctx or 'fibs' not in ctx: 
-                return 999
-            
-            price = df_context.iloc[idx]['close']
-            if price == 0: return 999
-            
-            return min([abs(price - l)/price for l in ctx['fibs'].values()])
-        except:
-            return 999
-
-    def _check_gamma_v4_6(self, row, scanner_1h, df_1h, ts):
-        """
-        LÓGICA GAMMA V4.6 (Strict S/L 2% + 3-Stage Exit)
-        """
-        # 1. Distancia Estructural
-        dist_1h = self._get_dist(ts, scanner_1h, df_1h)
-        
-        # 2. Indicadores 15m (Calculados en Calculator V18)
-        macd = row.get('macd_hist', 0) 
-        rsi = row.get('rsi', 50)
-        
-        signal = None
-        mode = None
-        cfg = self.cfg.GammaConfig
-        
-        # --- TRIGGERS ---
-        
-        # A) GAMMA NORMAL LONG
-        if rsi < 30 and dist_1h < cfg.FILTRO_DIST_FIBO_MAX:
-            signal = 'LONG'; mode = 'GAMMA_NORMAL'
-            
-        # B) GAMMA NORMAL SHORT
-        elif rsi > 70 and dist_1h < cfg.FILTRO_DIST_FIBO_MAX:
-            signal = 'SHORT'; mode = 'GAMMA_NORMAL'
-            
-        # C) GAMMA HEDGE SHORT (Sniper Logic)
-        elif rsi < 25 and dist_1h > cfg.HEDGE_DIST_FIBO_MIN and macd < cfg.HEDGE_MACD_MAX:
-            signal = 'SHORT'; mode = 'GAMMA_HEDGE'
-            
-        if signal:
-            return {
-                'strategy': 'GAMMA',
-                'signal': signal,
-                'mode': mode,
-                'price': row['close'],
-                'timestamp': ts,
-                'confidence': 1.0
-            }
-        return None
-
-    def _check_swing(self, df_1h, scanner_4h, df_4h, ts):
-        """Lógica SwingHunter Alpha V3 (Preservada)."""
-        row_1h = df_1h.iloc[-1]
-        dist_4h = self._get_dist(ts, scanner_4h, df_4h)
-        cfg = self.cfg.SwingConfig
-        
-        if row_1h['rsi'] < 35 and dist_4h < cfg.FILTRO_DIST_FIBO_MACRO:
-            return {
-                'strategy': 'SWING',
-                'signal': 'LONG',
-                'mode': 'SWING_NORMAL',
-                'price': row_1h['close'],
-                'timestamp': ts,
-                'confidence': 1.0
-            }
-        return None
-
-    def _check_shadow(self, row, ts):
-        """Lógica ShadowHunter V2 (Preservada)."""
-        price = row['close']
-        atr = row.get('atr', 0)
-        upper = row.get('bb_upper', 999999)
-        lower = row.get('bb_lower', 0)
-        
-        if row['high'] >= upper:
-            return {
-                'strategy': 'SHADOW',
-                'signal': 'SHORT',
-                'mode': 'SHADOW_GRID',
-                'price': price,
-                'timestamp': ts,
-                'atr': atr, 
-                'confidence': 0.9 
-            }
-            
-        if row['low'] <= lower:
-            return {
-                'strategy': 'SHADOW',
-                'signal': 'LONG',
-                'mode': 'SHADOW_GRID',
-                'price': price,
-                'timestamp': ts,
-                'atr': atr,
-                'confidence': 0.9
-            }
-        return None
\ No newline at end of file
+        return distancia_fibo(scanner, df_context, len(df_context) - 1)
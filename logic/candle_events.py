@@ -0,0 +1,83 @@
+# =============================================================================
+# UBICACIÓN: logic/candle_events.py
+# DESCRIPCIÓN: EVENTOS DE VELA V1.0 (CIERRE / INTRABAR POR TIMEFRAME + SUSCRIPCIONES)
+# =============================================================================
+
+class CandleEvents:
+    """
+    EVENTOS DE VELA V1.0:
+    - detectar(data_map) compara la última fila de cada timeframe suscrito con la vista
+      en la llamada anterior (O(1) por timeframe, sin recalcular nada):
+      * CIERRE: apareció una fila nueva -> la vela previa (idx -2) quedó cerrada.
+      * INTRABAR: la vela en formación (idx -1) cambió de high / low / close.
+    - La primera vez que se ve un timeframe solo se toma la marca (un arranque no
+      re-dispara el cierre de una vela ya evaluada antes del reinicio).
+    - Si se saltan varias velas (sync atrasado) solo se evalúa la última cerrada.
+    - publicar(data_map) ejecuta los suscriptores fn(evento, data_map) y junta las señales.
+    - Las marcas son exportables: en cartera el análisis corre en procesos hijos y el
+      padre conserva la marca de cada símbolo entre ciclos.
+    """
+    CIERRE = 'CIERRE'
+    INTRABAR = 'INTRABAR'
+
+    def __init__(self):
+        self.suscriptores = {}   # (tf, tipo) -> [fn]
+        self.marcas = {}         # tf -> (ts_ultima_fila, firma_intrabar)
+        self.stats = {'cierres': 0, 'intrabar': 0, 'saltadas': 0, 'evaluaciones': 0}
+
+    def suscribir(self, tf, tipo, fn):
+        self.suscriptores.setdefault((tf, tipo), []).append(fn)
+
+    def timeframes(self):
+        return {tf for tf, _ in self.suscriptores}
+
+    # =========================================================================
+    # MARCAS
+    # =========================================================================
+
+    def exportar_marcas(self):
+        return dict(self.marcas)
+
+    def cargar_marcas(self, marcas):
+        if marcas: self.marcas.update(marcas)
+
+    @staticmethod
+    def _ts_fila(df, idx):
+        if 'timestamp' in df.columns: return int(df['timestamp'].iat[idx])
+        return df.index[idx]
+
+    # =========================================================================
+    # DETECCIÓN Y DESPACHO
+    # =========================================================================
+
+    def detectar(self, data_map):
+        eventos = []
+        for tf in self.timeframes():
+            df = data_map.get(tf)
+            if df is None or len(df) < 2: continue
+            ts = self._ts_fila(df, -1)
+            fila = df.iloc[-1]
+            firma = (float(fila['high']), float(fila['low']), float(fila['close']))
+
+            previo = self.marcas.get(tf)
+            self.marcas[tf] = (ts, firma)
+
+            if previo is not None and ts != previo[0]:
+                if len(df) > 2 and self._ts_fila(df, -2) != previo[0]:
+                    self.stats['saltadas'] += 1
+                eventos.append({'tf': tf, 'tipo': self.CIERRE, 'ts': self._ts_fila(df, -2), 'idx': -2})
+                self.stats['cierres'] += 1
+            if previo is None or ts != previo[0] or firma != previo[1]:
+                eventos.append({'tf': tf, 'tipo': self.INTRABAR, 'ts': ts, 'idx': -1})
+                self.stats['intrabar'] += 1
+        return eventos
+
+    def publicar(self, data_map):
+        """Detecta y despacha. Retorna la lista de señales de todos los suscriptores."""
+        signals = []
+        for evento in self.detectar(data_map):
+            for fn in self.suscriptores.get((evento['tf'], evento['tipo']), ()):
+                self.stats['evaluaciones'] += 1
+                res = fn(evento, data_map)
+                if res: signals.append(res)
+        return signals
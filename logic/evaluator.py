@@ -1,136 +1,236 @@
 # =============================================================================
 # UBICACIÓN: logic/evaluator.py
-# DESCRIPCIÓN: BLACKBOX EVALUATOR V1.0 (DATA COLLECTOR)
+# DESCRIPCIÓN: BLACKBOX EVALUATOR V2.0 (EVENTOS APPEND-ONLY + ÍNDICE POR TRADE)
 # =============================================================================
 
 import os
 import csv
-import pandas as pd
+import io
+import threading
 from datetime import datetime
+from config.config import Config
+from logic.feature_capture import FeatureCapture
+from data.indicator_state import IndicatorState
 
 class Evaluator:
     """
-    BLACKBOX V1.0:
+    BLACKBOX V2.0:
     Registra el contexto técnico (Indicadores, Tendencia) al momento de la entrada
     y posteriormente registra el resultado (PnL) al cierre.
     Objetivo: Crear un Dataset para análisis estadístico y futuro Machine Learning.
+    - Entradas y salidas son eventos separados en logs append-only:
+      registrar una salida es un único append, sin importar el tamaño del histórico.
+    - Índice TRADE_ID -> offset de la entrada (consulta O(1) y descarte de salidas
+      huérfanas o repetidas).
+    - materializar_dataset() une ambos logs en streaming y genera el CSV plano
+      (mismo esquema que V1) bajo demanda.
+    - El vector ancho de features (FeatureCapture) va a un .bin tipado aparte,
+      enlazado por TRADE_ID.
     """
-    def __init__(self, logger=None):
+    HEADERS_ENTRADA = [
+        'TRADE_ID', 'TIMESTAMP', 'STRATEGY', 'SIDE', 'ENTRY_PRICE',
+        # --- FACTORES TÉCNICOS (FEATURES) ---
+        'RSI_15M', 'ADX_15M', 'MACD_HIST_15M', 'ATR_15M',
+        'RSI_1H', 'ADX_1H', 'TREND_1H_EMA',
+        'PERF_50_CANDLES_PCT', # Rendimiento de las últimas 50 velas
+        'VOLATILITY_PCT'       # Volatilidad relativa
+    ]
+    HEADERS_SALIDA = ['TRADE_ID', 'EXIT_TIMESTAMP', 'CLOSE_PRICE', 'FINAL_PNL_PCT', 'RESULT', 'EXIT_REASON']
+    # --- RESULTADO (TARGETS) ---
+    HEADERS_TARGET = ['CLOSE_PRICE', 'FINAL_PNL_PCT', 'RESULT', 'EXIT_REASON']
+
+    def __init__(self, logger=None, base_dir=None):
         self.log = logger
-        self.filepath = "logs/blackbox_dataset.csv"
+        base_dir = base_dir or Config.DIR_LOGS
+        self.filepath = os.path.join(base_dir, "blackbox_dataset.csv")   # Dataset materializado
+        self.path_entradas = os.path.join(base_dir, "blackbox_entradas.csv")
+        self.path_salidas = os.path.join(base_dir, "blackbox_salidas.csv")
+        self._lock = threading.Lock()
+        self.indice = {}      # TRADE_ID -> offset (bytes) de la fila de entrada
+        self.cerrados = set() # TRADE_ID con salida registrada
+        self.features = FeatureCapture(base_dir)
         self._inicializar_csv()
 
+    # =========================================================================
+    # INICIALIZACIÓN / ÍNDICE
+    # =========================================================================
+
     def _inicializar_csv(self):
-        """Crea el archivo con cabeceras si no existe."""
-        if not os.path.exists(self.filepath):
-            headers = [
-                'TRADE_ID', 'TIMESTAMP', 'STRATEGY', 'SIDE', 'ENTRY_PRICE',
-                # --- FACTORES TÉCNICOS (FEATURES) ---
-                'RSI_15M', 'ADX_15M', 'MACD_HIST_15M', 'ATR_15M',
-                'RSI_1H', 'ADX_1H', 'TREND_1H_EMA',
-                'PERF_50_CANDLES_PCT', # Rendimiento de las últimas 50 velas
-                'VOLATILITY_PCT',      # Volatilidad relativa
-                # --- RESULTADO (TARGETS) ---
-                'CLOSE_PRICE', 'FINAL_PNL_PCT', 'RESULT', 'EXIT_REASON'
-            ]
-            try:
-                with open(self.filepath, 'w', newline='') as f:
-                    writer = csv.writer(f)
-                    writer.writerow(headers)
-            except Exception as e:
-                if self.log: self.log.registrar_error("EVAL", f"Fallo init CSV: {e}")
-
-    def registrar_entrada(self, plan, data_map):
+        """Crea los logs con cabeceras si no existen, migra el dataset V1 y carga el índice."""
+        try:
+            if not os.path.exists(self.path_entradas) and os.path.exists(self.filepath):
+                self._migrar_v1()
+            for path, headers in ((self.path_entradas, self.HEADERS_ENTRADA),
+                                  (self.path_salidas, self.HEADERS_SALIDA)):
+                if not os.path.exists(path):
+                    with open(path, 'wb') as f: f.write(self._fila(headers))
+            self._cargar_indice()
+        except Exception as e:
+            if self.log: self.log.registrar_error("EVAL", f"Fallo init CSV: {e}")
+
+    def _cargar_indice(self):
+        """Una pasada de arranque leyendo solo el primer campo de cada línea."""
+        with open(self.path_entradas, 'rb') as f:
+            f.readline()
+            offset = f.tell()
+            for linea in iter(f.readline, b''):
+                self.indice[linea.split(b',', 1)[0].decode().strip('"')] = offset
+                offset += len(linea)
+        with open(self.path_salidas, 'rb') as f:
+            f.readline()
+            for linea in f:
+                self.cerrados.add(linea.split(b',', 1)[0].decode().strip('"'))
+
+    def _migrar_v1(self):
+        """Parte el CSV V1 (una fila mutable por trade) en los dos logs de eventos."""
+        n = len(self.HEADERS_ENTRADA)
+        with open(self.filepath, newline='') as src, \
+             open(self.path_entradas, 'wb') as fe, open(self.path_salidas, 'wb') as fs:
+            lector = csv.reader(src)
+            next(lector, None)
+            fe.write(self._fila(self.HEADERS_ENTRADA))
+            fs.write(self._fila(self.HEADERS_SALIDA))
+            for row in lector:
+                if len(row) < n: continue
+                fe.write(self._fila(row[:n]))
+                target = row[n:n + 4]
+                if len(target) == 4 and target[2] not in ('PENDING', ''):
+                    fs.write(self._fila([row[0], ''] + target))
+        if self.log: self.log.registrar_actividad("EVAL", "🗂️ Blackbox V1 migrado a logs de eventos.")
+
+    @staticmethod
+    def _fila(valores):
+        buf = io.StringIO()
+        csv.writer(buf).writerow(valores)
+        return buf.getvalue().encode()
+
+    def _anexar(self, path, valores):
+        """Append atómico por línea. Retorna el offset donde quedó la fila."""
+        datos = self._fila(valores)
+        with self._lock:
+            with open(path, 'ab') as f:
+                offset = f.tell()
+                f.write(datos)
+        return offset
+
+    # =========================================================================
+    # EVENTOS
+    # =========================================================================
+
+    def registrar_entrada(self, plan, data_map, estado=None):
         """
         Toma una 'FOTO' del mercado justo antes de entrar.
+        estado: IndicatorState del ciclo (si no se pasa, se construye desde data_map).
         """
         try:
-            # Extraemos datos
-            df_15 = data_map.get('15m')
-            df_1h = data_map.get('1h')
-            
-            if df_15 is None or df_15.empty: return
-            if df_1h is None or df_1h.empty: return
-
-            # Última vela cerrada (Contexto inmediato)
-            row15 = df_15.iloc[-1]
-            row1h = df_1h.iloc[-1]
-            
+            # Un solo paso DataFrame -> arrays por timeframe; los campos salen del estado
+            if estado is None: estado = IndicatorState.desde_data_map(data_map)
+            if '15m' not in estado or '1h' not in estado: return
+
+            def v(tf, col):
+                x = estado.ultimo(tf, col, 0.0)
+                return 0.0 if x != x else float(x)
+
             # Cálculo de Tendencia (50 velas atrás)
             # Si hay suficientes datos, comparamos precio actual vs hace 50 velas
+            close15 = estado.serie('15m', 'close')
             perf_50 = 0.0
-            if len(df_15) > 50:
-                past_close = df_15.iloc[-50]['close']
-                curr_close = row15['close']
-                perf_50 = (curr_close - past_close) / past_close
+            if close15 is not None and len(close15) > 50:
+                past_close = close15[-50]
+                perf_50 = (close15[-1] - past_close) / past_close
 
             # Volatilidad relativa (ATR / Precio)
             volatility = 0.0
-            if row15['close'] > 0:
-                volatility = row15.get('atr', 0) / row15['close']
+            if v('15m', 'close') > 0:
+                volatility = v('15m', 'atr') / v('15m', 'close')
 
             # Construcción de la fila
+            trade_id = plan['id']
             new_row = [
-                plan['id'],                 # TRADE_ID
+                trade_id,                   # TRADE_ID
                 datetime.now().isoformat(), # TIMESTAMP
                 plan['strategy'],           # STRATEGY
                 plan['side'],               # SIDE
                 plan['entry_price'],        # ENTRY_PRICE
                 # Indicadores 15m
-                round(row15.get('rsi', 0), 2),
-                round(row15.get('adx', 0), 2),
-                round(row15.get('macd_hist', 0), 4),
-                round(row15.get('atr', 0), 4),
+                round(v('15m', 'rsi'), 2),
+                round(v('15m', 'adx'), 2),
+                round(v('15m', 'macd_hist'), 4),
+                round(v('15m', 'atr'), 4),
                 # Indicadores 1H
-                round(row1h.get('rsi', 0), 2),
-                round(row1h.get('adx', 0), 2),
-                "UP" if row1h.get('ema_fast', 0) > row1h.get('ema_slow', 0) else "DOWN",
+                round(v('1h', 'rsi'), 2),
+                round(v('1h', 'adx'), 2),
+                "UP" if v('1h', 'ema_fast') > v('1h', 'ema_slow') else "DOWN",
                 # Contexto
                 round(perf_50 * 100, 2),    # % Rendimiento previo
-                round(volatility * 100, 2), # % Volatilidad
-                # Placeholders de salida
-                0, 0, "PENDING", "OPEN"
+                round(volatility * 100, 2)  # % Volatilidad
             ]
-            
-            with open(self.filepath, 'a', newline='') as f:
-                writer = csv.writer(f)
-                writer.writerow(new_row)
-                
-            if self.log: self.log.registrar_actividad("EVAL", f"📸 Snapshot guardado ID: {plan['id']}")
+
+            self.indice[trade_id] = self._anexar(self.path_entradas, new_row)
+            self.features.capturar(trade_id, estado)
+
+            if self.log: self.log.registrar_actividad("EVAL", f"📸 Snapshot guardado ID: {trade_id}")
 
         except Exception as e:
             if self.log: self.log.registrar_error("EVAL", f"Error registrando entrada: {e}")
 
     def registrar_salida(self, trade_id, close_price, pnl_pct, reason):
         """
-        Busca la línea del trade_id y completa los datos de salida.
-        (Nota: Esta versión usa Pandas para editar el CSV fácilmente, 
-         si el archivo es gigante a futuro se puede optimizar).
+        Agrega el evento de salida del trade_id (un solo append, O(1)).
         """
         try:
-            if not os.path.exists(self.filepath): return
-
-            # Leemos todo el CSV
-            df = pd.read_csv(self.filepath)
-            
-            # Buscamos el índice
-            idx = df.index[df['TRADE_ID'] == trade_id].tolist()
-            
-            if not idx: return # No encontrado (quizás operación manual o muy vieja)
-            
-            i = idx[0]
-            
-            # Actualizamos datos
-            df.at[i, 'CLOSE_PRICE'] = close_price
-            df.at[i, 'FINAL_PNL_PCT'] = round(pnl_pct * 100, 2)
-            df.at[i, 'RESULT'] = "WIN" if pnl_final_pct > 0 else "LOSS"
-            df.at[i, 'EXIT_REASON'] = reason
-            
-            # Guardamos
-            df.to_csv(self.filepath, index=False)
-            
-            if self.log: self.log.registrar_actividad("EVAL", f"📝 Resultado actualizado ID: {trade_id} ({df.at[i, 'RESULT']})")
+            # No encontrado (quizás operación manual o muy vieja) o ya cerrado
+            if trade_id not in self.indice or trade_id in self.cerrados: return
+
+            pnl_final_pct = round(pnl_pct * 100, 2)
+            resultado = "WIN" if pnl_final_pct > 0 else "LOSS"
+            self._anexar(self.path_salidas, [trade_id, datetime.now().isoformat(),
+                                             close_price, pnl_final_pct, resultado, reason])
+            self.cerrados.add(trade_id)
+
+            if self.log: self.log.registrar_actividad("EVAL", f"📝 Resultado actualizado ID: {trade_id} ({resultado})")
 
         except Exception as e:
             # Fallo silencioso para no interrumpir operativa crítica
-            pass
\ No newline at end of file
+            pass
+
+    # =========================================================================
+    # CONSULTA / MATERIALIZACIÓN
+    # =========================================================================
+
+    def obtener_entrada(self, trade_id):
+        """Fila de entrada del trade vía índice (seek directo). None si no existe."""
+        offset = self.indice.get(trade_id)
+        if offset is None: return None
+        with open(self.path_entradas, 'rb') as f:
+            f.seek(offset)
+            valores = next(csv.reader([f.readline().decode()]))
+        return dict(zip(self.HEADERS_ENTRADA, valores))
+
+    def materializar_dataset(self, destino=None):
+        """
+        Une entradas + salidas en el CSV plano ML-ready (esquema V1, trades abiertos
+        como PENDING). Streaming sobre las entradas; solo las salidas van a memoria.
+        Retorna el número de filas escritas.
+        """
+        destino = destino or self.filepath
+        salidas = {}
+        with open(self.path_salidas, newline='') as f:
+            lector = csv.reader(f)
+            next(lector, None)
+            for row in lector:
+                if row: salidas[row[0]] = row[2:6]
+
+        tmp = destino + ".tmp"
+        filas = 0
+        with open(self.path_entradas, newline='') as src, open(tmp, 'w', newline='') as out:
+            lector, escritor = csv.reader(src), csv.writer(out)
+            next(lector, None)
+            escritor.writerow(self.HEADERS_ENTRADA + self.HEADERS_TARGET)
+            for row in lector:
+                if not row: continue
+                escritor.writerow(row + salidas.get(row[0], [0, 0, "PENDING", "OPEN"]))
+                filas += 1
+        os.replace(tmp, destino)
+        if self.log: self.log.registrar_actividad("EVAL", f"📊 Dataset materializado: {filas} trades -> {destino}")
+        return filas
@@ -0,0 +1,184 @@
+# =============================================================================
+# UBICACIÓN: logic/feature_capture.py
+# DESCRIPCIÓN: CAPTURA DE FEATURES V1.0 (VECTOR ANCHO + ARCHIVO BINARIO TIPADO)
+# =============================================================================
+
+import os
+import json
+import time
+import threading
+import numpy as np
+from config.config import Config
+from data.indicator_state import IndicatorState
+
+class FeatureCapture:
+    """
+    CAPTURA DE FEATURES V1.0:
+    - Vector de features de entrada configurable (FeatureConfig): todas las columnas
+      del PrecisionLab por timeframe, distancia a EMAs, distancia fibo (EMA200),
+      proximidad de FVG y ventanas de retorno / volatilidad.
+    - El esquema se compila una vez: índices de columna por timeframe. Cada captura
+      es un gather numpy por timeframe sobre IndicatorState, sin pandas por campo.
+    - Registros de ancho fijo (trade_id, ts, float32[n]) en un .bin append-only,
+      descrito por un .schema.json. Si cambia el conjunto de features se abre
+      una nueva versión del archivo; las anteriores quedan intactas.
+    """
+    def __init__(self, base_dir=None, config=Config):
+        self.cfg = config.FeatureConfig
+        self.base_dir = base_dir or config.DIR_LOGS
+        self.path_bin = os.path.join(self.base_dir, "blackbox_features.bin")
+        self.path_schema = os.path.join(self.base_dir, "blackbox_features.schema.json")
+        self._lock = threading.Lock()
+        self.plan = None      # Esquema compilado: [(tf, nombres, índices, extras)]
+        self.nombres = None
+        self.dtype = None
+
+    # =========================================================================
+    # ESQUEMA
+    # =========================================================================
+
+    def _compilar(self, estado):
+        """Fija la lista de features a partir de las columnas disponibles en el estado."""
+        plan, nombres = [], []
+        for tf in self.cfg.TIMEFRAMES:
+            disponibles = estado.nombres(tf)
+            cols = [c for c in (self.cfg.COLUMNAS or disponibles) if c != 'timestamp']
+            emas = [c for c in cols if c.startswith('ema_')]
+            plan.append((tf, cols, emas))
+            nombres += [f"{tf}_{c}" for c in cols]
+            nombres += [f"{tf}_dist_{c}" for c in emas]
+            nombres += [f"{tf}_fibo_dist"]
+            nombres += [f"{tf}_ret_{w}" for w in self.cfg.VENTANAS_RETORNO]
+            nombres += [f"{tf}_vol_{w}" for w in self.cfg.VENTANAS_VOLATILIDAD]
+            nombres += [f"{tf}_fvg_bull_dist", f"{tf}_fvg_bear_dist", f"{tf}_fvg_bull_n", f"{tf}_fvg_bear_n"]
+        return plan, nombres
+
+    def _preparar(self, estado):
+        plan, nombres = self._compilar(estado)
+        if self.nombres == nombres: return
+        self.plan, self.nombres = plan, nombres
+        self.dtype = np.dtype([('trade_id', 'S16'), ('ts', '<i8'), ('features', '<f4', (len(nombres),))])
+
+        version = 1
+        if os.path.exists(self.path_schema):
+            try:
+                with open(self.path_schema) as f: previo = json.load(f)
+                if previo.get('columnas') == nombres: return
+                # Conjunto de features distinto: archivar la versión anterior
+                version = previo.get('version', 1) + 1
+                base = os.path.join(self.base_dir, f"blackbox_features_v{previo.get('version', 1)}")
+                if os.path.exists(self.path_bin): os.replace(self.path_bin, base + ".bin")
+                os.replace(self.path_schema, base + ".schema.json")
+            except Exception: pass
+
+        schema = {'version': version, 'registro': 'trade_id:S16, ts:<i8, features:<f4[n]',
+                  'n_features': len(nombres), 'columnas': nombres}
+        tmp = self.path_schema + ".tmp"
+        with open(tmp, 'w') as f: json.dump(schema, f, indent=1)
+        os.replace(tmp, self.path_schema)
+
+    # =========================================================================
+    # CAPTURA
+    # =========================================================================
+
+    def capturar(self, trade_id, estado):
+        """Calcula el vector y lo agrega al .bin (un solo write). Retorna el vector."""
+        if not isinstance(estado, IndicatorState): estado = IndicatorState.desde_data_map(estado)
+        with self._lock:
+            self._preparar(estado)
+            vector = self._vector(estado)
+            rec = np.zeros(1, dtype=self.dtype)
+            rec['trade_id'] = str(trade_id)[:16].encode()
+            rec['ts'] = int(time.time() * 1000)
+            rec['features'] = vector
+            with open(self.path_bin, 'ab') as f: f.write(rec.tobytes())
+        return vector
+
+    def _vector(self, estado):
+        partes = []
+        nan = np.nan
+        for tf, cols, emas in self.plan:
+            mat = estado.matrices.get(tf)
+            idx_tf = estado.columnas.get(tf, {})
+            n_extra = len(emas) + 1 + len(self.cfg.VENTANAS_RETORNO) + len(self.cfg.VENTANAS_VOLATILIDAD) + 4
+            if mat is None or not len(mat):
+                partes.append(np.full(len(cols) + n_extra, nan))
+                continue
+
+            # 1. Últimos valores: un gather por timeframe
+            idx = np.array([idx_tf.get(c, -1) for c in cols], dtype=np.int64)
+            ultimos = np.where(idx >= 0, mat[-1, np.maximum(idx, 0)], nan) if len(idx) else np.empty(0)
+            partes.append(ultimos)
+
+            close = estado.serie(tf, 'close')
+            precio = close[-1] if close is not None else nan
+
+            # 2. Distancia relativa a cada EMA y fibo (EMA200 como proxy macro, igual que PrecisionLab)
+            v_emas = np.array([estado.ultimo(tf, c) for c in emas], dtype=np.float64)
+            with np.errstate(divide='ignore', invalid='ignore'):
+                partes.append(precio / v_emas - 1.0)
+                ema200 = estado.ultimo(tf, 'ema_200')
+                partes.append(np.array([(precio - ema200) / ema200 if ema200 else nan]))
+
+            # 3. Retornos y volatilidad por ventanas
+            partes.append(self._retornos(close))
+            partes.append(self._volatilidades(close))
+
+            # 4. Proximidad de FVG
+            partes.append(self._fvg(estado.serie(tf, 'high'), estado.serie(tf, 'low'), precio))
+        return np.concatenate(partes).astype(np.float32)
+
+    def _retornos(self, close):
+        res = np.full(len(self.cfg.VENTANAS_RETORNO), np.nan)
+        if close is None: return res
+        for i, w in enumerate(self.cfg.VENTANAS_RETORNO):
+            if len(close) > w and close[-1 - w]: res[i] = close[-1] / close[-1 - w] - 1.0
+        return res
+
+    def _volatilidades(self, close):
+        res = np.full(len(self.cfg.VENTANAS_VOLATILIDAD), np.nan)
+        if close is None or len(close) < 3: return res
+        with np.errstate(divide='ignore', invalid='ignore'):
+            log_ret = np.diff(np.log(close))
+        for i, w in enumerate(self.cfg.VENTANAS_VOLATILIDAD):
+            if len(log_ret) >= w: res[i] = log_ret[-w:].std()
+        return res
+
+    def _fvg(self, high, low, precio):
+        """Distancia % al FVG alcista/bajista más cercano sin mitigar y cuántos hay en la ventana."""
+        res = np.array([np.nan, np.nan, 0.0, 0.0])
+        if high is None or low is None or not precio or len(high) < 3: return res
+        h, l = high[-self.cfg.FVG_LOOKBACK:], low[-self.cfg.FVG_LOOKBACK:]
+        # Misma definición que FVGScanner: vela i vs vela i-2
+        techo_bull, piso_bull = l[2:], h[:-2]
+        techo_bear, piso_bear = l[:-2], h[2:]
+        bull = techo_bull > piso_bull
+        bear = piso_bear < techo_bear
+        # Sin mitigar: el precio actual no cerró el hueco
+        bull &= precio > piso_bull
+        bear &= precio < techo_bear
+        res[2], res[3] = bull.sum(), bear.sum()
+        # Negativo = el precio está dentro del hueco
+        if bull.any():
+            d = (precio - techo_bull[bull]) / precio
+            res[0] = d[np.argmin(np.abs(d))]
+        if bear.any():
+            d = (piso_bear[bear] - precio) / precio
+            res[1] = d[np.argmin(np.abs(d))]
+        return res
+
+    # =========================================================================
+    # LECTURA
+    # =========================================================================
+
+    def cargar(self):
+        """Dataset de features de la versión vigente como DataFrame (trade_id + columnas)."""
+        import pandas as pd
+        if not os.path.exists(self.path_schema) or not os.path.exists(self.path_bin): return pd.DataFrame()
+        with open(self.path_schema) as f: schema = json.load(f)
+        dtype = np.dtype([('trade_id', 'S16'), ('ts', '<i8'), ('features', '<f4', (schema['n_features'],))])
+        datos = np.fromfile(self.path_bin, dtype=dtype)
+        df = pd.DataFrame(datos['features'], columns=schema['columnas'])
+        df.insert(0, 'ts', datos['ts'])
+        df.insert(0, 'TRADE_ID', np.char.decode(datos['trade_id']))
+        return df
@@ -3,7 +3,10 @@
 # DESCRIPCIÓN: SHOOTER V19.6 (SMART RISK + SHADOW PRESERVATION)
 # =============================================================================
 
+import time
+import uuid
 from config.config import Config
+from core.latency import obtener_latencia
 
 class Shooter:
     """
@@ -21,6 +24,7 @@ class Shooter:
         self.fin = financials 
         # Memoria temporal para evitar duplicados en el mismo milisegundo
         self.memory = {}
+        self.lat = obtener_latencia()
         
         try:
             from logs.system_logger import SystemLogger
@@ -34,14 +38,26 @@ class Shooter:
     def validar_y_crear_plan(self, signal, open_positions_dict):
         """
         Valida la señal contra la lógica de Cupos Dinámicos y Estrategia.
+        Marca el plan con 't_senal' (perf_counter) para medir señal -> protección
+        y con el 'id' del trade que reutilizan OrderManager y Evaluator.
         """
+        t_senal = time.perf_counter()
+        plan = self._validar_y_crear_plan(signal, open_positions_dict)
+        self.lat.desde('SHOOTER', t_senal)
+        if plan:
+            plan['t_senal'] = t_senal
+            # ID del trade desde la señal: enlaza foto de entrada (Evaluator) y custodia
+            plan.setdefault('id', str(uuid.uuid4())[:8])
+        return plan
+
+    def _validar_y_crear_plan(self, signal, open_positions_dict):
         strategy = signal.get('strategy')
         side = signal.get('signal') # LONG/SHORT
         price = float(signal.get('price'))
         timestamp = signal.get('timestamp')
         
         # 1. Candado Temporal (Evita disparar 2 veces la misma señal exacta)
-        memory_key = f"{strategy}_{side}_{timestamp}"
+        memory_key = f"{signal.get('symbol', self.cfg.SYMBOL)}_{strategy}_{side}_{timestamp}"
         if memory_key in self.memory: return None
 
         # 2. VALIDACIÓN INTELIGENTE (Reemplaza a los validadores antiguos para GAMMA)
@@ -61,7 +77,7 @@ class Shooter:
 
         # Construcción del Plan
         plan = {
-            'symbol': self.cfg.SYMBOL,
+            'symbol': signal.get('symbol', self.cfg.SYMBOL),
             'strategy': strategy,
             'side': side,
             'mode': signal.get('mode'),
@@ -85,7 +101,7 @@ class Shooter:
         """
         side = signal['signal']
         strategy = signal.get('strategy')
-        symbol = self.cfg.SYMBOL
+        symbol = signal.get('symbol', self.cfg.SYMBOL)
         
         # Si no es GAMMA, usamos una validación de cupos simplificada (Legacy)
         if strategy != 'GAMMA':
@@ -0,0 +1,192 @@
+# =============================================================================
+# UBICACIÓN: logic/strategies.py
+# DESCRIPCIÓN: REGISTRO DE ESTRATEGIAS V1.0 (SEÑALES VECTORIZADAS + ON_BAR INCREMENTAL)
+# =============================================================================
+
+import numpy as np
+import pandas as pd
+from config.config import Config
+
+REGISTRO = {}
+
+def registrar(cls):
+    """Decorador: la estrategia queda disponible para Brain y las herramientas de backtest."""
+    REGISTRO[cls.NOMBRE] = cls
+    return cls
+
+def crear(config=Config, nombres=None):
+    return [REGISTRO[n](config) for n in (nombres or REGISTRO)]
+
+
+class Estrategia:
+    """
+    ESTRATEGIA (PLUGIN) V1.0:
+    - NOMBRE, TIMEFRAME y EVENTO de vela que la dispara (CIERRE / INTRABAR).
+    - COLUMNAS: entradas que consume. Las de CONTEXTO ({'dist_1h': '1h'}) son la
+      distancia Fibo sobre otro timeframe y las arma quien llama (Brain en vivo,
+      contexto_fibo() en lote).
+    - SALIDAS: código -> (signal, mode); 0 = sin señal.
+    - senales(frame): códigos para todas las filas a velocidad NumPy (backtests).
+    - on_bar(estado): código para una sola fila (vivo). estado: dict / Series.
+    - verificar(frame): filas donde ambas implementaciones difieren (debe ser vacío).
+    """
+    NOMBRE = None
+    TIMEFRAME = '15m'
+    EVENTO = 'CIERRE'
+    COLUMNAS = ()
+    CONTEXTO = {}
+    SALIDAS = {}
+    DEFECTOS = {}       # Valor si la columna no existe (mismo criterio que row.get)
+    CONFIANZA = 1.0
+
+    def __init__(self, config=Config):
+        self.cfg = config
+
+    def _col(self, frame, nombre):
+        if nombre in frame.columns: return frame[nombre].to_numpy(dtype=float)
+        return np.full(len(frame), self.DEFECTOS.get(nombre, np.nan), dtype=float)
+
+    def _val(self, estado, nombre):
+        valor = estado.get(nombre, self.DEFECTOS.get(nombre, np.nan))
+        return np.nan if valor is None else float(valor)
+
+    # =========================================================================
+    # INTERFAZ DEL PLUGIN
+    # =========================================================================
+
+    def senales(self, frame):
+        raise NotImplementedError
+
+    def on_bar(self, estado):
+        raise NotImplementedError
+
+    def extras(self, fila):
+        return {}
+
+    def senal(self, codigo, fila, ts):
+        """Código -> señal con el formato que consumen Shooter / Evaluator."""
+        signal, mode = self.SALIDAS[codigo]
+        sig = {'strategy': self.NOMBRE, 'signal': signal, 'mode': mode,
+               'price': fila['close'], 'timestamp': ts, 'confidence': self.CONFIANZA}
+        sig.update(self.extras(fila))
+        return sig
+
+    def verificar(self, frame):
+        vector = self.senales(frame)
+        incremental = np.array([self.on_bar(f) for f in frame.to_dict('records')], dtype=np.int8)
+        return np.flatnonzero(vector != incremental)
+
+
+# =============================================================================
+# ESTRATEGIAS ACTIVAS (orden = orden de evaluación en Brain)
+# =============================================================================
+
+@registrar
+class SwingV3(Estrategia):
+    """SwingHunter Alpha V3: RSI 1H sobrevendido cerca de un nivel Fibo 4H."""
+    NOMBRE = 'SWING'
+    TIMEFRAME = '1h'
+    EVENTO = 'CIERRE'
+    COLUMNAS = ('close', 'rsi', 'dist_4h')
+    CONTEXTO = {'dist_4h': '4h'}
+    SALIDAS = {1: ('LONG', 'SWING_NORMAL')}
+    DEFECTOS = {'dist_4h': 999}
+
+    def on_bar(self, e):
+        cfg = self.cfg.SwingConfig
+        if self._val(e, 'rsi') < 35 and self._val(e, 'dist_4h') < cfg.FILTRO_DIST_FIBO_MACRO: return 1
+        return 0
+
+    def senales(self, frame):
+        cfg = self.cfg.SwingConfig
+        ok = (self._col(frame, 'rsi') < 35) & (self._col(frame, 'dist_4h') < cfg.FILTRO_DIST_FIBO_MACRO)
+        return ok.astype(np.int8)
+
+
+@registrar
+class GammaV46(Estrategia):
+    """GAMMA V4.6 (Strict S/L 2% + 3-Stage Exit): RSI 15m + distancia Fibo 1H; hedge sniper con MACD."""
+    NOMBRE = 'GAMMA'
+    TIMEFRAME = '15m'
+    EVENTO = 'CIERRE'
+    COLUMNAS = ('close', 'rsi', 'macd_hist', 'dist_1h')
+    CONTEXTO = {'dist_1h': '1h'}
+    SALIDAS = {1: ('LONG', 'GAMMA_NORMAL'), 2: ('SHORT', 'GAMMA_NORMAL'), 3: ('SHORT', 'GAMMA_HEDGE')}
+    DEFECTOS = {'rsi': 50, 'macd_hist': 0, 'dist_1h': 999}
+
+    def on_bar(self, e):
+        cfg = self.cfg.GammaConfig
+        rsi, macd, dist = self._val(e, 'rsi'), self._val(e, 'macd_hist'), self._val(e, 'dist_1h')
+        # A) NORMAL LONG  B) NORMAL SHORT  C) HEDGE SHORT (Sniper)
+        if rsi < 30 and dist < cfg.FILTRO_DIST_FIBO_MAX: return 1
+        if rsi > 70 and dist < cfg.FILTRO_DIST_FIBO_MAX: return 2
+        if rsi < 25 and dist > cfg.HEDGE_DIST_FIBO_MIN and macd < cfg.HEDGE_MACD_MAX: return 3
+        return 0
+
+    def senales(self, frame):
+        cfg = self.cfg.GammaConfig
+        rsi, macd, dist = self._col(frame, 'rsi'), self._col(frame, 'macd_hist'), self._col(frame, 'dist_1h')
+        cerca = dist < cfg.FILTRO_DIST_FIBO_MAX
+        return np.select([(rsi < 30) & cerca, (rsi > 70) & cerca,
+                          (rsi < 25) & (dist > cfg.HEDGE_DIST_FIBO_MIN) & (macd < cfg.HEDGE_MACD_MAX)],
+                         [1, 2, 3], 0).astype(np.int8)
+
+
+@registrar
+class ShadowV2(Estrategia):
+    """ShadowHunter V2: reversión en toques de Bandas de Bollinger (intrabar)."""
+    NOMBRE = 'SHADOW'
+    TIMEFRAME = '15m'
+    EVENTO = 'INTRABAR'
+    COLUMNAS = ('close', 'high', 'low', 'bb_upper', 'bb_lower', 'atr')
+    SALIDAS = {1: ('SHORT', 'SHADOW_GRID'), 2: ('LONG', 'SHADOW_GRID')}
+    DEFECTOS = {'bb_upper': 999999, 'bb_lower': 0, 'atr': 0}
+    CONFIANZA = 0.9
+
+    def on_bar(self, e):
+        if self._val(e, 'high') >= self._val(e, 'bb_upper'): return 1
+        if self._val(e, 'low') <= self._val(e, 'bb_lower'): return 2
+        return 0
+
+    def senales(self, frame):
+        return np.select([self._col(frame, 'high') >= self._col(frame, 'bb_upper'),
+                          self._col(frame, 'low') <= self._col(frame, 'bb_lower')],
+                         [1, 2], 0).astype(np.int8)
+
+    def extras(self, fila):
+        return {'atr': fila.get('atr', 0)}
+
+
+# =============================================================================
+# CONTEXTO EN LOTE (BACKTESTS)
+# =============================================================================
+
+def distancia_fibo(scanner, df_contexto, idx):
+    """Distancia relativa del close[idx] al nivel Fibo más cercano (999 = sin contexto)."""
+    try:
+        ctx = scanner.get_fibonacci_context(idx)
+        if not ctx or 'fibs' not in ctx: return 999
+        price = df_contexto.iloc[idx]['close']
+        if price == 0: return 999
+        return min([abs(price - l) / price for l in ctx['fibs'].values()])
+    except Exception:
+        return 999
+
+def contexto_fibo(frame, df_contexto, columna):
+    """
+    Agrega 'columna' (p. ej. dist_1h) a frame: distancia Fibo de la última vela del
+    contexto con timestamp <= al de cada fila. El scanner se precalcula una vez sobre
+    toda la serie, como en los simuladores de tests/: los pivotes de las últimas
+    swing_window velas quedan confirmados con datos que en vivo aún no existen.
+    """
+    from tools.StructureScanner_2 import StructureScanner
+    scanner = StructureScanner(df_contexto)
+    scanner.precompute()
+    dist = pd.DataFrame({'timestamp': df_contexto['timestamp'].to_numpy(dtype='int64'),
+                         columna: [distancia_fibo(scanner, df_contexto, i) for i in range(len(df_contexto))]})
+    base = frame.drop(columns=[columna], errors='ignore').reset_index(drop=True)
+    base['timestamp'] = base['timestamp'].astype('int64')
+    res = pd.merge_asof(base, dist, on='timestamp', direction='backward')
+    res[columna] = res[columna].fillna(999)
+    res.index = frame.index
+    return res
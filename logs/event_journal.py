@@ -0,0 +1,188 @@
+# =============================================================================
+# UBICACIÓN: logs/event_journal.py
+# DESCRIPCIÓN: JOURNAL DE EVENTOS V1.0 (NDJSON APPEND-ONLY + ÍNDICE POR POSICIÓN Y TIEMPO)
+# =============================================================================
+
+import os
+import json
+import time
+import threading
+from datetime import datetime
+from config.config import Config
+from logs.log_writer import obtener_escritor
+
+class EventJournal:
+    """
+    JOURNAL DE EVENTOS V1.0:
+    - Un solo registro append-only de todo lo que le pasa a órdenes y posiciones:
+      ORDER_SUBMITTED, ENTRY_FILLED, SL_PLACED, SL_MOVED, TP_PLACED, TP_HIT,
+      ORDER_CANCELLED, POSITION_ADOPTED, POSITION_CLOSED...
+    - Segmentos diarios NDJSON (journal_YYYYMMDD.ndjson), una línea compacta por evento:
+      {"t": ms, "e": evento, "p": id_posicion, "k": SYMBOL_SIDE, ...campos}.
+    - La escritura va por la cola del LogWriter: el camino de órdenes no toca disco.
+    - Índice lateral por segmento (.idx.json): offsets por posición + marcas de tiempo,
+      actualizado de forma incremental (solo lee los bytes nuevos).
+    """
+    MARCA_CADA = 500   # Una marca (t, offset) cada N eventos para búsquedas por tiempo
+
+    def __init__(self, base_dir=None):
+        self.dir = base_dir or os.path.join(Config.DIR_LOGS, "journal")
+        os.makedirs(self.dir, exist_ok=True)
+        self.escritor = obtener_escritor()
+        self._lock = threading.Lock()
+        self.activas = {}   # SYMBOL_SIDE -> id_posicion vigente (resuelve eventos sin id)
+
+    # =========================================================================
+    # ESCRITURA
+    # =========================================================================
+
+    def registrar(self, evento, pos_id=None, symbol=None, side=None, **campos):
+        """Encola el evento (no bloquea). Retorna el id de posición resuelto."""
+        key = f"{symbol}_{side}" if symbol and side else None
+        with self._lock:
+            if pos_id is None and key: pos_id = self.activas.get(key)
+            if key and pos_id and evento in ('ENTRY_FILLED', 'POSITION_ADOPTED', 'CUSTODY_ACCEPTED', 'CUSTODY_RESTORED'):
+                self.activas[key] = pos_id
+            elif key and evento == 'POSITION_CLOSED':
+                self.activas.pop(key, None)
+
+        ts = time.time()
+        registro = {'t': int(ts * 1000), 'e': evento}
+        if pos_id: registro['p'] = str(pos_id)
+        if key: registro['k'] = key
+        registro.update({k: v for k, v in campos.items() if v is not None})
+        linea = json.dumps(registro, separators=(',', ':'), default=str) + "\n"
+        self.escritor.escribir_linea(self.ruta_segmento(ts), linea)
+        return pos_id
+
+    def ruta_segmento(self, ts=None, dia=None):
+        dia = dia or datetime.fromtimestamp(ts if ts is not None else time.time()).strftime('%Y%m%d')
+        return os.path.join(self.dir, f"journal_{dia}.ndjson")
+
+    # =========================================================================
+    # ÍNDICE
+    # =========================================================================
+
+    def segmentos(self):
+        return sorted(os.path.join(self.dir, f) for f in os.listdir(self.dir) if f.endswith('.ndjson'))
+
+    def indice(self, segmento):
+        """Carga el índice del segmento y lo pone al día leyendo solo lo agregado."""
+        path_idx = segmento[:-len('.ndjson')] + ".idx.json"
+        idx = {'bytes': 0, 'eventos': 0, 'pos': {}, 'marcas': [], 't0': None, 't1': None}
+        if os.path.exists(path_idx):
+            try:
+                with open(path_idx) as f: idx = json.load(f)
+            except Exception: pass
+
+        tam = os.path.getsize(segmento)
+        if tam < idx['bytes']:   # Segmento reemplazado: reindexar
+            idx = {'bytes': 0, 'eventos': 0, 'pos': {}, 'marcas': [], 't0': None, 't1': None}
+        if tam == idx['bytes']: return idx
+
+        with open(segmento, 'rb') as f:
+            f.seek(idx['bytes'])
+            offset = idx['bytes']
+            for linea in f:
+                if not linea.endswith(b"\n"): break   # Línea aún en escritura
+                try: ev = json.loads(linea)
+                except Exception:
+                    offset += len(linea)
+                    continue
+                if idx['eventos'] % self.MARCA_CADA == 0: idx['marcas'].append([ev['t'], offset])
+                if 'p' in ev: idx['pos'].setdefault(ev['p'], []).append(offset)
+                if idx['t0'] is None: idx['t0'] = ev['t']
+                idx['t1'] = ev['t']
+                idx['eventos'] += 1
+                offset += len(linea)
+            idx['bytes'] = offset
+
+        tmp = path_idx + ".tmp"
+        with open(tmp, 'w') as f: json.dump(idx, f, separators=(',', ':'))
+        os.replace(tmp, path_idx)
+        return idx
+
+    # =========================================================================
+    # CONSULTAS
+    # =========================================================================
+
+    def timeline(self, pos_id):
+        """Todos los eventos de una posición, en orden, vía offsets del índice."""
+        pos_id = str(pos_id)
+        eventos = []
+        for seg in self.segmentos():
+            offsets = self.indice(seg)['pos'].get(pos_id)
+            if not offsets: continue
+            with open(seg, 'rb') as f:
+                for off in offsets:
+                    f.seek(off)
+                    eventos.append(json.loads(f.readline()))
+        return eventos
+
+    def eventos(self, desde=None, hasta=None, tipos=None, dia=None):
+        """Eventos en [desde, hasta] (ms). Usa t0/t1 y marcas para saltar directo al rango."""
+        segs = [self.ruta_segmento(dia=dia)] if dia else self.segmentos()
+        for seg in segs:
+            if not os.path.exists(seg): continue
+            idx = self.indice(seg)
+            if idx['t0'] is None: continue
+            if desde is not None and idx['t1'] < desde: continue
+            if hasta is not None and idx['t0'] > hasta: continue
+
+            inicio = 0
+            if desde is not None:
+                for t, off in idx['marcas']:
+                    if t <= desde: inicio = off
+                    else: break
+            with open(seg, 'rb') as f:
+                f.seek(inicio)
+                for linea in f:
+                    if not linea.endswith(b"\n"): break
+                    ev = json.loads(linea)
+                    if desde is not None and ev['t'] < desde: continue
+                    if hasta is not None and ev['t'] > hasta: return
+                    if tipos and ev['e'] not in tipos: continue
+                    yield ev
+
+    def estado(self, dia=None, hasta=None):
+        """Reconstruye el estado de todas las posiciones replayando el journal."""
+        posiciones = {}
+        for ev in self.eventos(hasta=hasta, dia=dia):
+            pid = ev.get('p') or ev.get('k')
+            if not pid: continue
+            pos = posiciones.setdefault(pid, {'id': pid, 'key': ev.get('k'), 'estado': 'PENDIENTE',
+                                              'abierta': None, 'cerrada': None, 'eventos': 0})
+            pos['eventos'] += 1
+            if ev.get('k'): pos['key'] = ev['k']
+            e = ev['e']
+            if e in ('ENTRY_FILLED', 'POSITION_ADOPTED'):
+                pos.update(estado='ABIERTA', abierta=ev['t'], entry_price=ev.get('price'), qty=ev.get('qty'),
+                           strategy=ev.get('strategy', pos.get('strategy')))
+            elif e == 'CUSTODY_RESTORED' and pos['estado'] != 'ABIERTA':
+                # Segmento del día sin la entrada (abierta en un día anterior)
+                pos.update(estado='ABIERTA', entry_price=ev.get('price'), qty=ev.get('qty'), strategy=ev.get('strategy'))
+            elif e in ('SL_PLACED', 'SL_MOVED'):
+                pos['sl_price'] = ev.get('price')
+            elif e == 'TP_PLACED':
+                pos.setdefault('tps', []).append(ev.get('price'))
+            elif e == 'TP_HIT':
+                pos['tps_alcanzados'] = pos.get('tps_alcanzados', 0) + 1
+            elif e == 'POSITION_REDUCED':
+                pos['reducida'] = pos.get('reducida', 0) + float(ev.get('qty') or 0)
+            elif e == 'POSITION_CLOSED':
+                pos.update(estado='CERRADA', cerrada=ev['t'], motivo=ev.get('reason'), exit_price=ev.get('price'))
+            elif e == 'ORDER_SUBMITTED' and pos['estado'] == 'PENDIENTE':
+                pos['strategy'] = ev.get('strategy')
+        return posiciones
+
+
+# Un solo journal por proceso (comparten OM, SLManager y Comptroller de todos los símbolos)
+_JOURNAL = None
+_LOCK_JOURNAL = threading.Lock()
+
+def obtener_journal():
+    global _JOURNAL
+    with _LOCK_JOURNAL:
+        if _JOURNAL is None:
+            _JOURNAL = EventJournal()
+        return _JOURNAL
@@ -0,0 +1,163 @@
+# =============================================================================
+# UBICACIÓN: logs/log_writer.py
+# DESCRIPCIÓN: ESCRITOR DE LOGS ASÍNCRONO V1.0 (COLA + LOTES + ROTACIÓN)
+# =============================================================================
+
+import os
+import io
+import csv
+import sys
+import time
+import queue
+import atexit
+import threading
+from config.config import Config
+
+class LogWriter:
+    """
+    ESCRITOR ASÍNCRONO V1.0:
+    - Los productores (OM, Comptroller, Shooter...) solo hacen un put() O(1) de una
+      tupla cruda; formateo, consola y disco ocurren en un hilo de fondo.
+    - El hilo drena la cola en lotes y escribe cada archivo una vez por lote.
+    - Rotación por tamaño (archivo.1 ... archivo.N); los CSV rotados reciben su cabecera.
+    - Al salir del proceso (atexit) se drena lo pendiente.
+    """
+    DESTINOS = {
+        'ACTIVIDAD': (Config.FILE_LOG_ACTIVITY, None),
+        'ERRORES': (Config.FILE_LOG_ERRORS, ['TIMESTAMP', 'MODULO', 'TIPO_ERROR', 'MENSAJE', 'TRACEBACK']),
+        'ORDENES': (Config.FILE_LOG_ORDERS, ['ID_POSICION', 'TIMESTAMP', 'ESTRATEGIA', 'SIDE', 'PRECIO_ENTRADA',
+                                             'QTY', 'SL_PRICE', 'SL_ORDER_ID', 'TP_CONFIG', 'ESTADO'])
+    }
+
+    def __init__(self, config=Config):
+        lcfg = config.LogConfig
+        self.max_bytes = lcfg.MAX_BYTES
+        self.respaldos = lcfg.RESPALDOS
+        self.lote_max = lcfg.LOTE_MAX
+        self.consola = lcfg.CONSOLA
+        self.cola = queue.SimpleQueue()
+        self.stats = {'escritos': 0, 'lotes': 0, 'rotaciones': 0, 'fallos': 0}
+        self._vacia = threading.Event()
+        self._vacia.set()
+        self._activo = True
+
+        if not os.path.exists(config.DIR_LOGS): os.makedirs(config.DIR_LOGS)
+        for path, cabecera in self.DESTINOS.values():
+            if cabecera and not os.path.exists(path): self._escribir_cabecera(path, cabecera)
+
+        self._hilo = threading.Thread(target=self._bucle, name="LogWriter", daemon=True)
+        self._hilo.start()
+        atexit.register(self.detener)
+
+    # =========================================================================
+    # PRODUCTORES (NO BLOQUEAN)
+    # =========================================================================
+
+    def escribir(self, destino, datos, nivel='INFO'):
+        """destino: ACTIVIDAD (datos=str) | ERRORES / ORDENES (datos=lista de columnas)."""
+        self._vacia.clear()
+        self.cola.put((destino, time.time(), nivel, datos))
+
+    def escribir_linea(self, path, linea):
+        """Línea ya formateada hacia un archivo arbitrario (journal). Sin rotación por tamaño."""
+        self._vacia.clear()
+        self.cola.put(('LINEA', time.time(), path, linea))
+
+    def pendientes(self):
+        return self.cola.qsize()
+
+    def flush(self, timeout=5.0):
+        """Espera a que el hilo vacíe la cola (apagado / pruebas). No usar en el camino de órdenes."""
+        return self._vacia.wait(timeout)
+
+    def detener(self):
+        if not self._activo: return
+        self.flush()
+        self._activo = False
+
+    # =========================================================================
+    # HILO ESCRITOR
+    # =========================================================================
+
+    def _bucle(self):
+        while True:
+            try: lote = [self.cola.get(timeout=0.5)]
+            except queue.Empty:
+                self._vacia.set()
+                if not self._activo: return
+                continue
+            while len(lote) < self.lote_max:
+                try: lote.append(self.cola.get_nowait())
+                except queue.Empty: break
+            try: self._escribir_lote(lote)
+            except Exception: self.stats['fallos'] += 1
+            if self.cola.empty(): self._vacia.set()
+
+    def _escribir_lote(self, lote):
+        bloques = {}
+        consola = []
+        lineas_libres = {}
+        for destino, ts, nivel, datos in lote:
+            if destino == 'LINEA':
+                lineas_libres.setdefault(nivel, []).append(datos)
+                continue
+            if destino == 'ACTIVIDAD':
+                linea = f"{self._fecha(ts, ms=True)} | {nivel} | {datos}\n"
+                if self.consola: consola.append(linea)
+            else:
+                buf = io.StringIO()
+                csv.writer(buf).writerow(datos)
+                linea = buf.getvalue()
+            bloques.setdefault(destino, []).append(linea)
+
+        for destino, lineas in bloques.items():
+            path, cabecera = self.DESTINOS[destino]
+            self._rotar_si_excede(path, cabecera)
+            with open(path, 'a', newline='', encoding='utf-8') as f:
+                f.write("".join(lineas))
+        for path, lineas in lineas_libres.items():
+            with open(path, 'a', encoding='utf-8') as f:
+                f.write("".join(lineas))
+        if consola:
+            sys.stderr.write("".join(consola))
+            sys.stderr.flush()
+        self.stats['escritos'] += len(lote)
+        self.stats['lotes'] += 1
+
+    def _rotar_si_excede(self, path, cabecera):
+        try:
+            if os.path.getsize(path) < self.max_bytes: return
+        except OSError: return
+        for i in range(self.respaldos - 1, 0, -1):
+            origen = f"{path}.{i}"
+            if os.path.exists(origen): os.replace(origen, f"{path}.{i + 1}")
+        os.replace(path, f"{path}.1")
+        if cabecera: self._escribir_cabecera(path, cabecera)
+        self.stats['rotaciones'] += 1
+
+    @staticmethod
+    def _escribir_cabecera(path, cabecera):
+        with open(path, 'w', newline='', encoding='utf-8') as f:
+            csv.writer(f).writerow(cabecera)
+
+    @staticmethod
+    def _fecha(ts, ms=False):
+        base = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(ts))
+        return f"{base},{int((ts % 1) * 1000):03d}" if ms else base
+
+    def metricas(self):
+        m = dict(self.stats)
+        m['pendientes'] = self.pendientes()
+        return m
+
+
+# Un único hilo escritor por proceso (todas las instancias de SystemLogger lo comparten)
+_ESCRITOR = None
+_LOCK_ESCRITOR = threading.Lock()
+
+def obtener_escritor():
+    global _ESCRITOR
+    with _LOCK_ESCRITOR:
+        if _ESCRITOR is None:
+            _ESCRITOR = LogWriter()
+        return _ESCRITOR
@@ -1,9 +1,8 @@
 # =============================================================================
 # UBICACIÓN: main.py
-# DESCRIPCIÓN: ORQUESTADOR MAESTRO V19.5 (CON INTEGRAIÓN BLACKBOX)
+# DESCRIPCIÓN: ORQUESTADOR MAESTRO V19.6 (CON INTEGRAIÓN BLACKBOX + PLANIFICADOR COOPERATIVO)
 # =============================================================================
 
-import time
 import sys
 import os
 import pandas as pd
@@ -19,15 +18,22 @@ from data.historical_manager import HistoricalManager
 # --- EJECUCIÓN & CONTROL ---
 from execution.order_manager import OrderManager
 from execution.comptroller import Comptroller
+from execution.custody_store import CustodyStore
 from core.financials import Financials
+from core.latency import obtener_latencia
+from core.scheduler import Scheduler
 
 # --- INTELIGENCIA ---
 from logic.brain import Brain
 from logic.shooter import Shooter
 from logic.evaluator import Evaluator # <--- NUEVA IMPORTACIÓN
+from data.indicator_state import IndicatorState
 
 # --- INTERFACES ---
 from interfaces.dashboard import Dashboard
+from interfaces.dashboard_provider import DashboardProvider
+from interfaces.dashboard_service import DashboardService
+from interfaces.command_bus import CommandBus
 from interfaces.telegram_bot import TelegramBot
 from interfaces.human_input import HumanInput
 
@@ -76,6 +82,7 @@ def main():
         # 2. CONEXIÓN Y DATOS
         api = APIManager(logger)
         fin = Financials(Config, api)
+        if Config.AccountConfig.REFRESCO_BACKGROUND: fin.cuenta.iniciar()
         hist_manager = HistoricalManager(api, logger) 
         
         # Sincronización Inicial de Datos
@@ -94,37 +101,40 @@ def main():
         # 4. INTELIGENCIA
         shooter = Shooter(om, fin)
         brain = Brain(Config) 
+        custodia = CustodyStore(Config.SYMBOL)
         
         # 5. INTERFACES
-        tele = TelegramBot(Config, shooter, comp, om, logger, fin)
-        dash = Dashboard()
+        bus = CommandBus()
+        tele = TelegramBot(Config, shooter, comp, om, logger, fin, bus, custodia)
+        dash_provider = DashboardProvider(Config.SYMBOL)
+        dash = Dashboard(dash_provider)
+        dash_service = DashboardService(dash)
         cli = HumanInput(tele, comp, om, shooter, logger, fin)
         
         # Arrancar hilos secundarios
         tele.iniciar()
         cli.iniciar()
+        dash_service.iniciar()
         
         # Sincronización inicial de Finanzas
         fin.sincronizar_libro_con_api()
         comp.sincronizar_con_exchange()
         
         # --- RECUPERACIÓN DE ESTADO (AUTO-RECOVERY) ---
+        # 1. Arranque en caliente: foto local de custodia, reconciliada contra el exchange
+        custodia.restaurar(comp, shooter)
+        # 2. Solo lo que la foto no cubre pasa por la adopción completa
         logger.registrar_actividad("MAIN", "🔎 Buscando posiciones huérfanas en Binance para adoptar...")
         comp.adoptar_posiciones_huerfanas()
         
         # VARIABLES DE BUCLE
-        cycle_counter = 0
         dashboard_data = {
             'price': 0.0, 'financials': {}, 'market': {}, 'connections': {}, 'positions': []
         }
-        
-        logger.registrar_actividad("SYSTEM", "✅ Sistema Operativo. Entrando en Bucle Principal.")
+        sched = Scheduler(Config, logger, al_fallar=lambda nombre, e: supervisor.reportar_error_critico(e, f"LOOP_{nombre}"))
 
-        # =====================================================================
-        # BUCLE PRINCIPAL (INFINITO)
-        # =====================================================================
-        while True:
-            # --- TAREA 1: LATIDO RÁPIDO (1s) ---
+        # --- TAREA 1: LATIDO (1s - CYCLE_FAST, PRIORIDAD MÁXIMA) ---
+        def latido():
             try:
                 # Verificación de conexión
                 current_price = api.get_ticker_price(Config.SYMBOL)
@@ -137,75 +147,124 @@ def main():
                 
             except Exception as e:
                 supervisor.reportar_error_conexion(e)
-                time.sleep(5) 
-                continue 
-
-            # --- TAREA 2: ESTRATEGIA (10s - CYCLE_SLOW) ---
-            if cycle_counter % Config.CYCLE_SLOW == 0:
-                try:
-                    # A. Sincronizar
-                    fin.sincronizar_libro_con_api()
-                    comp.sincronizar_con_exchange()
+                sched.posponer('LATIDO', Config.SchedulerConfig.PAUSA_RED)
+
+        # --- TAREA 2: ANÁLISIS (10s - CYCLE_SLOW, HILO DEL POOL) ---
+        def analizar():
+            if supervisor.en_pausa_red: return None
+            # A. Datos (velas + caché en disco; nada de estado de órdenes en este hilo)
+            hist_manager.sincronizar_infraestructura_datos()
+            df_15m = hist_manager.obtener_dataframe_cache('15m')
+            df_1h = hist_manager.obtener_dataframe_cache('1h')
+            df_4h = hist_manager.obtener_dataframe_cache('4h')
+            
+            if df_15m.empty or df_1h.empty or df_4h.empty:
+                logger.registrar_error("DATA", "⚠️ Dataframes vacíos o incompletos en disco.")
+                return None
+            
+            # B. Análisis: solo las estrategias con evento de vela (cierre 15m / 1h, intrabar 15m)
+            data_map = {'15m': df_15m, '1h': df_1h, '4h': df_4h}
+            signals = brain.analizar_eventos(data_map)
+            estado = IndicatorState.desde_data_map(data_map) if signals else None
+            # Matriz del dashboard: solo los timeframes con vela cerrada
+            dash_provider.actualizar(data_map)
+            return data_map, signals, estado
+
+        # --- TAREA 3: EJECUCIÓN (AL TERMINAR EL ANÁLISIS, HILO DE OPERACIONES) ---
+        def ejecutar(resultado):
+            data_map, signals, estado = resultado
+            # C. Sincronizar: libro y custodia en el mismo hilo que coloca las órdenes
+            #    (Financials serializa la reconciliación con las altas del latido)
+            fin.sincronizar_libro_con_api()
+            comp.sincronizar_con_exchange()
+            
+            df_15m = data_map['15m']
+            if 'rsi' in df_15m.columns:
+                dashboard_data['market']['rsi'] = df_15m.iloc[-1]['rsi']
+            
+            # D. Ejecución
+            for sig in signals:
+                plan = shooter.validar_y_crear_plan(sig, comp.posiciones_activas)
+                
+                if plan:
+                    logger.registrar_actividad("MAIN", f"⚡ SEÑAL APROBADA: {plan['strategy']} ({plan['side']})")
                     
-                    # B. Datos
-                    hist_manager.sincronizar_infraestructura_datos()
-                    df_15m = hist_manager.obtener_dataframe_cache('15m')
-                    df_1h = hist_manager.obtener_dataframe_cache('1h')
-                    df_4h = hist_manager.obtener_dataframe_cache('4h')
+                    # Reporte Intención Telegram
+                    tele.reportar_intencion_entrada(plan)
                     
-                    if df_15m.empty or df_1h.empty or df_4h.empty:
-                        logger.registrar_error("DATA", "⚠️ Dataframes vacíos o incompletos en disco.")
-                    else:
-                        # C. Análisis
-                        data_map = {'15m': df_15m, '1h': df_1h, '4h': df_4h}
-                        signals = brain.analizar_mercado(data_map)
-                        
-                        if 'rsi' in df_15m.columns:
-                            dashboard_data['market']['rsi'] = df_15m.iloc[-1]['rsi']
-                        
-                        # D. Ejecución
-                        for sig in signals:
-                            plan = shooter.validar_y_crear_plan(sig, comp.posiciones_activas)
-                            
-                            if plan:
-                                logger.registrar_actividad("MAIN", f"⚡ SEÑAL APROBADA: {plan['strategy']} ({plan['side']})")
-                                
-                                # Reporte Intención Telegram
-                                tele.reportar_intencion_entrada(plan)
-                                
-                                # --- NUEVO: FOTO ESTADÍSTICA ANTES DE OPERAR ---
-                                evaluator.registrar_entrada(plan, data_map)
-                                # -----------------------------------------------
-                                
-                                # Ejecución
-                                exito, paquete = om.ejecutar_estrategia(plan)
-                                
-                                if exito and paquete:
-                                    comp.aceptar_custodia(paquete)
-                                    msg = f"🚀 ORDEN CONFIRMADA: {plan['strategy']} @ {paquete['entry_price']}"
-                                    tele.enviar_mensaje(msg)
-                                    logger.registrar_actividad("MAIN", msg)
+                    # --- NUEVO: FOTO ESTADÍSTICA ANTES DE OPERAR ---
+                    evaluator.registrar_entrada(plan, data_map, estado)
+                    # -----------------------------------------------
                     
-                    supervisor.reportar_exito()
+                    # Ejecución
+                    exito, paquete = om.ejecutar_estrategia(plan)
                     
-                except Exception as e:
-                    supervisor.reportar_error_critico(e, "LOOP_STRATEGY")
-
-            # --- TAREA 3: VISUAL (3s) ---
-            if cycle_counter % Config.CYCLE_DASH == 0:
-                try:
-                    dashboard_data['financials']['balance'] = fin.get_balance_total()
-                    dashboard_data['connections']['binance'] = (dashboard_data['price'] > 0)
-                    dashboard_data['connections']['telegram'] = tele.running
-                    dashboard_data['positions'] = list(comp.posiciones_activas.values())
-                    dash.render(dashboard_data)
-                except Exception: pass
+                    if exito and paquete:
+                        comp.aceptar_custodia(paquete)
+                        custodia.guardar(comp, shooter, forzar=True)
+                        msg = f"🚀 ORDEN CONFIRMADA: {plan['strategy']} @ {paquete['entry_price']}"
+                        tele.enviar_mensaje(msg)
+                        logger.registrar_actividad("MAIN", msg)
             
-            time.sleep(Config.CYCLE_FAST)
-            cycle_counter += 1
+            supervisor.reportar_exito()
+
+        # --- TAREA 4: VISUAL (3s - CYCLE_DASH, HILO DEL POOL) ---
+        # Tras un fill la foto de cuenta queda invalidada y el balance espera una lectura
+        # REST: fuera del bucle, esa espera nunca retrasa al latido
+        def visual():
+            try:
+                dashboard_data['financials']['balance'] = fin.get_balance_total(prioridad='VISUAL')
+                dashboard_data['connections']['binance'] = (dashboard_data['price'] > 0)
+                dashboard_data['connections']['telegram'] = tele.running
+                comp.refrescar_metricas()
+                # Foto copiada: dashboard y comandos de consulta la leen sin tocar el estado vivo
+                foto = {
+                    'price': dashboard_data['price'],
+                    'financials': dict(dashboard_data['financials']),
+                    'market': dict(dashboard_data['market']),
+                    'connections': dict(dashboard_data['connections']),
+                    'positions': list(comp.posiciones_activas.foto().values()),
+                    'scheduler': sched.metricas()
+                }
+                dash_service.publicar(foto)
+                bus.publicar_foto(foto)
+                obtener_latencia().exportar()
+            except Exception: pass
+
+        sched.periodica('LATIDO', latido, Config.CYCLE_FAST, prioridad=0)
+        # Alineado al reloj: el cierre de cada vela (múltiplo de CYCLE_SLOW) se analiza a los DESFASE_CIERRE s
+        sched.periodica('ANALISIS', analizar, Config.CYCLE_SLOW, prioridad=3, pesada=True, encadenar='EJECUCION',
+                        desfase=Config.SchedulerConfig.DESFASE_CIERRE)
+        # Todo lo que abre posiciones comparte el hilo OPERACIONES: el bucle sigue con el
+        # latido y solo recoge lo terminado
+        sched.por_evento('EJECUCION', ejecutar, prioridad=1, hilo='OPERACIONES')
+        # Órdenes manuales (Telegram / consola), serializadas con la ejecución de estrategias
+        sched.periodica('COMANDOS', bus.procesar, Config.CYCLE_FAST, prioridad=2, hilo='OPERACIONES')
+        # Foto periódica de custodia (json + fsync) fuera del latido; las forzadas siguen tras cada fill
+        sched.periodica('CUSTODIA', lambda: custodia.guardar(comp, shooter), Config.CustodyConfig.SNAPSHOT_INTERVAL,
+                        prioridad=4, hilo='OPERACIONES')
+        sched.periodica('VISUAL', visual, Config.CYCLE_DASH, prioridad=5, pesada=True)
+        
+        logger.registrar_actividad("SYSTEM", "✅ Sistema Operativo. Entrando en Bucle Principal.")
+
+        # =====================================================================
+        # BUCLE PRINCIPAL (PLANIFICADOR: PLAZOS MONOTÓNICOS, SIN DERIVA)
+        # =====================================================================
+        sched.correr()
 
     except KeyboardInterrupt:
         print("\n🛑 Apagado manual solicitado...")
+        try: sched.detener()
+        except Exception: pass
+        try: custodia.guardar(comp, shooter, forzar=True)
+        except Exception: pass
+        try: dash_service.detener()
+        except Exception: pass
+        try: tele.detener()   # Vacía los avisos pendientes
+        except Exception: pass
+        # Dataset ML plano (une los logs de entradas/salidas del Blackbox)
+        try: evaluator.materializar_dataset()
+        except Exception: pass
         sys.exit(0)
     except Exception as e:
         supervisor.reportar_error_critico(e, "CRITICAL_LOOP")
@@ -0,0 +1,67 @@
+# =============================================================================
+# UBICACIÓN: main_portfolio.py
+# DESCRIPCIÓN: ORQUESTADOR DE CARTERA V1.1 (GAMMA MULTI-SÍMBOLO + PLANIFICADOR COOPERATIVO)
+# USO: SENTINEL_SYMBOLS=AAVEUSDT,SOLUSDT,LINKUSDT python main_portfolio.py
+# =============================================================================
+
+from config.config import Config
+from logs.system_logger import SystemLogger
+from connections.api_manager import APIManager
+from execution.portfolio import PortfolioRuntime
+from core.latency import obtener_latencia
+from core.scheduler import Scheduler
+from main import BotSupervisor
+
+def main():
+    Config.inicializar_infraestructura()
+    logger = SystemLogger()
+    supervisor = BotSupervisor(logger)
+
+    logger.registrar_actividad("SYSTEM", f"🚀 Iniciando {Config.BOT_NAME} v{Config.VERSION} (CARTERA)")
+    logger.registrar_actividad("SYSTEM", f"🌍 Modo: {Config.MODE} | Pares: {', '.join(Config.SYMBOLS)}")
+
+    api = APIManager(logger)
+    cartera = PortfolioRuntime(Config, api, logger)
+    cartera.iniciar()
+
+    sched = Scheduler(Config, logger, al_fallar=lambda nombre, e: supervisor.reportar_error_critico(e, "LOOP_PORTFOLIO"))
+
+    # --- TAREA 1: LATIDO RÁPIDO (PRIORIDAD MÁXIMA) ---
+    def latido():
+        try:
+            cartera.latido()
+            supervisor.reportar_recuperacion()
+        except Exception as e:
+            supervisor.reportar_error_conexion(e)
+            sched.posponer('LATIDO', Config.SchedulerConfig.PAUSA_RED)
+
+    # --- TAREA 2: ESTRATEGIA (velas + análisis en el pool, ejecución en el hilo de operaciones) ---
+    def preparar():
+        if supervisor.en_pausa_red: return None
+        return cartera.preparar_estrategia()
+
+    def ejecutar(resultados):
+        cartera.ejecutar_estrategia(resultados)
+        supervisor.reportar_exito()
+
+    sched.periodica('LATIDO', latido, Config.CYCLE_FAST, prioridad=0)
+    sched.periodica('ANALISIS', preparar, Config.CYCLE_SLOW, prioridad=3, pesada=True, encadenar='EJECUCION',
+                    desfase=Config.SchedulerConfig.DESFASE_CIERRE)
+    # Las órdenes de cartera esperan sus futuros fuera del bucle: el latido no se detiene
+    sched.por_evento('EJECUCION', ejecutar, prioridad=1, hilo='OPERACIONES')
+    sched.periodica('CUSTODIA', cartera.guardar_custodias, Config.CustodyConfig.SNAPSHOT_INTERVAL,
+                    prioridad=4, hilo='OPERACIONES')
+    # --- TAREA 3: MÉTRICAS ---
+    sched.periodica('METRICAS', obtener_latencia().exportar, Config.CYCLE_DASH, prioridad=5)
+
+    try:
+        sched.correr()
+
+    except KeyboardInterrupt:
+        print("\n🛑 Apagado manual solicitado...")
+    finally:
+        sched.detener()
+        cartera.detener()
+
+if __name__ == "__main__":
+    main()
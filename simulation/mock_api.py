@@ -10,10 +10,10 @@ import os
 import random
 
 class MockAPIManager:
-    def __init__(self, logger, initial_balance=1000.0, csv_file="simulation_report_v17.csv", stress_mode=False):
+    def __init__(self, logger, initial_balance=1000.0, csv_file="simulation_report_v17.csv", stress_mode=False, symbol="AAVEUSDT"):
         self.log = logger
         self.balance_usdt = initial_balance
-        self.symbol = "AAVEUSDT"
+        self.symbol = symbol
         self.csv_file = csv_file
         self.stress_mode = stress_mode
         
@@ -32,6 +32,8 @@ class MockAPIManager:
         }
         
         self.open_orders = {}
+        self.filled_orders = {}
+        self.oyentes_cuenta = []
 
     def _init_csv(self):
         if os.path.exists(self.csv_file):
@@ -65,10 +67,26 @@ class MockAPIManager:
             }]
         }
 
+    def get_exchange_info(self):
+        return self.exchange_info()
+
     def balance(self):
         return [{'asset': 'USDT', 'balance': str(self.balance_usdt)}]
 
-    def get_position_info(self, symbol=None):
+    def get_account_balance(self, prioridad=None):
+        return self.balance_usdt
+
+    def get_ticker_prices(self, prioridad=None):
+        return {self.symbol: self.current_price}
+
+    def get_balance_detalle(self, prioridad=None):
+        return {'balance': self.balance_usdt, 'disponible': self.balance_usdt}
+
+    def suscribir_cuenta(self, callback):
+        # Equivalente al ACCOUNT_UPDATE del user data stream: se emite en cada fill
+        self.oyentes_cuenta.append(callback)
+
+    def get_position_info(self, symbol=None, prioridad=None):
         return [
             {'symbol': self.symbol, 'positionAmt': self.positions['LONG']['amount'], 'entryPrice': self.positions['LONG']['entry_price'], 'side': 'LONG', 'unRealizedProfit': 0.0, 'leverage': 20},
             {'symbol': self.symbol, 'positionAmt': -self.positions['SHORT']['amount'], 'entryPrice': self.positions['SHORT']['entry_price'], 'side': 'SHORT', 'unRealizedProfit': 0.0, 'leverage': 20}
@@ -79,6 +97,9 @@ class MockAPIManager:
     def execute_generic_order(self, params):
         return self.place_order(params)
 
+    def execute_batch_orders(self, lote):
+        return [self.place_order(dict(p)) for p in lote]
+
     def place_market_order(self, symbol, side, qty, position_side=None, reduce_only=False):
         params = {'symbol': symbol, 'side': side, 'type': 'MARKET', 'quantity': qty}
         return self.place_order(params)
@@ -108,6 +129,7 @@ class MockAPIManager:
             params['status'] = 'FILLED'
             params['avgPrice'] = exec_price
             params['executedQty'] = qty
+            self.filled_orders[order_id] = params
             return True, params
 
         elif order_type == 'LIMIT':
@@ -125,6 +147,12 @@ class MockAPIManager:
                 self.open_orders[order_id] = params
             
             return True, params
+
+        elif order_type == 'STOP_MARKET':
+            # Stop de protección: queda en reposo hasta que el precio lo cruce
+            params['status'] = 'NEW'
+            self.open_orders[order_id] = params
+            return True, params
             
         return False, {"msg": "Order type not supported"}
 
@@ -152,19 +180,32 @@ class MockAPIManager:
             writer = csv.writer(f)
             writer.writerow([self.current_time, 'TRADE', side, f"{price:.2f}", qty, f"{self.balance_usdt:.2f}", note])
 
+        for callback in self.oyentes_cuenta: callback()
+
     def _check_pending_orders(self):
         filled = []
         for oid, order in self.open_orders.items():
             side = order['side']
-            price = float(order['price'])
-            qty = float(order['quantity'])
-            
             fill = False
-            if side == 'BUY' and self.current_price <= price: fill = True
-            elif side == 'SELL' and self.current_price >= price: fill = True
+
+            if order.get('type') == 'STOP_MARKET':
+                price = float(order['stopPrice'])
+                pos_side = order.get('positionSide', 'LONG' if side == 'SELL' else 'SHORT')
+                qty = self.positions[pos_side]['amount'] if order.get('closePosition') else float(order.get('quantity', 0))
+                if side == 'SELL' and self.current_price <= price: fill = True
+                elif side == 'BUY' and self.current_price >= price: fill = True
+                if fill and qty <= 0:
+                    # Posición ya cerrada: el stop se descarta sin ejecutar
+                    fill = False
+                    filled.append(oid)
+            else:
+                price = float(order['price'])
+                qty = float(order['quantity'])
+                if side == 'BUY' and self.current_price <= price: fill = True
+                elif side == 'SELL' and self.current_price >= price: fill = True
             
             if fill:
-                self._execute_trade(side, qty, price, "LIMIT_FILL")
+                self._execute_trade(side, qty, price, f"{order.get('type', 'LIMIT')}_FILL")
                 filled.append(oid)
         for oid in filled: del self.open_orders[oid]
 
@@ -172,6 +213,9 @@ class MockAPIManager:
         oid = str(orderId)
         if oid in self.open_orders:
              return {'status': 'NEW', 'avgPrice': 0.0, 'executedQty': 0.0}
+        if oid in self.filled_orders:
+            o = self.filled_orders[oid]
+            return {'status': 'FILLED', 'avgPrice': o['avgPrice'], 'executedQty': o['executedQty']}
         return {'status': 'FILLED', 'avgPrice': self.current_price, 'executedQty': 0.0}
 
     def cancel_order(self, symbol, orderId):
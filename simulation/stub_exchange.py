@@ -0,0 +1,215 @@
+# =============================================================================
+# UBICACIÓN: simulation/stub_exchange.py
+# DESCRIPCIÓN: EXCHANGE STUB LOCAL V1.0 (REST BINANCE FUTURES + LÍMITES DE PESO)
+# USO: python simulation/stub_exchange.py  (o instanciar StubExchange en pruebas)
+# =============================================================================
+
+import os
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.append(root_dir)
+
+class StubExchange:
+    """
+    EXCHANGE STUB V1.0:
+    Servidor HTTP local que imita los endpoints REST de Binance USDⓈ-M usados por
+    APIManager. Lleva la cuenta de peso por ventana de 1 minuto, devuelve los headers
+    X-MBX-USED-WEIGHT-1M y responde 429 (Retry-After) al superar el límite.
+    Uso: APIManager(logger, base_url=stub.iniciar())
+    """
+    PESOS = {
+        ('GET', '/fapi/v1/time'): 1,
+        ('GET', '/fapi/v1/exchangeInfo'): 1,
+        ('GET', '/fapi/v1/ticker/price'): 1,
+        ('GET', '/fapi/v1/klines'): 5,
+        ('GET', '/fapi/v1/openOrders'): 1,
+        ('GET', '/fapi/v1/order'): 1,
+        ('GET', '/fapi/v2/balance'): 5,
+        ('GET', '/fapi/v2/positionRisk'): 5,
+        ('POST', '/fapi/v1/order'): 1,
+        ('POST', '/fapi/v1/batchOrders'): 5,
+        ('DELETE', '/fapi/v1/order'): 1,
+        ('DELETE', '/fapi/v1/allOpenOrders'): 1,
+        ('POST', '/fapi/v1/positionSide/dual'): 1,
+        ('POST', '/fapi/v1/leverage'): 1,
+    }
+
+    def __init__(self, limite_peso=2400, precio=100.0, symbol="AAVEUSDT", puerto=0, latencia=0.0):
+        self.limite_peso = limite_peso
+        self.precio = precio
+        self.symbol = symbol
+        self.puerto = puerto
+        self.latencia = latencia
+
+        self._lock = threading.Lock()
+        self.ventana = int(time.time() // 60)
+        self.peso_usado = 0
+        self.ordenes = {}
+        self.next_id = 1000
+        self.historial = []   # (metodo, ruta, status)
+        self.rechazos_429 = 0
+        self.server = None
+
+    # =========================================================================
+    # CICLO DE VIDA
+    # =========================================================================
+
+    def iniciar(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            def do_GET(self): stub._atender(self, 'GET')
+            def do_POST(self): stub._atender(self, 'POST')
+            def do_PUT(self): stub._atender(self, 'PUT')
+            def do_DELETE(self): stub._atender(self, 'DELETE')
+            def log_message(self, *args): pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', self.puerto), Handler)
+        self.puerto = self.server.server_port
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.puerto}"
+
+    def detener(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    # =========================================================================
+    # DESPACHO
+    # =========================================================================
+
+    def _atender(self, req, metodo):
+        url = urlparse(req.path)
+        ruta = url.path
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        largo = int(req.headers.get('Content-Length', 0) or 0)
+        if largo:
+            cuerpo = req.rfile.read(largo).decode()
+            params.update({k: v[-1] for k, v in parse_qs(cuerpo).items()})
+
+        if self.latencia: time.sleep(self.latencia)
+
+        peso = self.PESOS.get((metodo, ruta), 1)
+        if ruta == '/fapi/v1/klines':
+            limit = int(params.get('limit', 500))
+            peso = 1 if limit < 100 else (2 if limit < 500 else (5 if limit <= 1000 else 10))
+
+        with self._lock:
+            ventana = int(time.time() // 60)
+            if ventana != self.ventana:
+                self.ventana = ventana
+                self.peso_usado = 0
+
+            if self.peso_usado + peso > self.limite_peso:
+                self.rechazos_429 += 1
+                retry = 60 - int(time.time() % 60)
+                self.historial.append((metodo, ruta, 429))
+                return self._responder(req, 429, {'code': -1003, 'msg': 'Too many requests.'},
+                                       {'Retry-After': str(retry)})
+
+            self.peso_usado += peso
+            try:
+                status, data = self._resolver(metodo, ruta, params)
+            except Exception as e:
+                status, data = 400, {'code': -1100, 'msg': str(e)}
+            self.historial.append((metodo, ruta, status))
+            usado = self.peso_usado
+
+        self._responder(req, status, data, {'X-MBX-USED-WEIGHT-1M': str(usado)})
+
+    def _responder(self, req, status, data, headers):
+        body = json.dumps(data).encode()
+        req.send_response(status)
+        req.send_header('Content-Type', 'application/json')
+        req.send_header('Content-Length', str(len(body)))
+        for k, v in headers.items(): req.send_header(k, v)
+        req.end_headers()
+        req.wfile.write(body)
+
+    def _resolver(self, metodo, ruta, p):
+        ahora = int(time.time() * 1000)
+
+        if ruta == '/fapi/v1/time':
+            return 200, {'serverTime': ahora}
+        if ruta == '/fapi/v1/exchangeInfo':
+            return 200, {'symbols': [{'symbol': self.symbol, 'filters': [
+                {'filterType': 'LOT_SIZE', 'stepSize': '0.1', 'minQty': '0.1'},
+                {'filterType': 'PRICE_FILTER', 'tickSize': '0.01'}]}]}
+        if ruta == '/fapi/v1/ticker/price':
+            ticker = {'symbol': self.symbol, 'price': str(self.precio)}
+            return 200, ticker if 'symbol' in p else [ticker]
+        if ruta == '/fapi/v1/klines':
+            limit = min(int(p.get('limit', 500)), 1500)
+            inicio = int(p.get('startTime', ahora - limit * 60000))
+            inicio -= inicio % 60000
+            velas = []
+            for i in range(limit):
+                ts = inicio + i * 60000
+                if ts > ahora: break
+                px = self.precio
+                velas.append([ts, str(px), str(px * 1.001), str(px * 0.999), str(px), "10", ts + 59999])
+            return 200, velas
+        if ruta == '/fapi/v2/balance':
+            return 200, [{'asset': 'USDT', 'balance': '1000.0', 'availableBalance': '1000.0'}]
+        if ruta == '/fapi/v2/positionRisk':
+            return 200, [{'symbol': self.symbol, 'positionAmt': '0', 'entryPrice': '0',
+                          'unRealizedProfit': '0', 'leverage': '5', 'positionSide': s}
+                         for s in ('LONG', 'SHORT')]
+        if ruta == '/fapi/v1/openOrders':
+            return 200, [o for o in self.ordenes.values() if o['status'] == 'NEW']
+        if ruta in ('/fapi/v1/positionSide/dual', '/fapi/v1/leverage'):
+            return 200, {'code': 200, 'msg': 'success'}
+
+        if ruta == '/fapi/v1/order':
+            if metodo == 'POST':
+                return 200, self._crear_orden(p, ahora)
+            oid = str(p.get('orderId'))
+            if oid not in self.ordenes:
+                return 400, {'code': -2013, 'msg': 'Order does not exist.'}
+            if metodo == 'DELETE':
+                self.ordenes[oid]['status'] = 'CANCELED'
+            return 200, self.ordenes[oid]
+        if ruta == '/fapi/v1/batchOrders':
+            lote = json.loads(p.get('batchOrders', '[]'))
+            return 200, [self._crear_orden(o, ahora) for o in lote]
+        if ruta == '/fapi/v1/allOpenOrders':
+            for o in self.ordenes.values():
+                if o['status'] == 'NEW': o['status'] = 'CANCELED'
+            return 200, {'code': 200, 'msg': 'success'}
+
+        return 404, {'code': -1, 'msg': f'Ruta no soportada: {metodo} {ruta}'}
+
+    def _crear_orden(self, p, ahora):
+        self.next_id += 1
+        oid = self.next_id
+        tipo = p.get('type', 'MARKET')
+        orden = {
+            'orderId': oid, 'symbol': p.get('symbol', self.symbol),
+            'side': p.get('side'), 'positionSide': p.get('positionSide', 'BOTH'),
+            'type': tipo, 'origQty': p.get('quantity', '0'),
+            'price': p.get('price', '0'), 'stopPrice': p.get('stopPrice', '0'),
+            'status': 'FILLED' if tipo == 'MARKET' else 'NEW',
+            'avgPrice': str(self.precio) if tipo == 'MARKET' else '0',
+            'executedQty': p.get('quantity', '0') if tipo == 'MARKET' else '0',
+            'updateTime': ahora
+        }
+        self.ordenes[str(oid)] = orden
+        return orden
+
+
+if __name__ == "__main__":
+    stub = StubExchange()
+    url = stub.iniciar()
+    print(f"🧪 Stub exchange escuchando en {url} (Ctrl+C para salir)")
+    try:
+        while True: time.sleep(1)
+    except KeyboardInterrupt:
+        stub.detener()
@@ -0,0 +1,131 @@
+# =============================================================================
+# UBICACIÓN: simulation/stub_telegram.py
+# DESCRIPCIÓN: TELEGRAM STUB LOCAL V1.0 (sendMessage / getUpdates + LÍMITES Y FALLOS)
+# USO: python simulation/stub_telegram.py  (o instanciar StubTelegram en pruebas)
+# =============================================================================
+
+import os
+import sys
+import json
+import time
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
+
+current_dir = os.path.dirname(os.path.abspath(__file__))
+root_dir = os.path.dirname(current_dir)
+sys.path.append(root_dir)
+
+class StubTelegram:
+    """
+    TELEGRAM STUB V1.0:
+    Servidor HTTP local que imita la Bot API usada por el notificador y el poller:
+    - POST /bot<token>/sendMessage: guarda el mensaje; puede responder 429 (retry_after)
+      si se supera 'por_segundo', o 500 en los próximos 'fallar' envíos.
+    - GET/POST /bot<token>/getUpdates: long polling real (espera hasta 'timeout' segundos)
+      sobre los comandos inyectados con inyectar_comando().
+    Uso: TelegramNotifier(token, chat, base_url=stub.iniciar())
+    """
+    def __init__(self, puerto=0, latencia=0.0, por_segundo=None):
+        self.puerto = puerto
+        self.latencia = latencia
+        self.por_segundo = por_segundo
+        self.fallar = 0
+
+        self._cond = threading.Condition()
+        self.mensajes = []      # (ts, chat_id, texto, parse_mode)
+        self.updates = []
+        self.next_update = 1
+        self.historial = []     # (metodo, ruta, status)
+        self.server = None
+
+    # =========================================================================
+    # CICLO DE VIDA
+    # =========================================================================
+
+    def iniciar(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+            def do_GET(self): stub._atender(self, 'GET')
+            def do_POST(self): stub._atender(self, 'POST')
+            def log_message(self, *args): pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', self.puerto), Handler)
+        self.server.daemon_threads = True
+        self.puerto = self.server.server_port
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        return f"http://127.0.0.1:{self.puerto}"
+
+    def detener(self):
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+
+    def inyectar_comando(self, texto, chat_id=1):
+        with self._cond:
+            self.updates.append({'update_id': self.next_update,
+                                 'message': {'chat': {'id': chat_id}, 'text': texto, 'date': int(time.time())}})
+            self.next_update += 1
+            self._cond.notify_all()
+
+    # =========================================================================
+    # DESPACHO
+    # =========================================================================
+
+    def _atender(self, req, metodo):
+        url = urlparse(req.path)
+        params = {k: v[-1] for k, v in parse_qs(url.query).items()}
+        largo = int(req.headers.get('Content-Length', 0) or 0)
+        if largo: params.update({k: v[-1] for k, v in parse_qs(req.rfile.read(largo).decode()).items()})
+        api = url.path.rsplit('/', 1)[-1]
+
+        if self.latencia: time.sleep(self.latencia)
+
+        if api == 'sendMessage': status, data = self._send_message(params)
+        elif api == 'getUpdates': status, data = self._get_updates(params)
+        else: status, data = 404, {'ok': False, 'description': 'Not Found'}
+        self.historial.append((metodo, api, status))
+
+        body = json.dumps(data).encode()
+        req.send_response(status)
+        req.send_header('Content-Type', 'application/json')
+        req.send_header('Content-Length', str(len(body)))
+        req.end_headers()
+        req.wfile.write(body)
+
+    def _send_message(self, p):
+        ahora = time.time()
+        with self._cond:
+            if self.fallar > 0:
+                self.fallar -= 1
+                return 500, {'ok': False, 'error_code': 500, 'description': 'Internal Server Error'}
+            if self.por_segundo and len([m for m in self.mensajes if ahora - m[0] < 1.0]) >= self.por_segundo:
+                return 429, {'ok': False, 'error_code': 429, 'description': 'Too Many Requests',
+                             'parameters': {'retry_after': 1}}
+            self.mensajes.append((ahora, p.get('chat_id'), p.get('text', ''), p.get('parse_mode')))
+            return 200, {'ok': True, 'result': {'message_id': len(self.mensajes)}}
+
+    def _get_updates(self, p):
+        offset = int(p.get('offset', 0) or 0)
+        limite = time.monotonic() + float(p.get('timeout', 0) or 0)
+        with self._cond:
+            while True:
+                # Como la API real: pedir con offset confirma (descarta) los anteriores
+                self.updates = [u for u in self.updates if u['update_id'] >= offset]
+                if self.updates: break
+                restante = limite - time.monotonic()
+                if restante <= 0: break
+                self._cond.wait(restante)
+            return 200, {'ok': True, 'result': list(self.updates)}
+
+
+if __name__ == "__main__":
+    stub = StubTelegram()
+    url = stub.iniciar()
+    print(f"🧪 Stub Telegram escuchando en {url} (export TELEGRAM_API_URL={url})")
+    try:
+        while True: time.sleep(1)
+    except KeyboardInterrupt:
+        stub.detener()
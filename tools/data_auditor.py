@@ -1,7 +1,7 @@
 # =============================================================================
 # UBICACIÓN: tools/data_auditor.py
-# DESCRIPCIÓN: AUDITOR FORENSE DE DATA HISTÓRICA (FIX RUTAS)
-# USO: python tools/data_auditor.py
+# DESCRIPCIÓN: AUDITOR FORENSE DE DATA HISTÓRICA V2.1 (STREAMING + PLAN DE REPARACIÓN)
+# USO: python tools/data_auditor.py [--symbol SOLUSDT]
 # =============================================================================
 
 import sys
@@ -14,127 +14,332 @@ project_root = os.path.dirname(current_dir)
 sys.path.append(project_root)
 # -------------------------------------------------------
 
+import json
+import argparse
+import numpy as np
 import pandas as pd
-import time
 from datetime import datetime
 from config.config import Config
+from data.bulk_sync import BulkSynchronizer, INTERVALOS_MS, COLUMNAS
+from data.historical_manager import HistoricalManager
 
 class DataAuditor:
-    def __init__(self):
+    """
+    AUDITOR V2.1:
+    - Lee cada archivo por chunks (un 1m de varios años nunca está entero en RAM).
+    - Detección vectorizada por chunk: huecos, duplicados, retrocesos, velas
+      desalineadas y OHLC incoherente. El estado de frontera viaja entre chunks.
+    - Consistencia de derivados: re-agrega el 1m en la misma pasada y cruza cada chunk
+      con el tramo equivalente de cada derivado (ej. high 1h == max de sus 60 minutos).
+      En memoria solo queda el cubo abierto y las filas del derivado aún no alcanzadas.
+    - Los derivados auditados son los que genera HistoricalManager (TARGET_TFS).
+    - Emite un plan de reparación JSON que HistoricalManager aplica en el próximo sync:
+      rangos a re-descargar del maestro y derivados a regenerar.
+    """
+    CHUNK = 250_000
+    MAX_EJEMPLOS = 3
+
+    def __init__(self, symbol=None, chunksize=None):
         self.data_dir = Config.DIR_DATA
-        self.symbol = Config.SYMBOL
+        self.symbol = symbol or Config.SYMBOL
+        self.chunksize = chunksize or self.CHUNK
         # Mapeo de intervalos a milisegundos
-        self.tf_ms_map = {
-            '1m': 60000,
-            '3m': 180000,
-            '5m': 300000,
-            '15m': 900000,
-            '30m': 1800000,
-            '1h': 3600000,
-            '4h': 14400000,
-            '1d': 86400000
-        }
+        self.tf_ms_map = INTERVALOS_MS
+        self.derivados = list(HistoricalManager.TARGET_TFS)
 
     def auditar_todo(self):
-        """Ejecuta la auditoría completa de todas las temporalidades."""
+        """Ejecuta la auditoría completa de todas las temporalidades. Retorna el plan."""
         print(f"\n🔍 INICIANDO AUDITORÍA FORENSE PARA {self.symbol}...")
         print("="*70)
-        
-        reporte_general = True
-        
-        # 1. Auditar la SEMILLA (1m) - Prioridad Crítica
+
+        plan = {'symbol': self.symbol, 'maestro': '1m', 'generado': datetime.utcnow().isoformat(),
+                'refetch': [], 'reescribir': False, 'regenerar': [], 'resumen': {}}
+
+        # 1. Auditar la SEMILLA (1m) + agregados para validar derivados - Prioridad Crítica
         print(f"📂 Auditando MASTER (1m)...")
-        estado_1m = self._auditar_archivo('1m', critico=True)
+        res_1m, consistencia = self._auditar_archivo('1m', critico=True, comparar=self._comparadores())
+        plan['resumen']['1m'] = res_1m
+        estado_1m = res_1m.get('valido', False)
+        if res_1m.get('existe'):
+            plan['refetch'] = res_1m.pop('rangos_refetch')
+            plan['reescribir'] = bool(res_1m['duplicados'] or res_1m['retrocesos'])
         if not estado_1m:
-            reporte_general = False
             print("❌ LA DATA MAESTRA (1m) ESTÁ DAÑADA. SE REQUIERE INTERVENCIÓN.")
-        
+
         print("-" * 70)
 
-        # 2. Auditar DERIVADOS (Solo informativo)
-        tfs_derivados = [tf for tf in Config.TIMEFRAMES if tf != '1m']
-        for tf in tfs_derivados:
+        # 2. Auditar DERIVADOS (se reparan regenerando desde el maestro)
+        for tf in self.derivados:
             print(f"📂 Auditando Derivado ({tf})...")
-            estado = self._auditar_archivo(tf, critico=False)
-            if not estado:
+            res, _ = self._auditar_archivo(tf, critico=False)
+            res.pop('rangos_refetch', None)
+            if res.get('existe') and consistencia is not None:
+                res['consistencia'] = self._reportar_consistencia(consistencia.get(tf))
+            plan['resumen'][tf] = res
+            cons = res.get('consistencia') or {}
+            if not res.get('valido') or res.get('huecos') or cons.get('discrepancias') or cons.get('faltantes'):
+                plan['regenerar'].append(tf)
                 print(f"   ⚠️  Recomendación: El archivo {tf} debería ser regenerado.")
-        
+
+        # Reparar el maestro invalida todos los derivados
+        if plan['refetch'] or plan['reescribir']:
+            plan['regenerar'] = list(self.derivados)
+
         print("="*70)
-        if reporte_general:
+        if estado_1m and not plan['refetch'] and not plan['regenerar']:
             print("✅ DIAGNÓSTICO: La estructura de datos es saludable.")
         else:
             print("⚠️ DIAGNÓSTICO: Se encontraron errores que requieren atención.")
+        self._guardar_plan(plan)
+        return plan
 
-    def _auditar_archivo(self, tf, critico=False):
+    # =========================================================================
+    # AUDITORÍA POR CHUNKS
+    # =========================================================================
+
+    def _auditar_archivo(self, tf, critico=False, comparar=None):
         filename = f"{self.symbol}_{tf}.csv"
         path = os.path.join(self.data_dir, filename)
-        
+        paso = self.tf_ms_map.get(tf, 60000)
+        res = {'existe': False, 'valido': False}
+
+        comparar = comparar or {}
         # A. Existencia
         if not os.path.exists(path):
             print(f"   ❌ NO EXISTE: {filename}")
-            return False
-            
+            return res, _cerrar(comparar)
+        res['existe'] = True
+
         try:
-            # B. Lectura e Integridad
-            df = pd.read_csv(path)
-            if df.empty:
-                print(f"   ❌ ARCHIVO VACÍO: {filename}")
-                return False
-                
-            if 'timestamp' not in df.columns:
+            cabecera = pd.read_csv(path, nrows=0).columns
+            if 'timestamp' not in cabecera:
                 print(f"   ❌ FORMATO INVÁLIDO (Sin columna timestamp)")
-                return False
-
-            # C. Análisis de Continuidad
-            df['ts_diff'] = df['timestamp'].diff()
-            expected_diff = self.tf_ms_map.get(tf, 60000)
-            
-            # Buscamos saltos mayores al esperado (Gaps)
-            # Tolerancia pequeña de 1ms por errores de redondeo
-            gaps = df[df['ts_diff'] > expected_diff]
-            
-            # Buscamos duplicados o retrocesos (Diff <= 0)
-            errores_seq = df[df['ts_diff'] <= 0]
-            
-            total_velas = len(df)
-            inicio = pd.to_datetime(df.iloc[0]['timestamp'], unit='ms')
-            fin = pd.to_datetime(df.iloc[-1]['timestamp'], unit='ms')
-            
-            print(f"   ℹ️  Velas: {total_velas:,} | Desde: {inicio} | Hasta: {fin}")
-            
-            es_valido = True
-            
+                return res, _cerrar(comparar)
+            cols = [c for c in COLUMNAS if c in cabecera]
+
+            velas = duplicados = retrocesos = desalineadas = invalidas = 0
+            huecos, refetch, ejemplos = [], [], {'secuencia': [], 'ohlc': []}
+            inicio = fin = None
+            maximo = None          # Mayor cubo visto hasta ahora (frontera entre chunks)
+
+            # B. Lectura e Integridad, chunk a chunk
+            for chunk in pd.read_csv(path, usecols=cols, chunksize=self.chunksize):
+                if chunk.empty: continue
+                ts = chunk['timestamp'].to_numpy(dtype=np.int64)
+                cubo = ts - ts % paso
+                velas += len(ts)
+                if inicio is None: inicio = int(ts[0])
+                fin = int(ts[-1])
+
+                # C. Análisis de Continuidad contra el máximo acumulado
+                previos = np.maximum.accumulate(np.concatenate(([maximo], cubo)) if maximo is not None else cubo)
+                ref = previos[:-1] if maximo is not None else np.concatenate(([cubo[0] - paso], previos[:-1]))
+                diff = cubo - ref
+                duplicados += int((diff == 0).sum())
+                retrocesos += int((diff < 0).sum())
+                idx = np.nonzero(diff > paso)[0]
+                for i in idx:
+                    huecos.append([int(ref[i] + paso), int(cubo[i] - paso)])
+                for i in np.nonzero(diff <= 0)[0][:self.MAX_EJEMPLOS - len(ejemplos['secuencia'])]:
+                    ejemplos['secuencia'].append(int(ts[i]))
+                maximo = int(previos[-1])
+
+                if tf == '1m':
+                    desalineadas += int((ts % paso != 0).sum())
+
+                # D. Coherencia OHLC vectorizada
+                if all(c in chunk.columns for c in ('open', 'high', 'low', 'close')):
+                    o, h, l, c = (chunk[k].to_numpy(dtype=float) for k in ('open', 'high', 'low', 'close'))
+                    malas = (np.isnan(o) | np.isnan(h) | np.isnan(l) | np.isnan(c)
+                             | (h < np.maximum(o, c)) | (l > np.minimum(o, c)) | (l <= 0))
+                    if 'volume' in chunk.columns: malas |= chunk['volume'].to_numpy(dtype=float) < 0
+                    n_malas = int(malas.sum())
+                    if n_malas:
+                        invalidas += n_malas
+                        ts_malas = ts[malas]
+                        ejemplos['ohlc'].extend(int(x) for x in ts_malas[:self.MAX_EJEMPLOS - len(ejemplos['ohlc'])])
+                        if tf == '1m': refetch.extend([int(x), int(x)] for x in ts_malas)
+
+                for c in comparar.values(): c.agregar(chunk)
+
+            if not velas:
+                print(f"   ❌ ARCHIVO VACÍO: {filename}")
+                return res, _cerrar(comparar)
+
+            faltantes = sum((b - a) // paso + 1 for a, b in huecos)
+            res.update({'velas': velas, 'desde': inicio, 'hasta': fin, 'huecos': len(huecos),
+                        'velas_faltantes': int(faltantes), 'duplicados': duplicados, 'retrocesos': retrocesos,
+                        'desalineadas': desalineadas, 'ohlc_invalidas': invalidas, 'ejemplos': ejemplos,
+                        'rangos_refetch': _fusionar_rangos(huecos + refetch, paso) if tf == '1m' else []})
+            res['valido'] = not (duplicados or retrocesos or invalidas)
+
+            print(f"   ℹ️  Velas: {velas:,} | Desde: {pd.to_datetime(inicio, unit='ms')} | Hasta: {pd.to_datetime(fin, unit='ms')}")
+
             # REPORTE DE ERRORES
-            if not errores_seq.empty:
-                print(f"   ❌ ERRORES DE SECUENCIA: {len(errores_seq)} registros duplicados o desordenados.")
-                try:
-                    print(f"       Ejemplo: {pd.to_datetime(errores_seq.iloc[0]['timestamp'], unit='ms')}")
-                except: pass
-                es_valido = False
-                
-            if not gaps.empty:
-                num_gaps = len(gaps)
-                print(f"   ⚠️  HUECOS (GAPS) DETECTADOS: {num_gaps}")
+            if duplicados or retrocesos:
+                print(f"   ❌ ERRORES DE SECUENCIA: {duplicados} duplicados, {retrocesos} desordenados.")
+                if ejemplos['secuencia']:
+                    print(f"       Ejemplo: {pd.to_datetime(ejemplos['secuencia'][0], unit='ms')}")
+            if invalidas:
+                print(f"   ❌ OHLC INCOHERENTE: {invalidas} velas (high/low fuera de rango, NaN o negativos).")
+            if desalineadas:
+                print(f"   ⚠️  VELAS DESALINEADAS: {desalineadas}")
+            if huecos:
+                print(f"   ⚠️  HUECOS (GAPS) DETECTADOS: {len(huecos)} ({faltantes:,} velas faltantes)")
                 # Mostrar los primeros 3 gaps
-                for idx, row in gaps.head(3).iterrows():
-                    ts_gap = row['timestamp']
-                    gap_time = pd.to_datetime(ts_gap, unit='ms')
-                    print(f"       -> Salto en: {gap_time}")
-                
+                for a, _ in huecos[:self.MAX_EJEMPLOS]:
+                    print(f"       -> Salto en: {pd.to_datetime(a, unit='ms')}")
                 if critico:
                     print("       (Para 1m, estos huecos afectan los indicadores)")
-            
-            if es_valido and gaps.empty:
+
+            if res['valido'] and not huecos:
                 print(f"   ✅ INTEGRIDAD PERFECTA")
-            elif es_valido and not gaps.empty:
+            elif res['valido']:
                 print(f"   ⚠️  INTEGRIDAD OK (Con huecos temporales)")
-                
-            return es_valido
+
+            consistencia = {t: c.resultado() for t, c in comparar.items()} if comparar else None
+            return res, consistencia
 
         except Exception as e:
             print(f"   ❌ CORRUPCIÓN CRÍTICA: No se puede leer el archivo ({e})")
-            return False
+            return res, _cerrar(comparar)
+
+    # =========================================================================
+    # CONSISTENCIA DERIVADO vs MAESTRO
+    # =========================================================================
+
+    def _comparadores(self):
+        """Un comparador por derivado existente; se alimentan durante la pasada del 1m."""
+        res = {}
+        for tf in self.derivados:
+            path = os.path.join(self.data_dir, f"{self.symbol}_{tf}.csv")
+            if os.path.exists(path):
+                res[tf] = _Comparador(path, self.tf_ms_map[tf], self.chunksize, self.MAX_EJEMPLOS)
+        return res
+
+    def _reportar_consistencia(self, cons):
+        """Imprime el resultado de un _Comparador. Sin el último cubo (abierto)."""
+        if cons is None: return None
+        if cons['discrepancias']:
+            print(f"   ❌ INCONSISTENTE CON 1m: {cons['discrepancias']} de {cons['comparadas']} velas difieren de su agregado.")
+        elif cons['faltantes'] > 0:
+            print(f"   ⚠️  Derivado desactualizado: {cons['faltantes']} cubos del 1m sin vela.")
+        else:
+            print(f"   ✅ Consistente con el maestro 1m ({cons['comparadas']:,} velas)")
+        return cons
+
+    # =========================================================================
+    # PLAN DE REPARACIÓN
+    # =========================================================================
+
+    def _guardar_plan(self, plan):
+        path = BulkSynchronizer(None, self.data_dir).ruta_plan(self.symbol)
+        if not (plan['refetch'] or plan['reescribir'] or plan['regenerar']):
+            if os.path.exists(path): os.remove(path)
+            return
+        tmp = path + ".tmp"
+        with open(tmp, 'w') as f: json.dump(plan, f, indent=1)
+        os.replace(tmp, path)
+        print(f"📝 Plan de reparación: {len(plan['refetch'])} rangos a re-descargar, "
+              f"{len(plan['regenerar'])} derivados a regenerar -> {path}")
+        print("   (Se aplicará en el próximo sync de HistoricalManager)")
+
+
+class _Comparador:
+    """
+    Consistencia de un derivado en streaming: re-agrega cada chunk del 1m y lo cruza con
+    el tramo equivalente del archivo derivado, que se lee a la par. El último cubo queda
+    abierto hasta el siguiente chunk y nunca se compara (vela en formación).
+    """
+    COLS = ['open', 'high', 'low', 'close', 'volume']
+
+    def __init__(self, path, paso, chunksize, max_ejemplos):
+        self.paso = paso
+        self.max_ejemplos = max_ejemplos
+        self.lector = pd.read_csv(path, usecols=COLUMNAS, chunksize=chunksize)
+        self.pendiente = None      # Filas del derivado leídas y aún no alcanzadas por el 1m
+        self.agotado = False
+        self.abierto = None
+        self.error = None
+        self.comparadas = self.discrepancias = self.faltantes = 0
+        self.ejemplos = []
+
+    def agregar(self, chunk):
+        if self.error: return
+        try:
+            cubo = chunk['timestamp'] - chunk['timestamp'] % self.paso
+            g = chunk.groupby(cubo.to_numpy(), sort=True).agg(
+                open=('open', 'first'), high=('high', 'max'), low=('low', 'min'),
+                close=('close', 'last'), volume=('volume', 'sum'))
+            if self.abierto is not None:
+                if g.index[0] == self.abierto.index[0]:
+                    prev, cur = self.abierto.iloc[0], g.iloc[0]
+                    g.iloc[0] = [prev['open'], max(prev['high'], cur['high']), min(prev['low'], cur['low']),
+                                 cur['close'], prev['volume'] + cur['volume']]
+                else:
+                    g = pd.concat([self.abierto, g])
+            self.abierto = g.iloc[-1:]
+            self._comparar(g.iloc[:-1])
+        except Exception as e:
+            self.error = str(e)
+            self.lector.close()
+
+    def _leer_hasta(self, hasta):
+        while not self.agotado and (self.pendiente is None or self.pendiente.empty or self.pendiente.index.max() < hasta):
+            try: chunk = next(self.lector)
+            except StopIteration:
+                self.agotado = True
+                break
+            chunk = chunk.set_index(chunk['timestamp'] - chunk['timestamp'] % self.paso)[self.COLS]
+            self.pendiente = chunk if self.pendiente is None else pd.concat([self.pendiente, chunk])
+
+    def _comparar(self, esperado):
+        if esperado.empty: return
+        esperado = esperado[~esperado.index.duplicated(keep='last')]
+        hasta = esperado.index.max()
+        self._leer_hasta(hasta)
+        derivado = self.pendiente
+        if derivado is None or derivado.empty:
+            self.faltantes += len(esperado)
+            return
+        derivado = derivado[~derivado.index.duplicated(keep='last')]
+        comunes = derivado.index.intersection(esperado.index)
+        if not comunes.empty:
+            a = derivado.loc[comunes, self.COLS].to_numpy(dtype=float)
+            b = esperado.loc[comunes, self.COLS].to_numpy(dtype=float)
+            difiere = ~np.isclose(a, b, rtol=1e-6, atol=1e-8).all(axis=1)
+            self.comparadas += len(comunes)
+            self.discrepancias += int(difiere.sum())
+            self.ejemplos.extend(int(x) for x in comunes[difiere][:self.max_ejemplos - len(self.ejemplos)])
+        self.faltantes += len(esperado) - len(comunes)
+        # Lo ya cubierto por el 1m no vuelve a compararse
+        self.pendiente = self.pendiente[self.pendiente.index > hasta]
+
+    def resultado(self):
+        self.lector.close()
+        if self.error or not (self.comparadas or self.faltantes): return None
+        return {'comparadas': self.comparadas, 'discrepancias': self.discrepancias,
+                'faltantes': self.faltantes, 'ejemplos': self.ejemplos}
+
+
+def _cerrar(comparadores):
+    """Libera los lectores de los derivados si la pasada del 1m se aborta."""
+    for c in comparadores.values(): c.lector.close()
+    return None
+
+
+def _fusionar_rangos(rangos, paso):
+    """Ordena y une rangos [inicio, fin] solapados o contiguos."""
+    res = []
+    for a, b in sorted(rangos):
+        if res and a <= res[-1][1] + paso: res[-1][1] = max(res[-1][1], b)
+        else: res.append([a, b])
+    return [{'tf': '1m', 'inicio': a, 'fin': b} for a, b in res]
+
 
 if __name__ == "__main__":
-    auditor = DataAuditor()
-    auditor.auditar_todo()
\ No newline at end of file
+    parser = argparse.ArgumentParser(description="Auditoría de data histórica por chunks")
+    parser.add_argument('--symbol', default=None)
+    args = parser.parse_args()
+    auditor = DataAuditor(symbol=args.symbol)
+    auditor.auditar_todo()
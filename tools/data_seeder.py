@@ -17,11 +17,11 @@ class DataSeeder:
     - Solo procesa datos LOCALES para generar temporalidades.
     - Velocidad optimizada: Calcula indicadores en memoria RAM.
     """
-    def __init__(self, api_manager=None):
+    def __init__(self, api_manager=None, symbol=None):
         # NOTA: Ya no usamos api_manager ni client aquí. Es puramente matemático.
         self.lab = PrecisionLab()
         self.scanner = FVGScanner()
-        self.symbol = Config.SYMBOL
+        self.symbol = symbol or Config.SYMBOL
         self.data_dir = Config.DIR_DATA
         self.maps_dir = Config.DIR_MAPS
         
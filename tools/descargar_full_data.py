@@ -1,13 +1,17 @@
 # =============================================================================
 # UBICACIÓN: tools/descargar_full_data.py
-# DESCRIPCIÓN: MINERO DE DATOS PROFUNDO (COMPATIBLE CON DATASEEDER V18)
+# DESCRIPCIÓN: MINERO DE DATOS PROFUNDO V2.0 (CHUNKS PARALELOS + MANIFIESTO REANUDABLE)
+# USO: python tools/descargar_full_data.py [--dias 730] [--symbol SOLUSDT]
 # =============================================================================
 
 import time
-import pandas as pd
+import json
 import os
 import sys
-from datetime import datetime, timedelta
+import argparse
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from binance.client import Client
 
 # Aseguramos que Python encuentre tus módulos
@@ -17,121 +21,211 @@ sys.path.append(project_root)
 
 from config.config import Config
 from tools.data_seeder import DataSeeder
+from connections.transport import obtener_transporte
+from connections.rate_governor import obtener_gobernador, RateGovernor
+
+MINUTO_MS = 60 * 1000
+COLUMNAS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
 
 class HistoricalMiner:
-    def __init__(self):
+    """
+    MINERO PROFUNDO V2.0:
+    - El rango se parte en chunks alineados a una rejilla fija (múltiplos de la
+      duración del chunk), así el mismo chunk tiene la misma clave entre corridas.
+    - Los chunks se descargan en paralelo; el ritmo lo impone el gobernador de peso.
+    - Cada chunk terminado se escribe en staging y se registra en el manifiesto:
+      un corte solo pierde los chunks en vuelo y la siguiente corrida los retoma.
+    - Fusión final en streaming (chunk a chunk) al maestro 1m, sin DataFrame gigante.
+    """
+    def __init__(self, symbol=None, dias=None):
         print("🔧 Inicializando Minero Histórico...")
+        mcfg = Config.MinerConfig
         self.client = Client(Config.API_KEY, Config.API_SECRET)
-        self.seeder = DataSeeder() # Instanciamos el motor offline V18
-        self.symbol = Config.SYMBOL
+        # Reutiliza el pool keep-alive de mercado (sin handshake TLS por bloque)
+        obtener_transporte().montar(self.client.session, 'MARKET')
+        self.gov = obtener_gobernador()
+        # El gobernador ajusta su presupuesto con el peso usado que informa cada respuesta
+        self.client.session.hooks['response'].append(self.gov.hook_respuesta)
+        self.symbol = symbol or Config.SYMBOL
+        self.seeder = DataSeeder(symbol=self.symbol) # Instanciamos el motor offline V18
         self.data_dir = Config.DIR_DATA
-        
-        # Un año en milisegundos (aprox)
-        self.one_year_ms = 365 * 24 * 60 * 60 * 1000
-        
+        self.hilos = mcfg.HILOS
+        self.chunk_ms = mcfg.VELAS_POR_CHUNK * MINUTO_MS
+        self.rango_ms = (dias or mcfg.DIAS_DEFAULT) * 24 * 60 * MINUTO_MS
+
+        self.staging_dir = os.path.join(self.data_dir, "_staging", f"{self.symbol}_1m")
+        self.path_manifiesto = os.path.join(self.staging_dir, "manifest.json")
+        self._lock = threading.Lock()
+        self.manifiesto = None
+        self.abiertos = set()
+
     def ejecutar_mineria(self):
-        print(f"\n🌍 INICIANDO DESCARGA TOTAL (1 AÑO) PARA: {self.symbol}")
+        dias = self.rango_ms // (24 * 60 * MINUTO_MS)
+        print(f"\n🌍 INICIANDO DESCARGA TOTAL ({dias} DÍAS) PARA: {self.symbol}")
         print("="*60)
-        
-        # 1. DESCARGA MAESTRA 1M (Internet)
-        df_1m = self._descargar_bucle_seguro()
-        
-        if df_1m is None or df_1m.empty:
+
+        # 1. DESCARGA MAESTRA 1M POR CHUNKS (Internet)
+        chunks = self._descargar_chunks()
+        if not chunks:
             print("❌ Fallo en la descarga. Abortando.")
             return
 
-        print(f"\n💾 Guardando Maestro 1m ({len(df_1m)} velas)...")
-        self._guardar_maestro(df_1m)
-        
-        # 2. GENERACIÓN DE DERIVADOS (Offline)
+        # 2. FUSIÓN STREAMING -> MAESTRO
+        total = self._fusionar(chunks)
+        if not total:
+            print("❌ Staging vacío. Abortando.")
+            return
+
+        # 3. GENERACIÓN DE DERIVADOS (Offline)
         print("\n⚙️ ACTIVANDO MOTOR DE GENERACIÓN (DataSeeder)...")
         print("   (Esto procesará 2m, 3m, 5m, 15m, 30m, 1h, 4h, 1d localmente)")
-        
+
         # CRÍTICO: Usamos la interfaz pública del Seeder, no métodos internos.
         # El Seeder leerá el archivo 1m que acabamos de guardar.
         self.seeder.sembrar_datos()
-        
+
         print("\n✅ PROCESO COMPLETADO EXITOSAMENTE.")
         print(f"📂 Verifica tu carpeta: {self.data_dir}")
 
-    def _descargar_bucle_seguro(self):
-        """Bucle robusto para descargar data histórica sin romper límites."""
+    # =========================================================================
+    # MANIFIESTO
+    # =========================================================================
+
+    def _cargar_manifiesto(self):
+        os.makedirs(self.staging_dir, exist_ok=True)
+        vacio = {'symbol': self.symbol, 'tf': '1m', 'chunk_ms': self.chunk_ms, 'completos': {}}
+        if os.path.exists(self.path_manifiesto):
+            try:
+                with open(self.path_manifiesto) as f: m = json.load(f)
+                # Otra rejilla de chunks invalida lo ya descargado
+                if m.get('chunk_ms') == self.chunk_ms and m.get('symbol') == self.symbol: return m
+            except Exception: pass
+        return vacio
+
+    def _guardar_manifiesto(self):
+        tmp = self.path_manifiesto + ".tmp"
+        with open(tmp, 'w') as f: json.dump(self.manifiesto, f, indent=1)
+        os.replace(tmp, self.path_manifiesto)
+
+    def _archivo_chunk(self, inicio):
+        return os.path.join(self.staging_dir, f"chunk_{inicio}.csv")
+
+    # =========================================================================
+    # DESCARGA
+    # =========================================================================
+
+    def _descargar_chunks(self):
+        """Descarga en paralelo los chunks que falten. Retorna los inicios del rango, ordenados."""
         end_ts = int(time.time() * 1000)
-        start_ts = end_ts - self.one_year_ms
-        
-        current_start = start_ts
-        all_candles = []
-        
+        start_ts = end_ts - self.rango_ms
+        primero = start_ts - (start_ts % self.chunk_ms)
+        chunks = list(range(primero, end_ts, self.chunk_ms))
+
+        self.manifiesto = self._cargar_manifiesto()
+        completos = self.manifiesto['completos']
+        pendientes = [c for c in chunks
+                      if str(c) not in completos or not os.path.exists(self._archivo_chunk(c))]
+        for c in pendientes: completos.pop(str(c), None)
+
         print(f"📅 Rango: {datetime.fromtimestamp(start_ts/1000)} -> {datetime.fromtimestamp(end_ts/1000)}")
-        
-        while current_start < end_ts:
+        print(f"📦 Chunks: {len(chunks)} | En staging: {len(chunks) - len(pendientes)} | Pendientes: {len(pendientes)}")
+
+        hechos, fallidos = 0, 0
+        with ThreadPoolExecutor(max_workers=self.hilos) as pool:
+            futuros = {pool.submit(self._descargar_chunk, c, min(c + self.chunk_ms, end_ts)): c for c in pendientes}
+            for fut in as_completed(futuros):
+                try: ok = fut.result()
+                except Exception as e:
+                    print(f"\n   ❌ Chunk {futuros[fut]}: {e}")
+                    ok = False
+                hechos += 1
+                if not ok: fallidos += 1
+                print(f"   [{hechos / len(pendientes) * 100:.1f}%] {hechos}/{len(pendientes)} chunks | Fallidos: {fallidos}", end='\r')
+        print()
+
+        if fallidos:
+            print(f"⚠️ {fallidos} chunks fallidos. Vuelve a ejecutar para reanudar desde el manifiesto.")
+            return None
+        return [c for c in chunks if str(c) in completos or c in self.abiertos]
+
+    def _descargar_chunk(self, inicio, fin):
+        """Baja [inicio, fin) en bloques de 1000 y lo persiste en staging de forma atómica."""
+        velas = []
+        cursor = inicio
+        intentos = 0
+        while cursor < fin:
             try:
-                # Descarga por lotes de 1000 (Límite seguro de Binance)
+                self.gov.adquirir(RateGovernor.peso_klines(1000), 'BACKFILL')
                 klines = self.client.get_klines(
                     symbol=self.symbol,
                     interval=Client.KLINE_INTERVAL_1MINUTE,
-                    startTime=current_start,
+                    startTime=cursor, endTime=fin - 1,
                     limit=1000
                 )
-                
-                if not klines:
-                    break
-                    
-                # Procesar lote
-                for k in klines:
-                    all_candles.append({
-                        'timestamp': int(k[0]),
-                        'open': float(k[1]), 'high': float(k[2]),
-                        'low': float(k[3]), 'close': float(k[4]),
-                        'volume': float(k[5])
-                    })
-                
-                # Actualizar cursor de tiempo (último cierre + 1ms)
-                last_ts = int(klines[-1][0])
-                current_start = last_ts + 1 
-                
-                # Feedback visual
-                progreso = (current_start - start_ts) / (end_ts - start_ts) * 100
-                if progreso > 100: progreso = 100
-                fecha_actual = datetime.fromtimestamp(last_ts/1000).strftime('%Y-%m-%d %H:%M')
-                
-                # Imprimir sobre la misma línea para no ensuciar consola
-                print(f"   [{progreso:.1f}%] {fecha_actual} | Acumulado: {len(all_candles)} velas", end='\r')
-                
-                # Pausa técnica para evitar Ban de IP
-                time.sleep(0.1) 
-                
             except Exception as e:
+                intentos += 1
+                if intentos > 5: raise
                 print(f"\n   ❌ Error en API: {e}. Reintentando en 5s...")
                 time.sleep(5)
-        
-        print() # Salto de línea al final
-        
-        if not all_candles:
-            return None
-            
-        # Limpieza final
-        df = pd.DataFrame(all_candles)
-        df.drop_duplicates(subset='timestamp', inplace=True)
-        df.sort_values('timestamp', inplace=True)
-        df.reset_index(drop=True, inplace=True)
-        
-        return df
-
-    def _guardar_maestro(self, df):
-        path = os.path.join(self.data_dir, f"{self.symbol}_1m.csv")
-        # Asegurar directorio
+                continue
+
+            if not klines: break
+            velas.extend(k[:6] for k in klines)
+            cursor = int(klines[-1][0]) + MINUTO_MS
+
+        # El chunk que contiene "ahora" sigue abierto: se guarda pero no se da por completo
+        cerrado = fin == inicio + self.chunk_ms
+        path = self._archivo_chunk(inicio)
+        tmp = path + ".tmp"
+        with open(tmp, 'w', newline='') as f:
+            f.writelines(f"{int(k[0])},{float(k[1])},{float(k[2])},{float(k[3])},{float(k[4])},{float(k[5])}\n"
+                         for k in velas)
+        os.replace(tmp, path)
+
+        with self._lock:
+            if cerrado:
+                self.manifiesto['completos'][str(inicio)] = {'velas': len(velas)}
+                self._guardar_manifiesto()
+            else:
+                # Se fusiona en esta corrida, pero la próxima lo vuelve a bajar
+                self.abiertos.add(inicio)
+        return True
+
+    # =========================================================================
+    # FUSIÓN
+    # =========================================================================
+
+    def _fusionar(self, chunks):
+        """Concatena los chunks (disjuntos y ordenados por construcción) al maestro 1m."""
         if not os.path.exists(self.data_dir):
             os.makedirs(self.data_dir)
-            
-        df.to_csv(path, index=False)
-        print(f"✅ Archivo Maestro guardado en: {path}")
+        path = os.path.join(self.data_dir, f"{self.symbol}_1m.csv")
+        tmp = path + ".tmp"
+
+        total, ultimo = 0, -1
+        with open(tmp, 'w', newline='') as out:
+            out.write(",".join(COLUMNAS) + "\n")
+            for c in chunks:
+                with open(self._archivo_chunk(c)) as f:
+                    for linea in f:
+                        ts = int(linea.split(',', 1)[0])
+                        if ts <= ultimo: continue
+                        out.write(linea)
+                        ultimo = ts
+                        total += 1
+        os.replace(tmp, path)
+        print(f"\n💾 Maestro 1m guardado ({total} velas) en: {path}")
+        return total
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Minero histórico 1m por chunks paralelos")
+    parser.add_argument('--dias', type=int, default=None)
+    parser.add_argument('--symbol', default=None)
+    args = parser.parse_args()
     try:
-        miner = HistoricalMiner()
+        miner = HistoricalMiner(symbol=args.symbol, dias=args.dias)
         miner.ejecutar_mineria()
     except KeyboardInterrupt:
-        print("\n🛑 Proceso interrumpido por el usuario.")
+        print("\n🛑 Proceso interrumpido. El manifiesto conserva los chunks terminados.")
     except Exception as e:
-        print(f"\n❌ Error fatal: {e}")
\ No newline at end of file
+        print(f"\n❌ Error fatal: {e}")
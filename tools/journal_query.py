@@ -0,0 +1,79 @@
+# =============================================================================
+# UBICACIÓN: tools/journal_query.py
+# DESCRIPCIÓN: CONSULTA DEL JOURNAL DE EVENTOS V1.0 (TIMELINE / ESTADO DEL DÍA)
+# USO: python tools/journal_query.py --pos ID
+#      python tools/journal_query.py --dia 20250101 [--hasta "2025-01-01 14:30"]
+#      python tools/journal_query.py --desde "2025-01-01 09:00" --tipo SL_MOVED,TP_HIT
+# =============================================================================
+
+import sys
+import os
+
+# --- FIX DE RUTAS: Agregar raíz del proyecto al Path ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+# -------------------------------------------------------
+
+import time
+import json
+import argparse
+from datetime import datetime
+from logs.event_journal import EventJournal
+
+def _a_ms(texto):
+    """'YYYY-MM-DD[ HH:MM[:SS]]' (hora local) -> epoch ms."""
+    if texto is None: return None
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try: return int(datetime.strptime(texto, fmt).timestamp() * 1000)
+        except ValueError: continue
+    raise SystemExit(f"❌ Fecha inválida: {texto}")
+
+def _hora(ms):
+    return datetime.fromtimestamp(ms / 1000).strftime('%Y-%m-%d %H:%M:%S.%f')[:-3]
+
+def _imprimir_evento(ev):
+    extra = {k: v for k, v in ev.items() if k not in ('t', 'e', 'p', 'k')}
+    print(f"{_hora(ev['t'])} | {ev['e']:<17} | {ev.get('p', '-'):<14} | {ev.get('k', '-'):<16} | "
+          f"{json.dumps(extra, ensure_ascii=False)}")
+
+def main():
+    parser = argparse.ArgumentParser(description="Consulta del journal de órdenes y posiciones")
+    parser.add_argument('--pos', default=None, help="Timeline completo de una posición")
+    parser.add_argument('--dia', default=None, help="Estado reconstruido del día (YYYYMMDD)")
+    parser.add_argument('--desde', default=None)
+    parser.add_argument('--hasta', default=None)
+    parser.add_argument('--tipo', default=None, help="Filtro de eventos separados por coma")
+    parser.add_argument('--dir', default=None, help="Directorio del journal (default logs/journal)")
+    args = parser.parse_args()
+
+    journal = EventJournal(base_dir=args.dir)
+    t0 = time.perf_counter()
+
+    if args.pos:
+        eventos = journal.timeline(args.pos)
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"\n🧭 TIMELINE {args.pos}: {len(eventos)} eventos ({ms:.2f} ms)\n")
+        for ev in eventos: _imprimir_evento(ev)
+
+    elif args.dia and not (args.desde or args.tipo):
+        posiciones = journal.estado(dia=args.dia, hasta=_a_ms(args.hasta))
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"\n📒 ESTADO {args.dia}: {len(posiciones)} posiciones ({ms:.2f} ms)\n")
+        for pos in sorted(posiciones.values(), key=lambda p: p['abierta'] or 0):
+            abierta = _hora(pos['abierta']) if pos['abierta'] else '-'
+            print(f"{pos['id']:<14} | {str(pos['key']):<16} | {pos['estado']:<9} | {abierta} | "
+                  f"entry={pos.get('entry_price')} qty={pos.get('qty')} sl={pos.get('sl_price')} "
+                  f"tps={pos.get('tps', [])} motivo={pos.get('motivo', '-')}")
+
+    else:
+        tipos = set(args.tipo.split(',')) if args.tipo else None
+        n = 0
+        for ev in journal.eventos(desde=_a_ms(args.desde), hasta=_a_ms(args.hasta), tipos=tipos, dia=args.dia):
+            _imprimir_evento(ev)
+            n += 1
+        ms = (time.perf_counter() - t0) * 1000
+        print(f"\n🔎 {n} eventos ({ms:.2f} ms)")
+
+if __name__ == "__main__":
+    main()
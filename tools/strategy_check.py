@@ -0,0 +1,61 @@
+# =============================================================================
+# UBICACIÓN: tools/strategy_check.py
+# DESCRIPCIÓN: VERIFICADOR DE ESTRATEGIAS V1.0 (VECTORIZADO vs ON_BAR + CONTEO DE SEÑALES)
+# USO: python tools/strategy_check.py [--symbol AAVEUSDT] [--estrategias GAMMA,SWING] [--filas 5000]
+# =============================================================================
+
+import sys
+import os
+
+# --- FIX DE RUTAS: Agregar raíz del proyecto al Path ---
+current_dir = os.path.dirname(os.path.abspath(__file__))
+project_root = os.path.dirname(current_dir)
+sys.path.append(project_root)
+# -------------------------------------------------------
+
+import time
+import argparse
+import numpy as np
+from config.config import Config
+from data.historical_manager import HistoricalManager
+from logic.strategies import REGISTRO, crear, contexto_fibo
+
+def main():
+    parser = argparse.ArgumentParser(description="Equivalencia senales() / on_bar() sobre el caché local")
+    parser.add_argument('--symbol', default=Config.SYMBOL)
+    parser.add_argument('--estrategias', default=None, help=f"Separadas por coma ({', '.join(REGISTRO)})")
+    parser.add_argument('--filas', type=int, default=0, help="Últimas N filas de cada timeframe (0 = todas)")
+    args = parser.parse_args()
+
+    hist = HistoricalManager(None, None, symbol=args.symbol)
+    nombres = args.estrategias.split(',') if args.estrategias else None
+    fallas = 0
+
+    print(f"\n🧪 ESTRATEGIAS {args.symbol}\n")
+    for est in crear(Config, nombres):
+        frame = hist.obtener_dataframe_cache(est.TIMEFRAME)
+        if frame.empty:
+            print(f"⚠️ {est.NOMBRE}: sin caché {est.TIMEFRAME}")
+            continue
+        if args.filas: frame = frame.iloc[-args.filas:]
+        for columna, tf in est.CONTEXTO.items():
+            frame = contexto_fibo(frame, hist.obtener_dataframe_cache(tf), columna)
+
+        t0 = time.perf_counter()
+        codigos = est.senales(frame)
+        t_vec = time.perf_counter() - t0
+        t0 = time.perf_counter()
+        difieren = est.verificar(frame)
+        t_bar = time.perf_counter() - t0
+
+        conteo = {est.SALIDAS[c][1] + '_' + est.SALIDAS[c][0]: int(np.sum(codigos == c)) for c in est.SALIDAS}
+        estado = "✅" if len(difieren) == 0 else f"❌ {len(difieren)} filas difieren (p. ej. {list(difieren[:5])})"
+        print(f"{est.NOMBRE:<7} {est.TIMEFRAME:<4} {len(frame):>7} filas | vectorizado {t_vec * 1000:8.2f} ms | "
+              f"on_bar+verificación {t_bar * 1000:8.1f} ms | {estado}")
+        print(f"        señales: {conteo}")
+        fallas += len(difieren)
+
+    sys.exit(1 if fallas else 0)
+
+if __name__ == "__main__":
+    main()